@@ -0,0 +1,57 @@
+"""bench_aggregate.py
+
+Time and file size of charting daily totals of raw rows: writing every raw
+row and charting them, against ``Table(aggregate=...)`` with the raw rows
+left out or written to a hidden sheet.
+
+Run with:
+    python benchmarks/bench_aggregate.py --rows 200000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Aggregate, Line, Table, Writter
+
+
+def render(data: pd.DataFrame, aggregate: Aggregate | None) -> int:
+    wb = Writter(sheet_names=["Data"])
+    table = Table("Sales", data, wb, worksheet="Data", position="A2", aggregate=aggregate)
+    table.add_to_worksheet()
+    Line(table, chart_position="E2", worksheet="Data", width=640, height=320)._create_chart()
+    return len(wb.close().getvalue())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "time": pd.Timestamp("2024-01-01") + pd.to_timedelta(
+            np.sort(rng.integers(0, 365 * 24 * 3600, args.rows)), unit="s"
+        ),
+        "sales": rng.random(args.rows) * 1_000,
+    })
+
+    cases = (
+        ("raw", None),
+        ("daily", Aggregate(resample="D")),
+        ("daily+raw", Aggregate(resample="D", raw_sheet="raw", hidden=True)),
+    )
+    for name, aggregate in cases:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            size = render(data, aggregate)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {elapsed:6.2f} s  {size / 1024 ** 2:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""bench_arrow_source.py
+
+Time and peak memory of writing a ``pyarrow.Table`` directly against
+converting it with ``to_pandas()`` first. Needs pyarrow.
+
+Peak memory adds the Python heap (tracemalloc) and the Arrow memory pool,
+which tracemalloc does not see.
+
+Run with:
+    python benchmarks/bench_arrow_source.py --rows 200000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pyarrow as pa
+
+from excel_charts import Table, Writter
+
+
+def write(data) -> None:
+    wb = Writter(sheet_names=["Data"])
+    Table("Report", data, wb, worksheet="Data", position="A2").add_to_worksheet()
+    wb.close()
+
+
+def native(table: pa.Table) -> None:
+    write(table)
+
+
+def converted(table: pa.Table) -> None:
+    write(table.to_pandas())
+
+
+def measure(request, table: pa.Table) -> tuple[float, int]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        request(table)
+        elapsed = time.perf_counter() - start
+
+        # Second run traced, tracemalloc slows it down.
+        arrow_before = pa.total_allocated_bytes()
+        tracemalloc.start()
+        request(table)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak + max(pa.total_allocated_bytes() - arrow_before, 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    table = pa.table({
+        "day": [f"day {i}" for i in range(args.rows)],
+        "sales": rng.random(args.rows) * 1_000,
+        "cost": rng.random(args.rows) * 800,
+        "units": rng.integers(0, 100, args.rows),
+    })
+
+    for name, request in (("to_pandas", converted), ("arrow", native)):
+        elapsed, peak = measure(request, table)
+        print(f"{name:>10}: {elapsed:6.2f} s  peak {peak / 1024 ** 2:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""bench_builders.py
+
+Time of building one workbook with a sheet per region: serially on the
+``Writter``, and from a thread pool through ``Writter.builder``, whose calls
+are replayed at ``close()``. Also checks that both files are identical.
+
+Threads overlap the data preparation only, the xlsxwriter calls are
+replayed one sheet after the other, so the gain depends on how much of the
+build is spent in pandas and NumPy.
+
+Run with:
+    python benchmarks/bench_builders.py --regions 8 --rows 50000 --threads 4
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Aggregate, Line, Table, Writter
+
+
+def build(sheet, region: str, data: pd.DataFrame) -> None:
+    table = Table(
+        region, data, sheet, worksheet=region, position="A2",
+        aggregate=Aggregate(resample="h"), sanitize="blank",
+    )
+    table.add_to_worksheet()
+    Line(table, chart_position="E2", worksheet=region, width=640, height=320)._create_chart()
+
+
+def parts(buffer: io.BytesIO) -> dict:
+    with zipfile.ZipFile(buffer) as archive:
+        # core.xml holds the creation time.
+        return {
+            name: archive.read(name)
+            for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--regions", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    regions = [f"Region {number}" for number in range(1, args.regions + 1)]
+    frames = {
+        region: pd.DataFrame({
+            "time": pd.date_range("2024-01-01", periods=args.rows, freq="min"),
+            "sales": rng.random(args.rows) * 1_000,
+        })
+        for region in regions
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        wb = Writter(sheet_names=regions)
+        for region in regions:
+            build(wb, region, frames[region])
+        serial = parts(wb.close())
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wb = Writter(sheet_names=regions)
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(
+                lambda region: build(wb.builder(region), region, frames[region]),
+                regions,
+            ))
+        threaded = parts(wb.close())
+        threaded_time = time.perf_counter() - start
+
+    print(f"  serial: {serial_time:6.2f} s")
+    print(f"threaded: {threaded_time:6.2f} s  ({args.threads} threads)")
+    print(f"identical: {serial == threaded}")
+
+
+if __name__ == "__main__":
+    main()
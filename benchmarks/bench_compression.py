@@ -0,0 +1,61 @@
+"""bench_compression.py
+
+Time spent in ``Writter.close()`` against the size of the file for
+xlsxwriter's default zipping and every ``Compression`` level, single
+threaded and on every core.
+
+Run with:
+    python benchmarks/bench_compression.py --rows 200000 --cols 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Table, Writter
+from excel_charts.package import Compression
+
+
+def close(data: pd.DataFrame, compression) -> tuple[float, int]:
+    """Returns (seconds in close, file size) for one compression setting."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        wb = Writter(sheet_names=["Data"], compression=compression)
+    Table("Bench", data, wb, worksheet="Data", position="A2").add_to_worksheet()
+
+    start = time.perf_counter()
+    buffer = wb.close()
+    return time.perf_counter() - start, buffer.getbuffer().nbytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({f"col_{c}": rng.random(args.rows) * 1_000 for c in range(args.cols)})
+
+    settings = [("xlsxwriter default", None)]
+    for level in (0, 1, 6, 9):
+        settings.append((f"level {level}", Compression(level=level)))
+        if level and args.threads > 1:
+            settings.append((
+                f"level {level} x{args.threads} threads",
+                Compression(level=level, threads=args.threads),
+            ))
+
+    print(f"{'setting':<24} {'close (s)':>10} {'size (MB)':>10}")
+    for name, compression in settings:
+        seconds, size = close(data, compression)
+        print(f"{name:<24} {seconds:>10.3f} {size / 1024 ** 2:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
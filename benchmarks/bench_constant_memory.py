@@ -0,0 +1,97 @@
+"""bench_constant_memory.py
+
+Compares the peak memory of the default in-memory mode with the
+``constant_memory`` streaming mode for the same report: two tables side by
+side on one sheet and a line chart over the first one.
+
+Each mode runs in its own process so the numbers do not leak into each
+other. Peak memory is the tracemalloc peak of the Python heap during the
+build and ``close()``.
+
+Run with:
+    python benchmarks/bench_constant_memory.py --rows 100000 --cols 10
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+def make_frame(rows: int, cols: int, seed: int) -> pd.DataFrame:
+    """Builds a frame with a label column followed by float columns."""
+    rng = np.random.default_rng(seed)
+    data = {"label": [f"row {i}" for i in range(rows)]}
+    for c in range(1, cols):
+        data[f"value_{c}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+
+def build(constant_memory: bool, rows: int, cols: int, queue) -> None:
+    """Builds and closes the report, then reports time and peak memory."""
+    from excel_charts import Line, SheetPlan, Table, Writter
+
+    left = make_frame(rows, cols, 0)
+    right = make_frame(rows, cols, 1)
+    path = os.path.join(tempfile.mkdtemp(), "report.xlsx")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    wb = Writter(path, sheet_names=["Data"], constant_memory=constant_memory)
+    table_left = Table("Left", left, wb, worksheet="Data", position="A2")
+    table_right = Table("Right", right, wb, worksheet="Data", position=f"A{rows + 6}")
+    chart = Line(table_left, chart_position="N2", worksheet="Data", width=640, height=320)
+
+    if constant_memory:
+        plan = SheetPlan("Data")
+        plan.add(table_left).add(table_right).add(chart)
+        plan.flush()
+    else:
+        table_left.add_to_worksheet()
+        table_right.add_to_worksheet()
+        chart._create_chart()
+    wb.close()
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((elapsed, peak, os.path.getsize(path)))
+    os.remove(path)
+
+
+def measure(constant_memory: bool, rows: int, cols: int) -> tuple:
+    queue = mp.Queue()
+    proc = mp.Process(target=build, args=(constant_memory, rows, cols, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cols", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, constant_memory in (("default", False), ("constant_memory", True)):
+        elapsed, peak, size = measure(constant_memory, args.rows, args.cols)
+        results[mode] = peak
+        print(
+            f"{mode:>15}: {elapsed:7.2f}s  peak {peak / 2**20:8.1f} MiB  "
+            f"file {size / 2**20:6.1f} MiB"
+        )
+
+    ratio = results["default"] / results["constant_memory"]
+    print(f"peak memory ratio (default / constant_memory): {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""bench_datetime.py
+
+Time of writing a datetime column: xlsxwriter's per-value conversion
+(``write_datetime`` on every ``datetime``), against the vectorized Excel
+serial conversion of ``Table``.
+
+Run with:
+    python benchmarks/bench_datetime.py --rows 500000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from excel_charts import Table, Writter
+from excel_charts.engine import excel_serials
+
+
+def per_value(times: pd.Series) -> float:
+    wb = Writter(sheet_names=["Data"])
+    ws = wb.wb.get_worksheet_by_name("Data")
+    date_format = wb.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+    start = time.perf_counter()
+    for row, value in enumerate(times.dt.to_pydatetime(), start=1):
+        ws.write_datetime(row, 0, value, date_format)
+    return time.perf_counter() - start
+
+
+def vectorized(times: pd.Series) -> float:
+    wb = Writter(sheet_names=["Data"])
+    table = Table("Times", times.to_frame(), wb, worksheet="Data", position="A2")
+    start = time.perf_counter()
+    table.add_to_worksheet(add_title=False)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    times = pd.Series(
+        pd.date_range("2024-01-01", periods=args.rows, freq="min", tz="UTC"),
+        name="time",
+    ).dt.tz_localize(None)
+
+    start = time.perf_counter()
+    excel_serials(times)
+    print(f"{'serials':>10}: {time.perf_counter() - start:6.2f} s")
+    for name, render in (("per value", per_value), ("table", vectorized)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = render(times)
+        print(f"{name:>10}: {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""bench_import.py
+
+Import time of the package, each statement timed inside a fresh
+interpreter. Exits with status 1 when ``import excel_charts``
+exceeds its budget or when a statement imports a module it should not, so
+it can run in CI as a regression check.
+
+Run with:
+    python benchmarks/bench_import.py --runs 10 --budget-ms 50
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Statement -> modules it must not import.
+STATEMENTS = {
+    "import excel_charts": ("pandas", "xlsxwriter"),
+    "from excel_charts import Writter": ("pandas",),
+    "from excel_charts import Table": ("pandas.io.formats.style",),
+    "from excel_charts import Line": ("pandas.io.formats.style",),
+}
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+leaked = [m for m in {forbidden!r} if m in sys.modules]
+print(elapsed, ",".join(leaked))
+"""
+
+
+def run(statement: str, forbidden: tuple) -> tuple[float, list]:
+    script = SCRIPT.format(statement=statement, forbidden=forbidden)
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+    ).stdout.split()
+    leaked = output[1].split(",") if len(output) > 1 else []
+    return float(output[0]), leaked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--budget-ms", type=float, default=50.0,
+        help="Maximum median time of 'import excel_charts'.",
+    )
+    args = parser.parse_args()
+
+    failures = []
+    for statement, forbidden in STATEMENTS.items():
+        timings, leaked = [], []
+        for _ in range(args.runs):
+            elapsed, leaked = run(statement, forbidden)
+            timings.append(elapsed)
+        median = statistics.median(timings) * 1000
+        print(f"{statement:>36}: median {median:7.1f} ms")
+
+        if leaked:
+            failures.append(f"'{statement}' imported {', '.join(leaked)}")
+        if statement == "import excel_charts" and median > args.budget_ms:
+            failures.append(f"'{statement}' took {median:.1f} ms > {args.budget_ms} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""bench_in_memory.py
+
+Per-request latency of serving a report from an in-memory ``Writter``
+against writing it to a temporary file and reading it back, as a web
+handler would.
+
+Run with:
+    python benchmarks/bench_in_memory.py --requests 50 --rows 5000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Line, Table, Writter
+
+
+def build(wb: Writter, data: pd.DataFrame) -> None:
+    table = Table("Report", data, wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+    Line(table, chart_position="E2", worksheet="Data", width=640, height=320)._create_chart()
+
+
+def disk_request(data: pd.DataFrame) -> bytes:
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb = Writter(path, sheet_names=["Data"])
+        build(wb, data)
+        wb.close()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def memory_request(data: pd.DataFrame) -> bytes:
+    wb = Writter(sheet_names=["Data"])
+    build(wb, data)
+    return wb.close().getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "day": [f"day {i}" for i in range(args.rows)],
+        "sales": rng.random(args.rows) * 1_000,
+        "cost": rng.random(args.rows) * 800,
+    })
+
+    for name, request in (("disk", disk_request), ("in_memory", memory_request)):
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            request(data)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(
+            f"{name:>10}: median {statistics.median(latencies) * 1000:7.1f} ms  "
+            f"p95 {p95 * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
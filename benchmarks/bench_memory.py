@@ -0,0 +1,73 @@
+"""bench_memory.py
+
+Memory held by a workbook of many small tables and charts before it is
+closed, split between xlsxwriter's own objects (cells, charts, formats) and
+everything else: the ``Table`` and chart wrappers and their per-instance
+state.
+
+Run it on two revisions to compare them:
+    python benchmarks/bench_memory.py --objects 10000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tracemalloc
+
+import pandas as pd
+import xlsxwriter
+
+from excel_charts import Bar, Donut, Line, Table, Writter
+
+XLSXWRITER_DIR = os.path.dirname(xlsxwriter.__file__)
+
+
+def build(objects: int) -> tuple[Writter, list]:
+    data = pd.DataFrame({"label": ["a", "b", "c", "d"], "value": [1.0, 2.0, 3.0, 4.0]})
+    wb = Writter(sheet_names=["Data"])
+    kept = []
+    kinds = (Line, Bar, Donut)
+    for i in range(objects):
+        row = 6 * i + 1
+        table = Table(f"T{i}", data, wb, worksheet="Data", position=(row, 0))
+        table.add_to_worksheet()
+        chart = kinds[i % len(kinds)](
+            table, chart_position=f"D{row + 1}", worksheet="Data", width=240, height=120,
+        )
+        chart._create_chart()
+        kept.append((table, chart))
+    return wb, kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=10_000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    with contextlib.redirect_stdout(io.StringIO()):
+        wb, kept = build(args.objects)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    xlsxwriter_bytes = other_bytes = 0
+    for stat in after.compare_to(before, "filename"):
+        if stat.traceback[0].filename.startswith(XLSXWRITER_DIR):
+            xlsxwriter_bytes += stat.size_diff
+        else:
+            other_bytes += stat.size_diff
+
+    total = xlsxwriter_bytes + other_bytes
+    print(f"{args.objects} tables + charts: {total / 1024 ** 2:8.1f} MiB")
+    print(f"  xlsxwriter objects: {xlsxwriter_bytes / 1024 ** 2:8.1f} MiB")
+    print(f"  wrappers and rest:  {other_bytes / 1024 ** 2:8.1f} MiB "
+          f"({other_bytes / args.objects:,.0f} B per table + chart)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        wb.close()
+
+
+if __name__ == "__main__":
+    main()
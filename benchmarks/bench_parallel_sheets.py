@@ -0,0 +1,87 @@
+"""bench_parallel_sheets.py
+
+Time of building one workbook with a sheet per region: serially on the
+``Writter``, and with ``render_sheets`` rendering each worksheet in a worker
+process, for an increasing number of workers. Also checks that every file
+is identical to the serial one.
+
+The worksheet XML is generated in the workers; the calling process merges
+the shared strings, replays the formats and charts, and zips the parts. Use
+``Compression.fast()`` to spread the zipping over threads too.
+
+Run with:
+    python benchmarks/bench_parallel_sheets.py --regions 8 --rows 100000 --workers 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Line, SheetJob, Table, Writter, render_sheets
+
+
+def build(wb, region: str, data: pd.DataFrame) -> None:
+    table = Table(region, data, wb, worksheet=region, position="A2", sanitize="blank")
+    table.add_to_worksheet()
+    Line(table, chart_position="F2", worksheet=region, width=640, height=320)._create_chart()
+
+
+def parts(buffer: io.BytesIO) -> dict:
+    with zipfile.ZipFile(buffer) as archive:
+        # core.xml holds the creation time.
+        return {
+            name: archive.read(name)
+            for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--regions", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    regions = [f"Region {number}" for number in range(1, args.regions + 1)]
+    frames = {
+        region: pd.DataFrame({
+            "time": pd.date_range("2024-01-01", periods=args.rows, freq="min"),
+            "product": rng.choice(["alpha", "beta", "gamma", region], args.rows),
+            "sales": rng.random(args.rows) * 1_000,
+            "units": rng.integers(0, 100, args.rows),
+        })
+        for region in regions
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        wb = Writter(sheet_names=regions)
+        for region in regions:
+            build(wb, region, frames[region])
+        serial = parts(wb.close())
+        serial_time = time.perf_counter() - start
+    print(f"    serial: {serial_time:6.2f} s  ({os.cpu_count()} cores)")
+
+    jobs = [SheetJob(region, build, (region, frames[region])) for region in regions]
+    for workers in args.workers:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            wb = Writter(sheet_names=regions)
+            render_sheets(wb, jobs, workers=workers)
+            parallel = parts(wb.close())
+            elapsed = time.perf_counter() - start
+        print(
+            f"{workers:>2} workers: {elapsed:6.2f} s  x{serial_time / elapsed:4.2f}  "
+            f"identical: {serial == parallel}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""bench_part_cache.py
+
+Daily-report scenario for the XML part cache: a workbook of several large
+sheets is rendered twice, with a single small sheet changed in between.
+Reports ``Writter.close()`` time without cache, on a cold cache and on the
+warm run, plus the cache hit rate.
+
+Run with:
+    python benchmarks/bench_part_cache.py --sheets 6 --rows 20000
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Line, PartCache, Table, Writter
+
+
+def make_frames(sheets: int, rows: int, day: int) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    frames = {}
+    for s in range(sheets):
+        data = {"day": [f"day {i}" for i in range(rows)]}
+        for c in range(6):
+            data[f"metric_{c}"] = rng.random(rows) * 1_000
+        frames[f"Sheet{s}"] = pd.DataFrame(data)
+    # Only the last sheet changes from one day to the next.
+    last = frames[f"Sheet{sheets - 1}"].iloc[:100].copy()
+    last["metric_0"] += day
+    frames[f"Sheet{sheets - 1}"] = last
+    return frames
+
+
+def close_time(frames: dict[str, pd.DataFrame], cache) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        wb = Writter(sheet_names=list(frames), part_cache=cache)
+    for sheet, data in frames.items():
+        table = Table(sheet, data, wb, worksheet=sheet, position="A2")
+        table.add_to_worksheet()
+        Line(table, worksheet=sheet, chart_position="J2", width=480, height=288)._create_chart()
+
+    start = time.perf_counter()
+    wb.close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sheets", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    yesterday = make_frames(args.sheets, args.rows, day=0)
+    today = make_frames(args.sheets, args.rows, day=1)
+
+    print(f"  no cache: {close_time(today, None):.3f}s")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PartCache(directory)
+        print(f"      cold: {close_time(yesterday, cache):.3f}s")
+        cache.hits = cache.misses = 0
+        print(f"      warm: {close_time(today, cache):.3f}s")
+        print(f"  hit rate: {cache.hit_rate:.0%} {cache.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""bench_sanitize.py
+
+Time of writing float columns holding NaN and inf: the workbook's
+``nan_inf_to_errors`` option, which sends every cell through
+``Worksheet.write``'s type dispatch, against ``Table(sanitize=...)`` with
+each ``MissingPolicy``.
+
+Run with:
+    python benchmarks/bench_sanitize.py --rows 200000 --missing 0.1
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import MissingPolicy, Table, Writter
+
+
+def render(data: pd.DataFrame, sanitize: MissingPolicy | None) -> float:
+    wb = Writter(sheet_names=["Data"])
+    wb.wb.get_worksheet_by_name("Data").nan_inf_to_errors = sanitize is None
+    table = Table("Values", data, wb, worksheet="Data", position="A2", sanitize=sanitize)
+    start = time.perf_counter()
+    table.add_to_worksheet()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--missing", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = rng.random((args.rows, 4))
+    values[rng.random(values.shape) < args.missing] = np.nan
+    values[rng.random(values.shape) < args.missing / 10] = np.inf
+    data = pd.DataFrame(values, columns=list("abcd"))
+
+    for policy in (None, *MissingPolicy):
+        if policy == MissingPolicy.SENTINEL:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = render(data, policy)
+        name = "errors" if policy is None else policy.value
+        print(f"{name:>8}: {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""bench_table_write.py
+
+Compares the column-wise and the per-cell write engines of
+``Table.add_to_worksheet``.
+
+Run with:
+    python benchmarks/bench_table_write.py --rows 200000 --cols 30
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from excel_charts import Table, Writter
+from excel_charts.table import WriteEngine
+
+
+def make_frame(rows: int, cols: int) -> pd.DataFrame:
+    """Builds a frame with a label column followed by numeric columns."""
+    rng = np.random.default_rng(0)
+    data = {"label": [f"row {i}" for i in range(rows)]}
+    for c in range(1, cols):
+        if c % 3 == 0:
+            data[f"int_{c}"] = rng.integers(0, 1_000, rows)
+        else:
+            data[f"float_{c}"] = rng.random(rows) * 1_000
+    return pd.DataFrame(data)
+
+
+def run(data: pd.DataFrame, engine: WriteEngine) -> float:
+    """Returns the seconds spent in add_to_worksheet for one engine."""
+    wb = Writter(BytesIO(), sheet_names=["Data"])
+    table = Table("Bench", data, wb, worksheet="Data", position="A2")
+
+    start = time.perf_counter()
+    table.add_to_worksheet(engine=engine)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_frame(args.rows, args.cols)
+    timings = {}
+    for engine in (WriteEngine.CELL, WriteEngine.COLUMN):
+        timings[engine] = min(run(data, engine) for _ in range(args.repeat))
+        print(f"{engine.value:>6}: {timings[engine]:.3f}s")
+
+    speedup = timings[WriteEngine.CELL] / timings[WriteEngine.COLUMN]
+    print(f"speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
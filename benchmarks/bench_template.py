@@ -0,0 +1,105 @@
+"""bench_template.py
+
+Per-render cost of a small dashboard built from a ``ReportSpec`` each time
+against the same layout compiled once into a ``ReportTemplate``.
+
+Only the build is timed, both workbooks are written in memory and closed
+outside the timer, since zipping costs the same either way.
+
+Run with:
+    python benchmarks/bench_template.py --renders 500 --rows 24
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_charts.batch import ChartSpec, ReportSpec, TableSpec, build_report
+from excel_charts.core import Axis
+from excel_charts.table import Style
+from excel_charts.template import ReportTemplate
+from excel_charts.workbook import Writter
+
+SHEETS = ["Dashboard"]
+SIZE = {"worksheet": "Dashboard", "width": 480, "height": 288}
+
+
+def layout() -> tuple[list[TableSpec], list[ChartSpec]]:
+    """Three tables and three charts on one sheet."""
+    style = Style(main="$#,##0.00", by_col={"units": {"num_format": "0"}})
+    tables = [
+        TableSpec("Sales", None, "Dashboard", "A2", style=style),
+        TableSpec("Costs", None, "Dashboard", "F2", style=style),
+        TableSpec("Mix", None, "Dashboard", "K2"),
+    ]
+    axis = Axis(name="Amount", major_unit=100)
+    charts = [
+        ChartSpec("line", "Sales", {"chart_position": "N2", "y_axis": axis, **SIZE}),
+        ChartSpec("bar", "Costs", {"chart_position": "N18", "y_axis": axis, **SIZE}),
+        ChartSpec("donut", "Mix", {"chart_position": "N34", **SIZE}),
+    ]
+    return tables, charts
+
+
+def make_data(rows: int, seed: int) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    month = [f"m{i}" for i in range(rows)]
+    return {
+        "Sales": pd.DataFrame({"month": month, "sales": rng.random(rows) * 1e3, "units": rng.integers(0, 99, rows)}),
+        "Costs": pd.DataFrame({"month": month, "cost": rng.random(rows) * 1e3, "units": rng.integers(0, 99, rows)}),
+        "Mix": pd.DataFrame({"product": ["a", "b", "c", "d"], "share": rng.random(4)}),
+    }
+
+
+def from_spec(data: dict[str, pd.DataFrame]) -> Writter:
+    tables, charts = layout()
+    for table in tables:
+        table.data = data[table.name]
+    wb = Writter(sheet_names=list(SHEETS))
+    start = time.perf_counter()
+    build_report(wb, ReportSpec(None, list(SHEETS), tables, charts))
+    return wb, time.perf_counter() - start
+
+
+def from_template(template: ReportTemplate, data: dict[str, pd.DataFrame]) -> Writter:
+    wb = Writter(sheet_names=list(SHEETS))
+    start = time.perf_counter()
+    template.build(wb, data)
+    return wb, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=24)
+    args = parser.parse_args()
+
+    tables, charts = layout()
+    template = ReportTemplate.compile(tables, charts, SHEETS)
+    datasets = [make_data(args.rows, seed) for seed in range(16)]
+
+    timings = {"spec": [], "template": []}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.renders):
+            data = datasets[i % len(datasets)]
+            for name, render in (
+                ("spec", lambda: from_spec(data)),
+                ("template", lambda: from_template(template, data)),
+            ):
+                wb, seconds = render()
+                wb.close()
+                timings[name].append(seconds)
+
+    per_render = {name: sorted(values)[len(values) // 2] for name, values in timings.items()}
+    for name, seconds in per_render.items():
+        print(f"{name:>9}: {seconds * 1000:.3f} ms/render (median)")
+    saved = per_render["spec"] - per_render["template"]
+    print(f"saved: {saved * 1000:.3f} ms/render ({saved / per_render['spec']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
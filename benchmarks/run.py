@@ -0,0 +1,231 @@
+"""run.py
+
+Reproducible benchmark suite for excel_charts.
+
+Every case runs in a fresh process. The case builds its inputs first, then
+the measured section is timed with ``time.perf_counter`` and the peak RSS of
+the process is read from ``resource.getrusage`` afterwards. Results are
+saved as JSON so two runs can be compared.
+
+Run with:
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output new.json --compare results.json
+    python benchmarks/run.py --only line_series --quick
+"""
+
+import argparse
+import datetime
+import io
+import json
+import multiprocessing as mp
+import platform
+import resource
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+def make_frame(rows: int, cols: int, dtype: str, seed: int = 0) -> pd.DataFrame:
+    """Builds a frame with a label column followed by ``cols - 1`` columns of ``dtype``."""
+    rng = np.random.default_rng(seed)
+    data = {"label": [f"row {i}" for i in range(rows)]}
+    for c in range(1, cols):
+        if dtype == "float":
+            data[f"c{c}"] = rng.random(rows) * 1_000
+        elif dtype == "int":
+            data[f"c{c}"] = rng.integers(0, 1_000, rows)
+        elif dtype == "str":
+            data[f"c{c}"] = [f"v{v}" for v in rng.integers(0, 1_000, rows)]
+        elif dtype == "datetime":
+            data[f"c{c}"] = pd.date_range("2020-01-01", periods=rows, freq="h")
+        elif dtype == "bool":
+            data[f"c{c}"] = rng.random(rows) > 0.5
+        else:
+            raise ValueError(f"Unknown dtype: {dtype}")
+    return pd.DataFrame(data)
+
+
+def table_write(rows: int, cols: int, dtype: str, as_table: bool = False) -> Callable:
+    """Table.add_to_worksheet, optionally through create_table."""
+    from excel_charts import Table, Writter
+
+    data = make_frame(rows, cols, dtype)
+    wb = Writter(io.BytesIO(), sheet_names=["Data"])
+    table = Table("Bench", data, wb, worksheet="Data", position="A2")
+    return lambda: table.add_to_worksheet(as_table=as_table)
+
+
+def line_series(rows: int, series: int) -> Callable:
+    """Line._create_chart with ``series`` value columns."""
+    from excel_charts import Line, Table, Writter
+
+    data = make_frame(rows, series + 1, "float")
+    wb = Writter(io.BytesIO(), sheet_names=["Data"])
+    table = Table("Bench", data, wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+    chart = Line(table, chart_position="B2", worksheet="Data", width=640, height=320)
+    return chart._create_chart
+
+
+def donut_colors(rows: int, categories: int) -> Callable:
+    """Donut._create_chart with a color per category."""
+    from excel_charts import Donut, Table, Writter
+
+    labels = [f"cat {i % categories}" for i in range(rows)]
+    data = pd.DataFrame({"category": labels, "value": np.arange(rows, dtype=float)})
+    colors = {f"cat {i}": f"#{(i * 2654435761) % 0xFFFFFF:06X}" for i in range(categories)}
+    wb = Writter(io.BytesIO(), sheet_names=["Data"])
+    table = Table("Bench", data, wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+    chart = Donut(
+        table, chart_position="E2", worksheet="Data",
+        width=480, height=320, colors=colors,
+    )
+    return chart._create_chart
+
+
+def writter_close(rows: int, cols: int) -> Callable:
+    """Writter.close(), i.e. XML assembly and zip serialization."""
+    from excel_charts import Table, Writter
+
+    data = make_frame(rows, cols, "float")
+    wb = Writter(io.BytesIO(), sheet_names=["Data"])
+    Table("Bench", data, wb, worksheet="Data", position="A2").add_to_worksheet()
+    return wb.close
+
+
+WORKLOADS = {
+    "table_write": table_write,
+    "line_series": line_series,
+    "donut_colors": donut_colors,
+    "writter_close": writter_close,
+}
+
+
+def cases(quick: bool = False) -> list[tuple[str, dict]]:
+    """Returns the (workload, params) pairs of the suite."""
+    sizes = [(1_000, 5), (20_000, 10)] if quick else [(1_000, 5), (50_000, 10), (200_000, 30)]
+    dtypes = ["float", "int", "str", "datetime", "bool"]
+
+    suite = []
+    for rows, cols in sizes:
+        for dtype in dtypes:
+            suite.append(("table_write", {"rows": rows, "cols": cols, "dtype": dtype}))
+        suite.append(("table_write", {"rows": rows, "cols": cols, "dtype": "float", "as_table": True}))
+        suite.append(("writter_close", {"rows": rows, "cols": cols}))
+
+    for series in [1, 10, 50, 200]:
+        suite.append(("line_series", {"rows": 1_000 if quick else 10_000, "series": series}))
+
+    for categories in [5, 50, 500]:
+        suite.append(("donut_colors", {"rows": 5_000, "categories": categories}))
+
+    return suite
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(workload: str, params: dict, queue) -> None:
+    """Builds the inputs of one case, times it and reports to the parent."""
+    run = WORKLOADS[workload](**params)
+    start = time.perf_counter()
+    run()
+    wall = time.perf_counter() - start
+    queue.put({"wall": wall, "peak_rss": peak_rss()})
+
+
+def measure(workload: str, params: dict, repeat: int) -> dict:
+    """Runs a case ``repeat`` times in fresh processes, keeping the best time."""
+    ctx = mp.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_case, args=(workload, params, queue))
+        proc.start()
+        runs.append(queue.get())
+        proc.join()
+
+    return {
+        "workload": workload,
+        "params": params,
+        "wall": min(r["wall"] for r in runs),
+        "peak_rss": max(r["peak_rss"] for r in runs),
+        "repeat": repeat,
+    }
+
+
+def case_id(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['workload']}[{params}]"
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Returns a line per case whose time or memory grew more than ``threshold``."""
+    previous = {case_id(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(case_id(result))
+        if old is None:
+            continue
+        for metric in ("wall", "peak_rss"):
+            if old[metric] and result[metric] > old[metric] * (1 + threshold):
+                change = result[metric] / old[metric] - 1
+                regressions.append(f"{case_id(result)} {metric} +{change:.0%}")
+    return regressions
+
+
+def metadata() -> dict:
+    import xlsxwriter
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "xlsxwriter": xlsxwriter.__version__,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", choices=sorted(WORKLOADS), action="append")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast check.")
+    args = parser.parse_args()
+
+    results = []
+    for workload, params in cases(args.quick):
+        if args.only and workload not in args.only:
+            continue
+        result = measure(workload, params, args.repeat)
+        results.append(result)
+        print(f"{case_id(result):<70} {result['wall']:8.3f}s  {result['peak_rss'] / 2**20:8.1f} MiB")
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,86 @@
-"""Excel Charts - OOP library for creating Excel charts with xlsxwriter"""
-
-from .chart.line import Line
-from .chart.scatter import Scatter
-from .chart.bar import Bar, BarOrientation
-from .chart.donut import Donut
-from .table import Table
-from .workbook import Writter
+"""Excel Charts - OOP library for creating Excel charts with xlsxwriter
+
+The public names are imported on first access (PEP 562), so
+``import excel_charts`` stays cheap: ``Writter`` alone does not import
+pandas, and pandas' Styler module is only imported to compile a Styler.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public name -> module defining it.
+_EXPORTS = {
+    "Line": ".chart.line",
+    "Scatter": ".chart.scatter",
+    "Bar": ".chart.bar",
+    "BarOrientation": ".chart.bar",
+    "Donut": ".chart.donut",
+    "Table": ".table",
+    "ChunkedTable": ".chunked",
+    "Writter": ".workbook",
+    "Instrument": ".instrument",
+    "PhaseTimer": ".instrument",
+    "SheetPlan": ".streaming",
+    "StreamingLayoutError": ".streaming",
+    "ChartSpec": ".batch",
+    "ReportSpec": ".batch",
+    "TableSpec": ".batch",
+    "render_many": ".batch",
+    "Downsample": ".downsample",
+    "DownsampleMethod": ".downsample",
+    "AsyncWritter": ".aio",
+    "RenderPool": ".aio",
+    "render_report_async": ".aio",
+    "ReportTemplate": ".template",
+    "PartCache": ".cache",
+    "Compression": ".package",
+    "ArrowFrame": ".frames",
+    "Aggregate": ".aggregate",
+    "AggFunc": ".aggregate",
+    "ShardedTable": ".sharded",
+    "Sanitize": ".sanitize",
+    "MissingPolicy": ".sanitize",
+    "SheetBuilder": ".builder",
+    "SheetJob": ".parallel",
+    "render_sheets": ".parallel",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .chart.line import Line
+    from .chart.scatter import Scatter
+    from .chart.bar import Bar, BarOrientation
+    from .chart.donut import Donut
+    from .table import Table
+    from .chunked import ChunkedTable
+    from .workbook import Writter
+    from .instrument import Instrument, PhaseTimer
+    from .streaming import SheetPlan, StreamingLayoutError
+    from .batch import ChartSpec, ReportSpec, TableSpec, render_many
+    from .downsample import Downsample, DownsampleMethod
+    from .aio import AsyncWritter, RenderPool, render_report_async
+    from .template import ReportTemplate
+    from .cache import PartCache
+    from .package import Compression
+    from .frames import ArrowFrame
+    from .aggregate import Aggregate, AggFunc
+    from .sharded import ShardedTable
+    from .sanitize import MissingPolicy, Sanitize
+    from .builder import SheetBuilder
+    from .parallel import SheetJob, render_sheets
@@ -0,0 +1,136 @@
+"""aggregate.py
+
+Aggregation of a ``Table`` source before it is written.
+
+Charts of millions of raw rows usually show a few hundred points. With
+``Table(aggregate=Aggregate(...))`` the rows are grouped by a category
+column, or resampled when it holds datetimes, and reduced with pandas'
+vectorized group-by before anything is written: the table, and the charts
+drawn from it, only hold the aggregated rows. The raw rows can still be
+written to another sheet, see ``Aggregate.raw_sheet``.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+import pandas as pd
+
+from excel_charts.frames import ArrowFrame, as_frame
+
+
+class AggFunc(str, Enum):
+    """Reduction applied to the value columns of every group."""
+    SUM = "sum"
+    MEAN = "mean"
+    MEDIAN = "median"
+    MIN = "min"
+    MAX = "max"
+    COUNT = "count"
+    QUANTILE = "quantile"
+
+
+@dataclass
+class Aggregate:
+    """Aggregation options of a ``Table``.
+
+    Attributes
+    ----------
+    by : str | None
+        Column the rows are grouped by. Defaults to the first column.
+    func : AggFunc
+        Reduction of the value columns. ``COUNT`` counts non-missing values.
+    values : list[str] | None
+        Columns to aggregate. Defaults to every numeric column but ``by``.
+    quantile : float
+        Quantile computed with ``AggFunc.QUANTILE``.
+    resample : str | None
+        pandas offset alias (``"D"``, ``"W"``, ``"MS"``...) binning a datetime
+        ``by`` column. Periods without rows are left out.
+    raw_sheet : str | None
+        Worksheet receiving the raw rows, created when missing. None leaves
+        them out of the workbook.
+    hidden : bool
+        Hide ``raw_sheet`` when it is created.
+    """
+    by: Optional[str] = None
+    func: AggFunc = AggFunc.SUM
+    values: Optional[list[str]] = None
+    quantile: float = 0.5
+    resample: Optional[str] = None
+    raw_sheet: Optional[str] = None
+    hidden: bool = False
+
+    def __post_init__(self):
+        self.func = AggFunc(self.func)
+        if not 0 <= self.quantile <= 1:
+            msg = f"Quantile must be between 0 and 1, got {self.quantile}."
+            raise ValueError(msg)
+
+    def _frame(self, data: Any) -> tuple[pd.DataFrame, str, list]:
+        """Returns the columns involved as a DataFrame, the key and the values."""
+        data = as_frame(data)
+        by = self.by if self.by is not None else data.columns[0]
+        if by not in data.columns:
+            raise ValueError(f"Unknown aggregation column: '{by}'")
+
+        values = self.values if self.values is not None else _numeric_columns(data, by)
+        missing = [col for col in values if col not in data.columns]
+        if missing:
+            raise ValueError(f"Unknown value columns: {missing}")
+
+        if isinstance(data, ArrowFrame):
+            # Only the columns involved are converted.
+            data = data.table.select([by, *values]).to_pandas()
+        return data, by, values
+
+    def apply(self, data: Any) -> pd.DataFrame:
+        """
+        Returns the aggregated rows: ``by`` followed by the value columns.
+
+        Raises
+        ------
+        ValueError
+            If a column is missing or ``resample`` is set on a column that
+            does not hold datetimes.
+        """
+        frame, by, values = self._frame(data)
+
+        if self.resample is not None:
+            if not pd.api.types.is_datetime64_any_dtype(frame[by].dtype):
+                msg = f"Column '{by}' must hold datetimes to be resampled."
+                raise ValueError(msg)
+            key = pd.Grouper(key=by, freq=self.resample)
+        else:
+            key = by
+
+        grouped = frame[[by, *values]].groupby(key, sort=True, observed=True)
+        if not values:
+            # Nothing to reduce: count the rows of every group.
+            result = grouped.size().rename("count").to_frame()
+        elif self.func == AggFunc.QUANTILE:
+            result = grouped[values].quantile(self.quantile)
+        else:
+            result = grouped[values].agg(self.func.value)
+
+        if self.resample is not None:
+            counts = grouped.size()
+            result = result[counts.reindex(result.index).to_numpy() > 0]
+        return result.reset_index()
+
+
+def _numeric_columns(data: Any, by: str) -> list:
+    """Numeric columns of ``data`` other than ``by``, booleans left out."""
+    if isinstance(data, ArrowFrame):
+        import pyarrow as pa
+
+        return [
+            col for col, arrow_type in zip(data.columns, data.dtypes)
+            if col != by and (pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type))
+        ]
+    return [
+        col for col, dtype in data.dtypes.items()
+        if col != by and pd.api.types.is_numeric_dtype(dtype)
+        and not pd.api.types.is_bool_dtype(dtype)
+    ]
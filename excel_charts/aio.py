@@ -0,0 +1,309 @@
+"""aio.py
+
+Asyncio facade over ``Writter``.
+
+Building a workbook is CPU bound and ``Writter.close()`` zips every part in
+one call, so calling them from a coroutine blocks the event loop for as long
+as the report takes. ``AsyncWritter`` runs every stage in a thread pool
+executor and awaits it:
+
+    async with AsyncWritter("report.xlsx", sheet_names=["Data"]) as wb:
+        await wb.build(lambda writter: build_report(writter, spec))
+
+- ``RenderPool`` bounds the executor threads and the number of reports
+  rendering at once in each event loop. Reports past the limit wait in
+  ``__aenter__``.
+- Once a report gets its slot, the workbook is written to a temporary file
+  next to ``file`` and moved in place with ``os.replace`` only once
+  ``close()`` succeeded, so a cancelled, timed out or failed report never
+  leaves a partial file behind. The file gets the permissions ``open()``
+  would give it.
+
+A stage already running in a thread cannot be interrupted. On cancellation
+the coroutine returns at once and the stage finishes in the background; its
+temporary file is removed as soon as it does.
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import stat
+import threading
+import uuid
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Optional
+
+from excel_charts.batch import ReportSpec, build_report
+from excel_charts.instrument import Instrument
+from excel_charts.workbook import Writter
+
+
+@dataclass
+class RenderPool:
+    """Executor and concurrency limit shared by ``AsyncWritter`` instances.
+
+    Attributes
+    ----------
+    max_workers : int
+        Threads running build and close stages.
+    max_reports : int
+        Reports allowed to render at once in each event loop. Defaults to
+        ``max_workers``.
+    """
+    max_workers: int = 4
+    max_reports: Optional[int] = None
+    executor: ThreadPoolExecutor = field(init=False, repr=False)
+    _limiters: weakref.WeakKeyDictionary = field(
+        init=False, default_factory=weakref.WeakKeyDictionary, repr=False
+    )
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self.max_reports = self.max_reports or self.max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="excel_charts"
+        )
+
+    def limiter(self) -> asyncio.Semaphore:
+        """
+        Returns the semaphore of the running event loop, creating it on first use.
+
+        An asyncio semaphore is bound to the loop it first waits in, so a
+        pool shared by several loops (successive ``asyncio.run`` calls, one
+        loop per thread) keeps one per loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limiter = self._limiters.get(loop)
+            if limiter is None:
+                limiter = self._limiters[loop] = asyncio.Semaphore(self.max_reports)
+            return limiter
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+_DEFAULT_POOL: Optional[RenderPool] = None
+
+
+def default_pool() -> RenderPool:
+    """Returns the ``RenderPool`` used when none is given, creating it on first use."""
+    global _DEFAULT_POOL
+    if _DEFAULT_POOL is None:
+        _DEFAULT_POOL = RenderPool()
+    return _DEFAULT_POOL
+
+
+@dataclass
+class AsyncWritter:
+    """Builds and saves a ``Writter`` without blocking the event loop.
+
+    Attributes
+    ----------
+    file : str | Path | None
+        Final path of the workbook. None renders in memory and ``close()``
+        returns the bytes.
+    sheet_names : list
+        Same as ``Writter.sheet_names``.
+    constant_memory : bool
+        Same as ``Writter.constant_memory``.
+    dedupe_sources : bool
+        Same as ``Writter.dedupe_sources``.
+    instrument : Instrument
+        Same as ``Writter.instrument``.
+    pool : RenderPool | None
+        Executor and concurrency limit. Defaults to ``default_pool()``.
+    writter : Writter | None
+        The wrapped workbook, created on a temporary file once the report
+        gets its slot in ``pool``.
+    """
+    file: Optional[str | Path] = None
+    sheet_names: list[str] = field(default_factory=lambda: ['Sheet1'])
+    constant_memory: bool = False
+    dedupe_sources: bool = False
+    instrument: Instrument = field(default_factory=Instrument, repr=False)
+    pool: Optional[RenderPool] = field(default=None, repr=False)
+    writter: Optional[Writter] = field(init=False, default=None, repr=False)
+    _tmp: Optional[str] = field(init=False, default=None, repr=False)
+    _running: Optional[Future] = field(init=False, default=None, repr=False)
+    _limiter: Optional[asyncio.Semaphore] = field(init=False, default=None, repr=False)
+    _finished: bool = field(init=False, default=False, repr=False)
+
+    def __post_init__(self):
+        self.pool = self.pool or default_pool()
+        if self.file is not None:
+            self.file = str(self.file)
+
+    def _open(self) -> None:
+        """Creates the temporary file and the ``Writter``."""
+        target = None
+        if self.file is not None:
+            directory, name = os.path.split(os.path.abspath(self.file))
+            self._tmp = _create_tmp(directory, name)
+            target = self._tmp
+
+        self.writter = Writter(
+            target,
+            sheet_names=self.sheet_names,
+            constant_memory=self.constant_memory,
+            dedupe_sources=self.dedupe_sources,
+            instrument=self.instrument,
+        )
+
+    async def __aenter__(self) -> AsyncWritter:
+        limiter = self.pool.limiter()
+        await limiter.acquire()
+        self._limiter = limiter
+        try:
+            self._open()
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None and not self._finished:
+                await self.close()
+        finally:
+            self.discard()
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Runs ``func(*args, **kwargs)`` in the pool executor and returns its result.
+
+        Stages run one at a time: a Writter is not thread safe.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If the stage takes longer than ``timeout`` seconds. The report
+            is discarded.
+        """
+        if self._finished:
+            raise RuntimeError("The workbook has already been closed or discarded.")
+        if self._running is not None and not self._running.done():
+            raise RuntimeError("Another stage of this workbook is still running.")
+        if self.writter is None:
+            # Used without ``async with``: no slot to wait for.
+            self._open()
+
+        self._running = self.pool.executor.submit(partial(func, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(self._running), timeout=timeout
+            )
+        except BaseException:
+            self.discard()
+            raise
+
+    async def build(self, builder: Callable[[Writter], None], timeout: Optional[float] = None):
+        """Calls ``builder(writter)`` in the executor, e.g. to add tables and charts."""
+        if self.writter is None:
+            self._open()
+        return await self.run(builder, self.writter, timeout=timeout)
+
+    async def close(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Saves the workbook and moves it to ``file``.
+
+        Returns the workbook bytes when ``file`` is None, otherwise None.
+        """
+        if self.writter is None:
+            self._open()
+        buffer = await self.run(self.writter.close, timeout=timeout)
+        if self._tmp is not None:
+            _keep_mode(self._tmp, self.file)
+            os.replace(self._tmp, self.file)
+            self._tmp = None
+        self._finished = True
+        self._release()
+        return buffer.getvalue() if isinstance(buffer, BytesIO) else None
+
+    def discard(self) -> None:
+        """
+        Drops the workbook and its temporary file. Safe to call more than once.
+
+        When a stage is still running in the executor, the file is removed
+        once that stage returns.
+        """
+        self._finished = True
+        self._release()
+
+        if self._running is not None and not self._running.done():
+            self._running.add_done_callback(lambda _: self._remove_tmp())
+        else:
+            self._remove_tmp()
+
+    def _remove_tmp(self) -> None:
+        if self.writter is not None:
+            if self.writter.constant_memory:
+                for worksheet in self.writter.wb.worksheets():
+                    worksheet._opt_close()
+            self.writter.wb.fileclosed = True
+
+        if self._tmp is not None and os.path.exists(self._tmp):
+            os.remove(self._tmp)
+        self._tmp = None
+
+    def _release(self) -> None:
+        if self._limiter is not None:
+            limiter, self._limiter = self._limiter, None
+            limiter.release()
+
+
+def _create_tmp(directory: str, name: str) -> str:
+    """
+    Creates an empty temporary file for ``name`` in ``directory``.
+
+    Unlike ``tempfile.mkstemp``, which creates files readable by the owner
+    only, the file is opened with mode 0o666 and the kernel applies the
+    umask, so it gets the permissions ``open()`` would give it.
+    """
+    while True:
+        path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return path
+
+
+def _keep_mode(tmp: str, path: str) -> None:
+    """Gives ``tmp`` the permissions of the file at ``path`` it replaces, if any."""
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return
+    os.chmod(tmp, mode)
+
+
+async def render_report_async(
+        spec: ReportSpec,
+        pool: Optional[RenderPool] = None,
+        timeout: Optional[float] = None,
+        ) -> int:
+    """
+    Async version of ``batch.render_report``.
+
+    ``timeout`` bounds the whole report, waiting for a free slot included.
+    Returns the size of the written file in bytes.
+    """
+    async def render() -> int:
+        async with AsyncWritter(
+            spec.file,
+            sheet_names=list(spec.sheet_names),
+            constant_memory=spec.constant_memory,
+            pool=pool,
+        ) as wb:
+            await wb.build(partial(build_report, spec=spec))
+            await wb.close()
+        return os.path.getsize(spec.file)
+
+    return await asyncio.wait_for(render(), timeout=timeout)
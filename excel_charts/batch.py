@@ -0,0 +1,300 @@
+"""batch.py
+
+Renders many workbooks in a process pool.
+
+Each job is a picklable ``ReportSpec`` describing the tables and charts of a
+workbook. ``render_many`` builds and closes one ``Writter`` per job in a
+worker process, retries failed jobs, isolates errors per job and keeps at
+most ``max_pending`` jobs in flight, so a lazy generator of thousands of
+jobs never gets materialized at once.
+"""
+
+from __future__ import annotations
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from excel_charts.chart.bar import Bar
+from excel_charts.chart.donut import Donut
+from excel_charts.chart.line import Line
+from excel_charts.chart.scatter import Scatter
+from excel_charts.table import Style, Table
+from excel_charts.workbook import Writter
+
+CHART_TYPES = {
+    "line": Line,
+    "bar": Bar,
+    "donut": Donut,
+    "scatter": Scatter,
+}
+
+
+@dataclass
+class TableSpec:
+    """Picklable description of a ``Table``.
+
+    Attributes
+    ----------
+    name : str
+        Table name, also used by ``ChartSpec.table``.
+    data : pd.DataFrame | None
+        The data source. None in the layout of a ``ReportTemplate``, where
+        the data is bound on each render.
+    worksheet : str
+        Sheet where the table is written.
+    position : str
+        Top left cell of the table header.
+    style : Style | None
+        Formats applied to the data cells.
+    as_table : bool
+        Register the range as an Excel table.
+    add_title : bool
+        Add a merged title cell above the table.
+    """
+    name: str
+    data: Optional[pd.DataFrame] = None
+    worksheet: str = "Sheet1"
+    position: str = "A2"
+    style: Optional[Style] = None
+    as_table: bool = False
+    add_title: bool = True
+
+
+@dataclass
+class ChartSpec:
+    """Picklable description of a chart.
+
+    Attributes
+    ----------
+    kind : str
+        One of ``CHART_TYPES``: "line", "bar", "donut" or "scatter".
+    table : str
+        Name of the ``TableSpec`` used as the chart source.
+    options : dict
+        Keyword arguments for the chart class, e.g. ``chart_position``,
+        ``worksheet``, ``width``, ``height`` or ``colors``.
+    """
+    kind: str
+    table: str
+    options: dict = field(default_factory=dict)
+
+
+@dataclass
+class ReportSpec:
+    """Picklable description of a whole workbook."""
+    file: str | Path
+    sheet_names: list[str] = field(default_factory=lambda: ['Sheet1'])
+    tables: list[TableSpec] = field(default_factory=list)
+    charts: list[ChartSpec] = field(default_factory=list)
+    constant_memory: bool = False
+
+
+@dataclass
+class RenderResult:
+    """Outcome of one job of ``render_many``.
+
+    Attributes
+    ----------
+    index : int
+        Position of the job in the input.
+    file : str
+        Output path of the workbook.
+    bytes : int
+        Size of the written file, 0 if the job failed.
+    duration : float
+        Seconds spent on the last attempt.
+    attempts : int
+        Number of attempts made.
+    error : str | None
+        Traceback of the last failure, None on success.
+    """
+    index: int
+    file: str
+    bytes: int = 0
+    duration: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def build_report(wb: Writter, spec: ReportSpec) -> None:
+    """Writes the tables and charts described by ``spec`` into ``wb``."""
+    tables = {}
+    for table_spec in spec.tables:
+        table = Table(
+            table_spec.name,
+            table_spec.data,
+            wb,
+            worksheet=table_spec.worksheet,
+            position=table_spec.position,
+            style=table_spec.style,
+        )
+        table.add_to_worksheet(
+            as_table=table_spec.as_table,
+            add_title=table_spec.add_title,
+        )
+        tables[table_spec.name] = table
+
+    for chart_spec in spec.charts:
+        if chart_spec.kind not in CHART_TYPES:
+            raise ValueError(f"Unknown chart kind: '{chart_spec.kind}'")
+        if chart_spec.table not in tables:
+            raise ValueError(f"Unknown table: '{chart_spec.table}'")
+
+        chart = CHART_TYPES[chart_spec.kind](
+            tables[chart_spec.table], **chart_spec.options
+        )
+        chart._create_chart()
+
+
+def render_report(spec: ReportSpec) -> int:
+    """Builds and closes the workbook described by ``spec``.
+
+    Returns the size of the written file in bytes.
+    """
+    wb = Writter(
+        str(spec.file),
+        sheet_names=list(spec.sheet_names),
+        constant_memory=spec.constant_memory,
+    )
+    build_report(wb, spec)
+    wb.close()
+    return os.path.getsize(spec.file)
+
+
+def _render_job(index: int, spec: ReportSpec, retries: int) -> RenderResult:
+    """Runs one job with retries, never raising."""
+    result = RenderResult(index, str(spec.file))
+
+    for attempt in range(1, retries + 2):
+        result.attempts = attempt
+        start = time.perf_counter()
+        try:
+            result.bytes = render_report(spec)
+            result.error = None
+        except Exception:
+            result.error = traceback.format_exc()
+            # Do not leave a half-written workbook behind.
+            if os.path.exists(spec.file):
+                os.remove(spec.file)
+        result.duration = time.perf_counter() - start
+
+        if result.ok:
+            break
+
+    return result
+
+
+def render_many(
+        jobs: Iterable[ReportSpec],
+        workers: Optional[int] = None,
+        retries: int = 0,
+        max_pending: Optional[int] = None,
+        ) -> list[RenderResult]:
+    """Renders every job in a process pool.
+
+    Parameters
+    ----------
+    jobs : Iterable[ReportSpec]
+        Workbooks to render. Consumed lazily.
+    workers : int | None
+        Number of worker processes, defaults to ``os.cpu_count()``. With
+        ``workers=1`` jobs run one after the other in this process.
+    retries : int
+        Extra attempts for a failing job.
+    max_pending : int | None
+        Maximum number of submitted but unfinished jobs, defaults to twice
+        the number of workers. Bounds the memory taken by queued specs.
+
+    Returns
+    -------
+    list[RenderResult]
+        One result per job, in the order of ``jobs``. Failed jobs carry the
+        traceback in ``error`` instead of raising.
+    """
+    return sorted(
+        iter_render(jobs, workers=workers, retries=retries, max_pending=max_pending),
+        key=lambda result: result.index,
+    )
+
+
+def iter_render(
+        jobs: Iterable[ReportSpec],
+        workers: Optional[int] = None,
+        retries: int = 0,
+        max_pending: Optional[int] = None,
+        ) -> Iterator[RenderResult]:
+    """Like ``render_many`` but yields results as jobs finish.
+
+    A worker process that dies, e.g. killed for memory, breaks the pool and
+    fails every job pending in it. These jobs are yielded as failed, the
+    pool is replaced and the remaining jobs go on.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    if workers == 1:
+        for index, spec in enumerate(jobs):
+            yield _render_job(index, spec, retries)
+        return
+
+    jobs = enumerate(jobs)
+    pending = {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            broken = False
+            try:
+                for index, spec in jobs:
+                    future = pool.submit(_render_job, index, spec, retries)
+                    pending[future] = (index, spec)
+                    if len(pending) >= max_pending:
+                        break
+            except BrokenProcessPool:
+                # Submitted again once the pool is replaced.
+                jobs = chain([(index, spec)], jobs)
+                broken = True
+
+            if not pending and not broken:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            while done:
+                for future in done:
+                    index, spec = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as error:
+                        # The worker itself died, e.g. it was killed for memory.
+                        broken = broken or isinstance(error, BrokenProcessPool)
+                        yield _failed_job(index, spec)
+
+                # A dead worker breaks the pool: every job still pending
+                # fails with it. Collect them and go on with a new pool.
+                done = set()
+                if broken and pending:
+                    done, _ = wait(pending)
+
+            if broken:
+                pool.shutdown(wait=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def _failed_job(index: int, spec: ReportSpec) -> RenderResult:
+    """Result of a job whose worker process died."""
+    if os.path.exists(spec.file):
+        os.remove(spec.file)
+    return RenderResult(index, str(spec.file), error=traceback.format_exc())
@@ -0,0 +1,302 @@
+"""builder.py
+
+Concurrent building of the worksheets of one workbook.
+
+xlsxwriter is not thread safe, and the order of the calls matters even when
+they are serialized: shared strings, formats and charts are numbered in the
+order they are first used. Building sheets from several threads, even behind
+a lock, would produce a different file on every run.
+
+``Writter.builder(worksheet)`` returns a ``SheetBuilder``, a stand-in for
+the xlsxwriter workbook that records every call made through it instead of
+running it. A ``Table`` or a chart given a builder (``Table(..., builder)``)
+works as usual, and each thread fills its own builder:
+
+    def build(region):
+        sheet = wb.builder(region)
+        table = Table(region, frames[region], sheet, worksheet=region)
+        table.add_to_worksheet()
+        Line(table, worksheet=region, width=480, height=288)._create_chart()
+
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(build, regions))
+    wb.close()
+
+``Writter.close()`` replays the builders one after the other in the order of
+their worksheets, so the workbook is byte-identical to building the same
+sheets serially in that order, whatever the thread timing. Threads only run
+the data preparation (dtype dispatch, masks, conversions) concurrently; the
+xlsxwriter calls themselves run at close.
+
+A builder owns its worksheet and every sheet it creates or looks up. A
+sheet can only be written by one builder: auxiliary sheets (downsampled
+series, raw rows, shard summaries) need a distinct name per builder.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+from xlsxwriter.utility import xl_cell_to_rowcol
+
+if TYPE_CHECKING:
+    from excel_charts.workbook import Writter
+
+# Worksheet methods writing cells, which grow the recorded dimensions.
+CELL_WRITES = frozenset({
+    "write", "write_number", "write_string", "write_blank", "write_formula",
+    "write_datetime", "write_boolean", "write_url", "write_rich_string",
+    "write_row", "write_column", "merge_range", "write_array_formula",
+    "write_dynamic_array_formula",
+})
+# Cell data lists, never holding formats or charts.
+DATA_WRITES = frozenset({"write_row", "write_column"})
+RANGE_WRITES = frozenset({"merge_range", "write_array_formula", "write_dynamic_array_formula"})
+
+
+class Recorded:
+    """Stand-in for an object a ``SheetBuilder`` creates at replay."""
+    __slots__ = ()
+
+
+class FormatHandle(Recorded):
+    """Stand-in for the Format of ``properties``."""
+    __slots__ = ("properties",)
+
+    def __init__(self, properties: Optional[dict]) -> None:
+        self.properties = properties
+
+    def __repr__(self) -> str:
+        return f"FormatHandle({self.properties!r})"
+
+
+class RecordingChart(Recorded):
+    """Stand-in for a chart: method calls are recorded."""
+    __slots__ = ("builder", "options")
+
+    def __init__(self, builder: SheetBuilder, options: dict) -> None:
+        self.builder = builder
+        self.options = options
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            self.builder._record(self, name, args, kwargs)
+        return method
+
+
+class RecordingWorksheet(Recorded):
+    """Stand-in for a worksheet: method calls are recorded.
+
+    The methods are created once per name, so ``ws.write_number`` compares
+    equal to itself like a bound method. Dimensions are tracked from the
+    recorded writes, which is enough to place tables next to each other.
+    """
+    __slots__ = (
+        "builder", "name", "dim_rowmax", "dim_colmax", "date_1904",
+        "default_date_format", "constant_memory", "_methods",
+    )
+
+    def __init__(self, builder: SheetBuilder, name: str, real: Any = None) -> None:
+        wb = builder.writter.wb
+        self.builder = builder
+        self.name = name
+        self.dim_rowmax = getattr(real, "dim_rowmax", None)
+        self.dim_colmax = getattr(real, "dim_colmax", None)
+        self.date_1904 = wb.date_1904
+        self.default_date_format = wb.default_date_format
+        self.constant_memory = False
+        self._methods = {}
+
+    def __repr__(self) -> str:
+        return f"RecordingWorksheet({self.name!r})"
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = self._recorder(name)
+        return method
+
+    def _recorder(self, name: str):
+        record = self.builder._record
+        if name not in CELL_WRITES:
+            def method(*args, **kwargs):
+                record(self, name, args, kwargs)
+            return method
+
+        def write(*args, **kwargs):
+            record(self, name, args, kwargs)
+            self._grow(name, args, kwargs)
+        return write
+
+    def _grow(self, name: str, args: tuple, kwargs: dict) -> None:
+        """Grows the dimensions like xlsxwriter does for a write."""
+        if args and isinstance(args[0], str):
+            first, _, last = args[0].partition(":")
+            cells = [*xl_cell_to_rowcol(first), *(xl_cell_to_rowcol(last) if last else ())]
+            args = (*cells, *args[1:])
+        if len(args) < 2:
+            return
+
+        row, col = args[0], args[1]
+        if name in RANGE_WRITES:
+            row, col = max(row, args[2]), max(col, args[3])
+        elif name in DATA_WRITES:
+            data = args[2] if len(args) > 2 else kwargs.get("data", ())
+            if not len(data):
+                return
+            if name == "write_row":
+                col += len(data) - 1
+            else:
+                row += len(data) - 1
+        elif name in ("write", "write_blank"):
+            value = args[2] if len(args) > 2 else None
+            cell_format = args[3] if len(args) > 3 else kwargs.get("cell_format")
+            # Blanks without a format are not stored.
+            if cell_format is None and (name == "write_blank" or value is None or value == ""):
+                return
+
+        if self.dim_rowmax is None or row > self.dim_rowmax:
+            self.dim_rowmax = row
+        if self.dim_colmax is None or col > self.dim_colmax:
+            self.dim_colmax = col
+
+
+@dataclass
+class SheetBuilder:
+    """Records the calls building one worksheet, replayed at ``Writter.close()``.
+
+    Stands in for the xlsxwriter workbook: pass it to ``Table`` and charts
+    where a ``Writter`` or a workbook is expected. A builder must only be
+    used by one thread at a time.
+
+    Attributes
+    ----------
+    writter : Writter
+        Workbook the calls are replayed on.
+    worksheet : str
+        Worksheet built by this builder. Builders are replayed in the order
+        of their worksheets.
+    sheets : dict
+        Recording worksheets by name: ``worksheet`` and the sheets created
+        or looked up through the builder.
+    log : list
+        ``(target, method, args, kwargs, result)`` of every recorded call.
+    replayed : bool
+        Set once the calls ran; the builder can't record any more.
+    """
+    writter: Writter
+    worksheet: str
+    sheets: dict = field(init=False, default_factory=dict)
+    log: list = field(init=False, default_factory=list, repr=False)
+    replayed: bool = field(init=False, default=False)
+    constant_memory: bool = field(init=False, default=False, repr=False)
+    _formats: dict = field(init=False, default_factory=dict, repr=False)
+    _existing: dict = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._adopt(self.worksheet)
+
+    def _record(
+            self,
+            target: Any,
+            name: str,
+            args: tuple,
+            kwargs: dict,
+            result: Optional[Recorded] = None,
+            ) -> None:
+        if self.replayed:
+            msg = f"The builder of '{self.worksheet}' was already replayed."
+            raise RuntimeError(msg)
+        self.log.append((target, name, args, kwargs, result))
+
+    def _adopt(self, name: str) -> RecordingWorksheet:
+        """Records on an existing worksheet of the workbook."""
+        real = self.writter.wb.get_worksheet_by_name(name)
+        sheet = RecordingWorksheet(self, name, real)
+        self.sheets[name] = sheet
+        self._existing[sheet] = real
+        return sheet
+
+    def get_worksheet_by_name(self, name: str) -> Optional[RecordingWorksheet]:
+        """
+        Returns the recording worksheet ``name``, None if it doesn't exist.
+
+        Raises
+        ------
+        ValueError
+            If the sheet belongs to another builder.
+        """
+        sheet = self.sheets.get(name)
+        if sheet is None and self.writter._claim(name, self, create=False):
+            sheet = self._adopt(name)
+        return sheet
+
+    def add_worksheet(self, name: Optional[str] = None) -> RecordingWorksheet:
+        """Records the creation of the worksheet ``name``, owned by this builder."""
+        if name is None:
+            msg = "Worksheets added through a SheetBuilder need a name."
+            raise ValueError(msg)
+        self.writter._claim(name, self, create=True)
+        sheet = RecordingWorksheet(self, name)
+        self._record(self, "add_worksheet", (name,), {}, sheet)
+        self.sheets[name] = sheet
+        return sheet
+
+    def add_format(self, properties: Optional[dict] = None) -> FormatHandle:
+        """Returns a stand-in for ``Writter.add_format(properties)``."""
+        from excel_charts.workbook import format_key
+
+        key = format_key(properties)
+        handle = self._formats.get(key)
+        if handle is None:
+            handle = self._formats[key] = FormatHandle(properties)
+            self._record(self, "add_format", (properties,), {}, handle)
+        return handle
+
+    def add_chart(self, options: dict) -> RecordingChart:
+        """Records the creation of a chart."""
+        chart = RecordingChart(self, options)
+        self._record(self, "add_chart", (options,), {}, chart)
+        return chart
+
+    def replay(self) -> None:
+        """Runs the recorded calls on the ``Writter``, in recording order."""
+        wb = self.writter.wb
+        real = dict(self._existing)
+        for target, name, args, kwargs, result in self.log:
+            if target is self:
+                if name == "add_format":
+                    value = self.writter.add_format(*args)
+                else:
+                    value = getattr(wb, name)(*_resolve(args, real))
+            else:
+                if name not in DATA_WRITES:
+                    args = _resolve(args, real)
+                elif len(args) > 3:
+                    args = (*args[:3], *_resolve(args[3:], real))
+                value = getattr(real[target], name)(
+                    *args, **(_resolve(kwargs, real) if kwargs else kwargs)
+                )
+            if result is not None:
+                real[result] = value
+
+        self.replayed = True
+        self.log.clear()
+
+
+def _resolve(value: Any, real: dict) -> Any:
+    """``value`` with every stand-in replaced by the object it stands for."""
+    if isinstance(value, Recorded):
+        return real[value]
+    if type(value) is tuple:
+        return tuple(_resolve(item, real) for item in value)
+    if type(value) is list:
+        return [_resolve(item, real) for item in value]
+    if type(value) is dict:
+        return {key: _resolve(item, real) for key, item in value.items()}
+    return value
@@ -0,0 +1,333 @@
+"""cache.py
+
+Content-addressed, on-disk cache of worksheet and chart XML parts.
+
+Generating the XML of a large worksheet is the most expensive step of
+``Writter.close()``. When a ``Writter`` is created with a ``PartCache``,
+each part is looked up under a key derived from its inputs before being
+generated, and reused on a hit.
+
+Worksheet keys combine:
+
+- the inputs recorded by every ``Table`` written on the sheet (data hash,
+  style, position, title and Excel table options) and the shared string
+  indices of its strings, see ``Writter.record``;
+- a fingerprint of the worksheet settings (merged ranges, conditional
+  formats, column widths, drawings, selection...), which also covers the
+  sheet dimensions;
+- the number of cells and the state of the workbook format indices when the
+  sheet is reached.
+
+A hit also replays the format indices the sheet would have assigned, so the
+parts written after it are unchanged. Chart keys are a fingerprint of the
+chart, cached series data included.
+
+Sheets holding cells that were not written by a ``Table`` cannot be keyed
+reliably: only sheets with recorded inputs are cached, and writes made
+directly on a recorded sheet are only detected when they change its size.
+``constant_memory`` sheets are never cached.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import xlsxwriter
+from xlsxwriter.exceptions import EmptyChartSeries
+from xlsxwriter.format import Format
+
+from excel_charts.package import ExcelPackager
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CACHE_VERSION = 1
+SUFFIX = ".part"
+
+# Worksheet attributes left out of its fingerprint: file handles, workbook
+# wide state covered elsewhere in the key, the cells (covered by the
+# recorded inputs) and their derived indexes, and the chart objects.
+WORKSHEET_SKIP = frozenset({
+    "fh", "internal_fh", "str_table", "worksheet_meta", "table",
+    "table_cells", "merged_cells", "row_spans", "row_data_fh",
+    "row_data_filename", "write_handlers", "workbook_add_format",
+    "charts", "tmpdir",
+})
+CHART_SKIP = frozenset({"fh", "internal_fh"})
+PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def freeze(value, skip: frozenset = frozenset(), _seen: Optional[set] = None):
+    """
+    Returns a repr-stable, hashable snapshot of ``value``.
+
+    Objects are replaced by their class name and attributes (minus
+    ``skip``), Formats by their properties. Methods and other callables are
+    dropped.
+    """
+    if isinstance(value, PRIMITIVES):
+        return value
+    if isinstance(value, Format):
+        return ("Format", value._get_format_key())
+
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return ("<cycle>",)
+    _seen.add(id(value))
+
+    if isinstance(value, dict):
+        return tuple((freeze(k, _seen=_seen), freeze(v, _seen=_seen)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        if all(isinstance(v, PRIMITIVES) for v in items):
+            return tuple(items)
+        return tuple(freeze(v, _seen=_seen) for v in items)
+    if callable(value):
+        return None
+    if hasattr(value, "__dict__"):
+        attributes = {k: v for k, v in vars(value).items() if k not in skip}
+        return (type(value).__name__, freeze(attributes, _seen=_seen))
+    return repr(value)
+
+
+def part_key(kind: str, *parts) -> str:
+    """Returns the cache key of a part from its kind and inputs."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{CACHE_VERSION}:{xlsxwriter.__version__}:{kind}".encode())
+    digest.update(repr(parts).encode())
+    return digest.hexdigest()
+
+
+def string_indices(string_table: dict, data: pd.DataFrame, extra: list) -> bytes:
+    """
+    Returns the shared string indices of the strings of ``data`` and ``extra``.
+
+    Worksheet XML refers to strings by their index in the workbook shared
+    string table, which depends on what was written before the sheet.
+    """
+    import pandas as pd
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([string_table.get(s) for s in extra]).encode())
+    for _, values in data.items():
+        if not isinstance(values, pd.Series):
+            # Arrow column: only string-like columns can hold shared strings.
+            if pd.api.types.is_numeric_dtype(values.type.to_pandas_dtype()):
+                continue
+            values = values.to_pandas()
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            continue
+        try:
+            indices = values.map(string_table)
+        except TypeError:
+            indices = pd.Series(
+                [string_table.get(v) if isinstance(v, str) else None for v in values],
+                dtype="float64",
+            )
+        digest.update(indices.to_numpy(dtype="float64", na_value=-1).tobytes())
+    return digest.digest()
+
+
+@dataclass
+class PartCache:
+    """Size-bounded LRU cache of XML parts stored in ``directory``.
+
+    Attributes
+    ----------
+    directory : str | Path
+        Where entries are stored. Created when missing.
+    max_bytes : int
+        Total size of the entries. The least recently used are evicted.
+    hits, misses : int
+        Lookups answered from the cache, and parts generated and stored.
+    bypassed : int
+        Parts that could not be keyed and were generated without the cache.
+    evictions : int
+        Entries removed to stay under ``max_bytes``.
+    """
+    directory: str | Path
+    max_bytes: int = 512 * 1024 ** 2
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+    _entries: OrderedDict = field(init=False, default_factory=OrderedDict, repr=False)
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Optional[tuple[str, dict]]:
+        """Returns the ``(xml, meta)`` stored under ``key``, if any."""
+        if key not in self._entries:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header, payload = f.read().split(b"\n", 1)
+            os.utime(path)
+        except (OSError, ValueError):
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return zlib.decompress(payload).decode("utf-8"), json.loads(header)
+
+    def put(self, key: str, xml: str, meta: Optional[dict] = None) -> None:
+        """Stores a part, evicting the least recently used entries if needed."""
+        blob = json.dumps(meta or {}).encode() + b"\n" + zlib.compress(xml.encode("utf-8"), 1)
+        if len(blob) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+        self._entries[key] = len(blob)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries above ``max_bytes``."""
+        total = sum(self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            old_key, size = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        for key in list(self._entries):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> dict:
+        """Returns the lookup counters, hit rate and size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": sum(self._entries.values()),
+        }
+
+
+class CachingPackager(ExcelPackager):
+    """Packager reusing cached worksheet and chart XML."""
+
+    def __init__(self, writter) -> None:
+        super().__init__(writter)
+        self.cache = writter.part_cache
+
+    def _worksheet_key(self, worksheet) -> Optional[str]:
+        inputs = self.writter.sheet_inputs.get(worksheet.name)
+        if inputs is None or worksheet.constant_memory:
+            return None
+        try:
+            settings = freeze(worksheet, WORKSHEET_SKIP)
+        except Exception:
+            return None
+        return part_key(
+            "worksheet",
+            inputs.hexdigest(),
+            settings,
+            sum(map(len, worksheet.table.values())),
+            tuple(self.workbook.xf_format_indices.items()),
+            tuple(self.workbook.dxf_format_indices.items()),
+        )
+
+    def _write_worksheet_files(self) -> None:
+        index = 1
+        for worksheet in self.workbook.worksheets():
+            if worksheet.is_chartsheet:
+                continue
+
+            xml_filename = "xl/worksheets/sheet" + str(index) + ".xml"
+            index += 1
+
+            key = self._worksheet_key(worksheet)
+            if key is None:
+                self.cache.bypassed += 1
+                self._generate(worksheet, xml_filename)
+                continue
+
+            entry = self.cache.get(key)
+            if entry is not None and self._replay_formats(entry[1]):
+                self._write_part(xml_filename, entry[0])
+                self.cache.hits += 1
+                self.writter.instrument.count("cache_hits")
+                continue
+
+            xf_before = len(self.workbook.xf_format_indices)
+            dxf_before = len(self.workbook.dxf_format_indices)
+            filename = self._generate(worksheet, xml_filename)
+            meta = {
+                "xf": list(self.workbook.xf_format_indices)[xf_before:],
+                "dxf": list(self.workbook.dxf_format_indices)[dxf_before:],
+            }
+            self.cache.put(key, self._read_part(filename), meta)
+            self.cache.misses += 1
+            self.writter.instrument.count("cache_misses")
+
+    def _write_chart_files(self) -> None:
+        if not self.workbook.charts:
+            return
+
+        index = 1
+        for chart in self.workbook.charts:
+            if not chart.series:
+                raise EmptyChartSeries(
+                    f"Chart{index} must contain at least one "
+                    f"data series. See chart.add_series()."
+                )
+
+            xml_filename = "xl/charts/chart" + str(index) + ".xml"
+            index += 1
+
+            key = part_key("chart", freeze(chart, CHART_SKIP))
+            entry = self.cache.get(key)
+            if entry is not None:
+                self._write_part(xml_filename, entry[0])
+                self.cache.hits += 1
+                self.writter.instrument.count("cache_hits")
+                continue
+
+            filename = self._filename(xml_filename)
+            chart._set_xml_writer(filename)
+            chart._assemble_xml_file()
+            self.cache.put(key, self._read_part(filename))
+            self.cache.misses += 1
+            self.writter.instrument.count("cache_misses")
+
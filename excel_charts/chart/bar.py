@@ -9,6 +9,7 @@ from typing import Any
 from enum import Enum
 
 from excel_charts.core import BaseChart, MoneyAxis
+from excel_charts.instrument import spanned
 from xlsxwriter.chart import Chart
 
 
@@ -19,7 +20,7 @@ class BarOrientation(str, Enum):
     HORIZONTAL = "horizontal"
 
 
-@dataclass
+@dataclass(slots=True)
 class Bar(BaseChart):
     """Bar chart wrapper.
 
@@ -33,9 +34,6 @@ class Bar(BaseChart):
     height: int | None = None
     orientation: BarOrientation = BarOrientation.VERTICAL
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-
     def create_from_table(self) -> None:
         if not self.source.is_excel_table:
              msg = "Source is not an Excel table."
@@ -44,6 +42,7 @@ class Bar(BaseChart):
         
         self._create_chart()
 
+    @spanned("chart.bar")
     def _create_chart(self) -> None:
         # Set orientation
         if self.orientation == BarOrientation.HORIZONTAL:
@@ -78,11 +77,18 @@ class Bar(BaseChart):
             self.source.start_col + val_col
         ]
 
-        self.chart.add_series({
+        series = {
             "name": series_name,
             "categories": cats_ref,
             "values": vals_ref,
-        })
+        }
+
+        points = self._category_points(cat_col)
+        if points:
+            series["points"] = points
+
+        self.chart.add_series(series)
+        self.instrument.count("series")
 
         self.chart.set_size(
             {
@@ -8,10 +8,11 @@ from dataclasses import dataclass
 from typing import Optional
 
 from excel_charts.core import BaseChart, MoneyAxis
+from excel_charts.instrument import spanned
 from xlsxwriter.chart import Chart
 
 
-@dataclass
+@dataclass(slots=True)
 class Donut(BaseChart):
     """Donut chart wrapper.
 
@@ -29,9 +30,6 @@ class Donut(BaseChart):
     rotation: Optional[int] = None
     colors: Optional[dict[str]|list[str]] = None
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-
     def create_from_table(self) -> None:
         if not self.source.is_excel_table:
              msg = "Source is not an Excel table."
@@ -40,6 +38,7 @@ class Donut(BaseChart):
         
         self._create_chart()
 
+    @spanned("chart.donut")
     def _create_chart(self) -> None:
         # Create chart object
         self.chart = self.wb.add_chart({"type": "doughnut"})
@@ -66,16 +65,7 @@ class Donut(BaseChart):
             self.source.start_col + val_col
         ]
 
-        points = []
-        if self.colors:
-            for cat in self.source.data.iloc[:, cat_col].unique():
-                if cat not in self.colors:
-                    continue
-                points.append(
-                    {
-                        'fill': { "color": self.colors[cat]}
-                    }
-                )
+        points = self._category_points(cat_col)
         
         series = {
             "name": series_name,
@@ -87,6 +77,7 @@ class Donut(BaseChart):
             series["points"] = points
         
         self.chart.add_series(series)
+        self.instrument.count("series")
 
         self.chart.set_size(
             {
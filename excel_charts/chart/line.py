@@ -3,25 +3,37 @@
 Implementation of a line chart using xlsxwriter.
 """
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 from excel_charts.core import BaseChart, MoneyAxis
+from excel_charts.downsample import Downsample, downsample_indices
+from excel_charts.engine import is_datetime
+from excel_charts.frames import take
+from excel_charts.instrument import spanned
+from excel_charts.table import Table
 from xlsxwriter.chart import Chart
+from xlsxwriter.utility import xl_rowcol_to_cell
 
 
 
-@dataclass
+@dataclass(slots=True)
 class Line(BaseChart):
     """Line chart wrapper.
 
     Expects the DataFrame to have at least two columns: the first column for the
     X‑axis values and the second column for the Y‑axis values.
+
+    Parameters
+    ----------
+    downsample : Downsample, optional
+        Reduce series longer than ``downsample.threshold`` points. The reduced
+        rows are written to ``downsample.sheet`` and the series point there,
+        while the full data stays in the source ``Table``.
     """
+    downsample: Optional[Downsample] = None
+    downsampled: Optional[Table] = field(init=False, default=None)
     
-    def __post_init__(self) -> None:
-        super().__post_init__()
-
     def create_from_table(self) -> None:
         if not self.source.is_excel_table:
              msg = "Source is not an Excel table."
@@ -30,6 +42,7 @@ class Line(BaseChart):
         
         self._create_chart()
 
+    @spanned("chart.line")
     def _create_chart(self) -> None:
         # Create chart object
         self.chart = self.wb.add_chart({"type": "line"})
@@ -41,8 +54,10 @@ class Line(BaseChart):
 
         # Create ranges using source helpers
 
+        source = self._series_source()
+
         # Categories are always column 0
-        categories_ref = self.source.get_category_ref(0)
+        categories_ref = source.get_category_ref(0)
 
         for col_idx in range(1, len(self.reference_cols)):
 
@@ -51,7 +66,7 @@ class Line(BaseChart):
                     continue
             
             # print(f"Adding: {reference_cols[col_idx]=}")
-            values_ref = self.source.get_ref(col_idx)
+            values_ref = source.get_ref(col_idx)
             
             # Series name comes from the header of that column
             series_name = [
@@ -74,6 +89,7 @@ class Line(BaseChart):
                 series["line"] = line
 
             self.chart.add_series(series)
+            self.instrument.count("series")
 
         self.chart.set_size(
             {
@@ -87,10 +103,59 @@ class Line(BaseChart):
             self.chart
         )
 
+    def _series_source(self) -> Table:
+        """
+        Returns the table the series point to.
+
+        With ``downsample`` set and a source longer than its threshold, the
+        kept rows of every value column are written once to the downsample
+        sheet, next to anything already there, and that table is returned.
+        """
+        options = self.downsample
+        data = self.source.data
+        if options is None or len(data.index) <= options.threshold:
+            return self.source
+        if self.downsampled is not None:
+            return self.downsampled
+
+        value_cols = [
+            col_idx for col_idx in range(1, len(self.reference_cols))
+            if self.skip is None or self.reference_cols[col_idx] not in self.skip
+        ]
+        kept = downsample_indices(data, 0, value_cols, options)
+
+        ws = self.wb.get_worksheet_by_name(options.sheet)
+        if ws is None:
+            ws = self.wb.add_worksheet(options.sheet)
+            if options.hidden:
+                ws.hide()
+        first_col = 0 if ws.dim_colmax is None else ws.dim_colmax + 2
+
+        self.downsampled = Table(
+            f"{self.title} downsampled",
+            take(data, kept),
+            self.source.writter or self.wb,
+            worksheet=options.sheet,
+            position=xl_rowcol_to_cell(0, first_col),
+            style=self.source.style,
+            sanitize=self.source.sanitize,
+        )
+        self.downsampled.add_to_worksheet(add_title=False)
+        return self.downsampled
+
     def set_x_axis(self) -> None:
-        """Set the X axis options."""
-        if self.x_axis:
-            self.chart.set_x_axis(self.x_axis.to_dict())
+        """
+        Set the X axis options.
+
+        Datetime categories get a date axis, which spaces the points by
+        time and shows the dates in the format of the category cells.
+        """
+        options = self.x_axis.to_dict() if self.x_axis else {}
+        data = self.source.data
+        if len(data.columns) and is_datetime(next(iter(data.items()))[1]):
+            options["date_axis"] = True
+        if options:
+            self.chart.set_x_axis(options)
 
     def set_y_axis(self) -> None:
         """Set the Y axis options."""
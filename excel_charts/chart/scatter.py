@@ -4,10 +4,13 @@ Implementation of a scatter chart using xlsxwriter.
 """
 
 from __future__ import annotations
+from dataclasses import dataclass
 
 from excel_charts.core import BaseChart, MoneyAxis
+from excel_charts.instrument import spanned
 
 
+@dataclass(slots=True)
 class Scatter(BaseChart):
     """Scatter chart wrapper.
 
@@ -15,14 +18,15 @@ class Scatter(BaseChart):
     determines which column is considered the monetary value.
     """
 
-    def _create_chart(self):
+    @spanned("chart.scatter")
+    def _create_chart(self) -> None:
         # Create chart object
-        chart = self._workbook.add_chart({"type": "scatter"})
-        chart.set_title({"name": self.title})
-        if self.x_axis_title:
-             chart.set_x_axis({"name": self.x_axis_title})
-        if self.y_axis_title:
-             chart.set_y_axis({"name": self.y_axis_title})
+        self.chart = self.wb.add_chart({"type": "scatter"})
+        self.chart.set_title({"name": self.title})
+        if self.x_axis:
+             self.chart.set_x_axis(self.x_axis.to_dict())
+        if self.y_axis:
+             self.chart.set_y_axis(self.y_axis.to_dict())
 
         # Determine column mapping based on money_axis
         if self.money_axis == MoneyAxis.Y:
@@ -38,12 +42,27 @@ class Scatter(BaseChart):
         x_ref = self.source.get_category_ref(x_col)
         y_ref = self.source.get_ref(y_col)
         
-        series_name = [self.source.worksheet.get_name(), self.source.start_row, self.source.start_col + y_col]
+        # Series name comes from the header of that column
+        series_name = [
+            self.source.worksheet,
+            self.source.start_row - 1,
+            self.source.start_col + y_col
+        ]
 
-        chart.add_series({
+        self.chart.add_series({
             "name": series_name,
             "categories": x_ref,
             "values": y_ref,
         })
-        
-        return chart
+        self.instrument.count("series")
+
+        self.chart.set_size(
+            {
+                'width': self.width,
+                'height': self.height
+            }
+        )
+        self.ws.insert_chart(
+            self.chart_position,
+            self.chart
+        )
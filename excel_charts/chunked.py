@@ -0,0 +1,229 @@
+"""chunked.py
+
+Table variant fed by an iterator of chunks instead of a materialized
+DataFrame.
+
+Chunks can be DataFrames (``pd.read_csv(..., chunksize=...)``), Arrow
+``RecordBatch``/``Table`` objects or anything else exposing ``to_pandas()``.
+Each chunk is written as soon as it arrives and ``end_row`` grows with it,
+so only one chunk is held in memory at a time. Charts bound with ``bind``
+are created once the last chunk has been written, when ``get_ref`` covers
+the whole data.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+from xlsxwriter.utility import xl_range
+
+from excel_charts.engine import column_writer, is_datetime, write_column
+from excel_charts.frames import ArrowFrame, as_frame, is_arrow, is_polars, take
+from excel_charts.table import Table, TITLE_FORMAT, WriteEngine, _write_row
+
+
+def to_frame(chunk: Any) -> pd.DataFrame | ArrowFrame:
+    """Returns ``chunk`` as a DataFrame.
+
+    Arrow record batches and tables and Polars frames are wrapped in an
+    ``ArrowFrame`` and written from their buffers. Other objects with
+    ``to_pandas()`` are converted one chunk at a time.
+    """
+    if isinstance(chunk, (pd.DataFrame, ArrowFrame)):
+        return chunk
+    if is_arrow(chunk) or is_polars(chunk):
+        return as_frame(chunk)
+    if hasattr(chunk, "to_pandas"):
+        return chunk.to_pandas()
+    raise TypeError(f"Unsupported chunk type: {type(chunk).__name__}")
+
+
+@dataclass(slots=True)
+class ChunkedTable(Table):
+    """Table written chunk by chunk from an iterable.
+
+    Attributes
+    ----------
+    data : Iterable
+        Iterable of chunks. After initialization ``data`` holds an empty
+        DataFrame with the columns and dtypes of the first chunk.
+    first_chunk : DataFrame or ArrowFrame
+        The first chunk, which picks the number format of the datetime
+        columns. Released once it has been written.
+    rows_written : int
+        Number of data rows written so far.
+    complete : bool
+        True once the last chunk has been written.
+    charts : list
+        Charts created after the last chunk, see ``bind``.
+    """
+    data: Iterable
+    chunks: Iterator = field(init=False, repr=False, default=None)
+    first_chunk: Any = field(init=False, repr=False, default=None)
+    rows_written: int = field(init=False, default=0)
+    complete: bool = field(init=False, default=False)
+    charts: list = field(init=False, default_factory=list)
+
+    def __post_init__(self):
+        if self.aggregate is not None:
+            msg = f"Table '{self.name}' is written by chunks and cannot be aggregated."
+            raise ValueError(msg)
+
+        self.chunks = iter(self.data)
+        first = next(self.chunks, None)
+        if first is None:
+            raise ValueError(f"Table '{self.name}' received no chunks.")
+
+        first = to_frame(first)
+        self.chunks = chain([first], self.chunks)
+        self.first_chunk = first
+        self.data = take(first, [])
+
+        # Slotted dataclasses are rebuilt: no zero-argument super().
+        Table.__post_init__(self)
+
+    @classmethod
+    def from_csv(
+            cls,
+            name: str,
+            path: str | Path,
+            wb,
+            chunksize: int = 100_000,
+            read_csv_kwargs: Optional[dict] = None,
+            **kwargs,
+            ) -> ChunkedTable:
+        """Builds a ChunkedTable reading ``path`` with ``pd.read_csv``."""
+        reader = pd.read_csv(path, chunksize=chunksize, **(read_csv_kwargs or {}))
+        return cls(name, reader, wb, **kwargs)
+
+    def bind(self, chart) -> None:
+        """Creates ``chart`` once the last chunk has been written."""
+        if self.complete:
+            chart._create_chart()
+        else:
+            self.charts.append(chart)
+
+    def add_to_worksheet(
+            self,
+            as_table: bool = False,
+            add_title: bool = True,
+            engine: WriteEngine = WriteEngine.COLUMN,
+            ) -> None:
+        """Consumes every chunk and writes it below the previous one.
+
+        The title and header are written first, so the rows are always
+        written in order and the table also works in ``constant_memory``
+        mode, where chunks are written row by row.
+
+        Raises
+        ------
+        ValueError
+            Before writing a chunk that would go past the last row of the
+            worksheet. The chunks before it stay written.
+        """
+        if self.complete:
+            raise ValueError(f"Table '{self.name}' was already written.")
+        if as_table and self.wb.constant_memory:
+            msg = "add_table() isn't supported in constant_memory mode."
+            raise ValueError(msg)
+
+        main_format, col_formats = self._resolve_formats()
+        cols = dict(enumerate(self.data.columns))
+        self.end_col = self.start_col + len(cols) - 1
+        formats = [col_formats.get(col_name, main_format) for col_name in cols.values()]
+
+        if add_title:
+            self.ws.merge_range(
+                self.start_row - 1, self.start_col,
+                self.start_row - 1, self.end_col,
+                self.name,
+                self.add_format(TITLE_FORMAT)
+            )
+        self.ws.write_row(self.start_row, self.start_col, list(cols.values()))
+        self._record_inputs(self.data, as_table=as_table, add_title=add_title)
+
+        self.end_row = self.start_row
+        for chunk in self.chunks:
+            frame = to_frame(chunk)
+            if list(frame.columns) != list(cols.values()):
+                msg = f"Chunk columns {list(frame.columns)} do not match "
+                msg += f"the columns of table '{self.name}'."
+                raise ValueError(msg)
+            # xlsxwriter skips the rows past the limit without raising.
+            self._check_rows(self.end_row + len(frame.index))
+
+            with self.instrument.span("table.cells"):
+                self._write_chunk(frame, formats, engine)
+            self.instrument.count("cells", frame.size)
+            self._record_inputs(frame, first_row=self.rows_written)
+            self.rows_written += len(frame.index)
+            self.end_row = self.start_row + self.rows_written
+            self.first_chunk = None
+
+        self._range = xl_range(self.start_row, self.start_col, self.end_row, self.end_col)
+        self.complete = True
+
+        if as_table:
+            self.create_table(self.ws)
+
+        if add_title:
+            self._shift_for_title()
+
+        for chart in self.charts:
+            chart._create_chart()
+
+    def _date_num_formats(self) -> dict:
+        """Number format of every datetime column, picked from the first chunk.
+
+        ``data`` is empty, so a column of the first chunk with a time of day
+        gets ``DATETIME_FORMAT``.
+        """
+        if self._date_formats is None:
+            sample = self.data if self.first_chunk is None else self.first_chunk
+            self._date_formats = {
+                position: self._date_num_format(values)
+                for position, (_, values) in enumerate(sample.items())
+                if is_datetime(values)
+            }
+        return self._date_formats
+
+    def _write_chunk(
+            self,
+            frame: pd.DataFrame,
+            formats: list,
+            engine: WriteEngine,
+            ) -> None:
+        """Writes one chunk right below the rows written so far."""
+        first_row = self.start_row + self.rows_written + 1
+
+        if self.wb.constant_memory or engine != WriteEngine.COLUMN:
+            frame = self._row_data(frame)
+            writers = [
+                (
+                    self.start_col + col_idx,
+                    column_writer(self.ws, values) or self.ws.write,
+                    cell_format,
+                )
+                for col_idx, ((_, values), cell_format) in enumerate(zip(frame.items(), formats))
+            ]
+            rows = frame.itertuples(index=False, name=None)
+            for current_row, values in enumerate(rows, start=first_row):
+                _write_row(current_row, values, writers)
+            return
+
+        for col_idx, ((_, values), cell_format) in enumerate(zip(frame.items(), formats)):
+            write_column(
+                self.ws, first_row, self.start_col + col_idx,
+                values, cell_format, self.sanitize
+            )
+
+    def get_ref(self, col_offset: int = 0) -> list | str:
+        """Returns the reference of a column once every chunk is written."""
+        if not self.complete:
+            msg = f"Table '{self.name}' is still being written. "
+            msg += "Use bind() to create charts after the last chunk."
+            raise RuntimeError(msg)
+        return Table.get_ref(self, col_offset)
@@ -3,11 +3,13 @@ import abc
 from dataclasses import dataclass, field
 from typing import Optional
 from enum import Enum, StrEnum
-import pandas as pd
 from xlsxwriter.worksheet import Worksheet
 from xlsxwriter.workbook import Workbook
 from xlsxwriter.chart import Chart
 
+from excel_charts.frames import series
+from excel_charts.instrument import Instrument, spanned
+from excel_charts.palette import point_fills
 from excel_charts.table import Table
 from excel_charts.workbook import Writter
 
@@ -56,6 +58,9 @@ class ColorPalette:
         Secondary color in hex.
     accent: str
         Accent color in hex.
+    category_colors: dict
+        Color of the points of each category in ``Bar`` and ``Donut``
+        charts. A chart's own ``colors`` take precedence.
     """
 
     primary: str = "#4A90E2"
@@ -79,9 +84,14 @@ class Units(StrEnum):
     inches = "in"
     
 
-@dataclass
+@dataclass(slots=True)
 class BaseChart(abc.ABC):
-    """Abstract base class for all chart types."""
+    """Abstract base class for all chart types.
+
+    Charts are slotted and keep no per-instance column indexes: workbooks
+    with thousands of charts only pay for their fields. Subclasses are
+    declared with ``@dataclass(slots=True)`` too.
+    """
 
     source: Table
     chart_position: str = "A1"
@@ -95,7 +105,6 @@ class BaseChart(abc.ABC):
     ws: Worksheet = field(init=False)
     chart: Optional[Chart] = None
     skip: Optional[list[str]] = None
-    reference_cols: dict = field(init=False)
     line: Optional[Line] = None
 
     width: Optional[int] = None
@@ -103,7 +112,7 @@ class BaseChart(abc.ABC):
     units: Units = Units.pixels
     width_units: Optional[Units] = None
     height_units: Optional[Units] = None
-    colors: Optional[dict[str: str]|list[str]] = None
+    colors: Optional[dict[str, str]|list[str]] = None
     
 
     def __post_init__(self) -> None:
@@ -112,17 +121,42 @@ class BaseChart(abc.ABC):
         if self.color_palette is None:
             self.color_palette = ColorPalette()
 
+        # Tables spread over several ranges chart through one of them.
+        self.source = getattr(self.source, "chart_source", self.source)
         self.wb = self.source.wb
         self.ws = self.wb.get_worksheet_by_name(self.worksheet)
-        self.reference_cols = {
-                c: col for c, col in enumerate(self.source.data.columns)
-            }
-        self.columns_idx = {
-                col: c for c, col in enumerate(self.source.data.columns)
-            }
 
         self._convert_units()
 
+    @property
+    def reference_cols(self) -> dict:
+        """Column names of the source by position, shared with the source."""
+        return self.source.column_names
+
+    @property
+    def columns_idx(self) -> dict:
+        """Positions of the source columns by name, shared with the source."""
+        return self.source.column_positions
+
+    def _category_points(self, cat_col: int) -> list:
+        """
+        Returns the per-point fills of a series categorized by ``cat_col``.
+
+        ``colors`` (a dict by category or a list) is merged over the palette's
+        ``category_colors``, see ``palette.point_fills``.
+        """
+        colors = self.colors
+        if isinstance(colors, dict) or not colors:
+            colors = {**self.color_palette.category_colors, **(colors or {})}
+        if not colors:
+            return []
+        return point_fills(series(self.source.data, cat_col), colors)
+
+    @property
+    def instrument(self) -> Instrument:
+        """The instrument of the source table's ``Writter``."""
+        return self.source.instrument
+
     def _convert_units(self) -> None:
         """
         Convert units to pixels.
@@ -136,6 +170,7 @@ class BaseChart(abc.ABC):
         """Create and configure the specific xlsxwriter chart instance."""
         pass
 
+    @spanned("chart.add_to_workbook")
     def add_to_workbook(self, wb: Workbook) -> None:
         """Add the chart to the supplied workbook."""
         # Initialize source (writes data)
@@ -0,0 +1,168 @@
+"""downsample.py
+
+Downsampling of long series before they are charted.
+
+``lttb`` implements largest-triangle-three-buckets and ``minmax`` keeps the
+minimum and maximum of every bucket. Both return the sorted *indices* of the
+points to keep, so several series sharing one category column can be
+reduced to the union of their indices and stay aligned.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+from excel_charts.frames import series
+
+
+class DownsampleMethod(str, Enum):
+    """Algorithm used to pick the points kept in a downsampled series."""
+    LTTB = "lttb"
+    MINMAX = "minmax"
+
+
+@dataclass
+class Downsample:
+    """Downsampling options of a ``Line`` chart.
+
+    Attributes
+    ----------
+    method : DownsampleMethod
+        ``LTTB`` keeps the visually most significant point of each bucket,
+        ``MINMAX`` keeps the extremes of each bucket.
+    threshold : int
+        Number of points kept per series. Series with fewer points are not
+        reduced.
+    sheet : str
+        Worksheet receiving the reduced data. Created when missing.
+    hidden : bool
+        Hide the worksheet receiving the reduced data.
+    """
+    method: DownsampleMethod = DownsampleMethod.LTTB
+    threshold: int = 2_000
+    sheet: str = "downsampled"
+    hidden: bool = True
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """Returns ``buckets + 1`` edges splitting ``range(n)`` evenly."""
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-triangle-three-buckets.
+
+    The first and last points are always kept. The inner points are split in
+    ``threshold - 2`` buckets and, from each one, the point forming the
+    largest triangle with the previously kept point and the mean of the next
+    bucket is kept. Each bucket is scored in one vectorized step.
+
+    Returns the indices of the kept points.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = _bucket_edges(n - 2, threshold - 2) + 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Mean of every bucket, plus the last point as the "next bucket" of the
+    # last inner bucket.
+    counts = ends - starts
+    x_means = np.add.reduceat(x[1:-1], starts - 1) / counts
+    y_means = np.add.reduceat(np.nan_to_num(y[1:-1]), starts - 1) / counts
+    next_x = np.append(x_means[1:], x[-1])
+    next_y = np.append(y_means[1:], y[-1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        px, py = x[previous], y[previous]
+        areas = np.abs(
+            (px - next_x[bucket]) * (y[start:end] - py)
+            - (px - x[start:end]) * (next_y[bucket] - py)
+        )
+        areas = np.where(np.isnan(areas), -1.0, areas)
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return kept
+
+
+def minmax(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Minimum and maximum per bucket.
+
+    Splits the series in ``threshold // 2`` buckets and keeps the positions
+    of the minimum and maximum of each one, plus the first and last points.
+    Fully vectorized: buckets are padded into a 2D array.
+
+    Returns the sorted indices of the kept points.
+    """
+    n = len(y)
+    buckets = max(threshold // 2, 1)
+    if threshold >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, size)
+
+    # All-NaN buckets would make nanargmin raise, point them at their start.
+    empty = np.isnan(grid).all(axis=1)
+    grid[empty, 0] = 0.0
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(grid, axis=1)
+    highs = offsets + np.nanargmax(grid, axis=1)
+
+    kept = np.concatenate(([0, n - 1], lows, highs))
+    return np.unique(kept[kept < n])
+
+
+def downsample_indices(
+        data: pd.DataFrame,
+        x_col: int,
+        y_cols: list[int],
+        options: Downsample,
+        ) -> np.ndarray:
+    """Returns the union of the indices kept for every ``y_cols`` series.
+
+    The x values of ``LTTB`` come from ``x_col`` when it is numeric or a
+    datetime, and from the row position otherwise.
+    """
+    n = len(data.index)
+    if n <= options.threshold:
+        return np.arange(n)
+
+    x = series(data, x_col)
+    if pd.api.types.is_datetime64_any_dtype(x.dtype):
+        x = x.astype("int64").to_numpy(dtype=np.float64)
+    elif pd.api.types.is_numeric_dtype(x.dtype):
+        x = x.to_numpy(dtype=np.float64)
+    else:
+        x = np.arange(n, dtype=np.float64)
+
+    kept = []
+    for col in y_cols:
+        y = series(data, col)
+        if not pd.api.types.is_numeric_dtype(y.dtype):
+            continue
+        y = y.to_numpy(dtype=np.float64, na_value=np.nan)
+        if options.method == DownsampleMethod.MINMAX:
+            kept.append(minmax(y, options.threshold))
+        else:
+            kept.append(lttb(x, y, options.threshold))
+
+    if not kept:
+        return np.arange(n)
+    return np.unique(np.concatenate(kept))
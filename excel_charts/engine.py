@@ -0,0 +1,265 @@
+"""engine.py
+
+Column-wise write engine used by ``Table.add_to_worksheet``.
+
+Instead of dispatching every cell through ``Worksheet.write`` the engine
+looks at the dtype of each column once, picks the matching typed writer
+(``write_number``, ``write_string``, ``write_datetime`` or
+``write_boolean``) and feeds it the whole column. Columns whose dtype does
+not map to a single writer (``object``, mixed or missing values) go through
+``Worksheet.write_column``.
+
+Arrow columns (``pyarrow.ChunkedArray``, see ``frames.ArrowFrame``) are
+dispatched on their Arrow type and converted one chunk at a time.
+
+Datetime columns are converted to Excel serial numbers in one NumPy pass,
+see ``excel_serials``, and written as numbers instead of going through
+xlsxwriter's per-value datetime conversion.
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as pdt
+from xlsxwriter.format import Format
+from xlsxwriter.worksheet import Worksheet
+
+from excel_charts.sanitize import Sanitize, missing_mask
+
+NS_PER_DAY = 86_400 * 10 ** 9
+# xlsxwriter's epochs: day 1 of the 1900 system is 1900-01-01.
+EPOCH_1900 = np.datetime64("1899-12-31", "ns")
+EPOCH_1904 = np.datetime64("1904-01-01", "ns")
+JAN_1_1900 = np.datetime64("1900-01-01", "D")
+
+
+@lru_cache(maxsize=256)
+def writer_name(dtype) -> tuple[Optional[str], bool]:
+    """Returns the typed writer method for ``dtype`` and whether a column
+    with missing values must fall back to ``write_column``.
+
+    Cached by dtype, since the dtype checks cost more than writing a short
+    column.
+    """
+    if pdt.is_bool_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+        return "write_boolean", True
+
+    if pdt.is_numeric_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+        # NaN/inf keep going through write_number, which applies the
+        # workbook nan_inf_to_errors option exactly like write() does.
+        return "write_number", False
+
+    if pdt.is_datetime64_any_dtype(dtype):
+        return "write_datetime", True
+
+    if isinstance(dtype, pd.StringDtype):
+        return "write_string", True
+
+    return None, False
+
+
+def column_writer(ws: Worksheet, values: pd.Series) -> Optional[Callable]:
+    """Returns the typed writer for ``values`` or None if there is none.
+
+    Parameters
+    ----------
+    ws : Worksheet
+        Worksheet that owns the writer methods.
+    values : pd.Series
+        Column to be written.
+    """
+    if not isinstance(values, pd.Series):
+        return arrow_column_writer(ws, values)
+
+    name, nan_fallback = writer_name(values.dtype)
+    if name is None or (nan_fallback and values.hasnans):
+        return None
+    return getattr(ws, name)
+
+
+def arrow_writer_name(arrow_type) -> Optional[str]:
+    """Returns the typed writer method for an Arrow type, if any."""
+    import pyarrow as pa
+
+    if pa.types.is_boolean(arrow_type):
+        return "write_boolean"
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return "write_number"
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        return "write_datetime"
+    # String views only exist from pyarrow 16.
+    is_string_view = getattr(pa.types, "is_string_view", None)
+    if (
+        pa.types.is_string(arrow_type)
+        or pa.types.is_large_string(arrow_type)
+        or (is_string_view is not None and is_string_view(arrow_type))
+    ):
+        return "write_string"
+    return None
+
+
+def arrow_column_writer(ws: Worksheet, values) -> Optional[Callable]:
+    """Returns the typed writer for an Arrow column without nulls, or None."""
+    name = arrow_writer_name(values.type)
+    if name is None or values.null_count:
+        return None
+    return getattr(ws, name)
+
+
+def _arrow_tokens(chunk) -> list:
+    """Python values of one Arrow chunk; numbers go through numpy, which is faster."""
+    import pyarrow as pa
+
+    if not chunk.null_count and (
+        pa.types.is_integer(chunk.type) or pa.types.is_floating(chunk.type)
+    ):
+        return chunk.to_numpy().tolist()
+    return chunk.to_pylist()
+
+
+def is_datetime(values) -> bool:
+    """Whether a Series or an Arrow column holds datetimes or dates."""
+    if isinstance(values, pd.Series):
+        return pdt.is_datetime64_any_dtype(values.dtype)
+    return arrow_writer_name(values.type) == "write_datetime"
+
+
+def _datetime64(values) -> np.ndarray:
+    """``datetime64[ns]`` wall-clock times of a Series or an Arrow array."""
+    if isinstance(values, pd.Series):
+        if values.dt.tz is not None:
+            values = values.dt.tz_localize(None)
+        return values.to_numpy(dtype="datetime64[ns]")
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_timestamp(values.type) and values.type.tz is not None:
+        values = pc.local_timestamp(values)
+    return values.to_numpy(zero_copy_only=False).astype("datetime64[ns]", copy=False)
+
+
+def has_time(values) -> bool:
+    """Whether any datetime of a column has a time of day."""
+    times = _datetime64(values)
+    times = times[~np.isnat(times)]
+    return bool((times.view(np.int64) % NS_PER_DAY).any())
+
+
+def excel_serials(values, date_1904: bool = False) -> np.ndarray:
+    """
+    Returns the Excel serial numbers of a datetime column.
+
+    Matches xlsxwriter's per-value conversion bit for bit, including the
+    1900 leap year bug, with one NumPy pass over the column. Timezone aware
+    values keep their wall-clock time, like xlsxwriter's ``remove_timezone``
+    option. Missing values (NaT) become NaN.
+
+    Parameters
+    ----------
+    values : pd.Series | pyarrow.Array | pyarrow.ChunkedArray
+        Datetimes or dates.
+    date_1904 : bool
+        Use the 1904 date system, see the worksheet's ``date_1904``.
+    """
+    times = _datetime64(values)
+    delta = times.view(np.int64) - (EPOCH_1904 if date_1904 else EPOCH_1900).view(np.int64)
+    days, rest = np.divmod(delta, NS_PER_DAY)
+    # Sub-microsecond parts are dropped, like datetime.datetime does.
+    seconds, microseconds = np.divmod(rest // 1000, 10 ** 6)
+    serials = days + (seconds + microseconds / 1e6) / 86_400
+
+    # Excel shows time-only values as 1900-01-00.
+    serials[times.astype("datetime64[D]") == JAN_1_1900] -= 1
+    if not date_1904:
+        # Excel treats 1900 as a leap year.
+        serials[serials > 59] += 1
+    serials[np.isnat(times)] = np.nan
+    return serials
+
+
+def write_serials(
+        ws: Worksheet,
+        rows,
+        col: int,
+        serials: np.ndarray,
+        cell_format: Optional[Format] = None,
+        ) -> None:
+    """Writes Excel serial numbers as ``write_datetime`` would write dates."""
+    if cell_format is None:
+        cell_format = ws.default_date_format
+    writer = ws.write_number
+    for current_row, serial in zip(rows, serials.tolist()):
+        writer(current_row, col, serial, cell_format)
+
+
+def _take(values, positions: np.ndarray):
+    """The values at ``positions`` of a Series or an Arrow column."""
+    if isinstance(values, pd.Series):
+        return values.iloc[positions]
+    return values.take(positions)
+
+
+def _tokens(values) -> list:
+    """Python values of a whole Series or Arrow column."""
+    if not isinstance(values, pd.Series):
+        return [token for chunk in values.chunks for token in _arrow_tokens(chunk)]
+    return values.tolist()
+
+
+def write_column(
+        ws: Worksheet,
+        row: int,
+        col: int,
+        values: pd.Series,
+        cell_format: Optional[Format] = None,
+        sanitize: Optional[Sanitize] = None,
+        ) -> None:
+    """Writes ``values`` downwards starting at (row, col).
+
+    With ``sanitize``, missing and non-finite values are masked first and
+    written in bulk according to its policy; the other values keep the
+    column's typed writer.
+    """
+    if sanitize is not None:
+        mask = missing_mask(values)
+        if mask.any():
+            sanitize.write_missing(ws, row + np.flatnonzero(mask), col, cell_format)
+            kept = np.flatnonzero(~mask)
+            values = _take(values, kept)
+            writer = column_writer(ws, values) or ws.write
+            rows = (row + kept).tolist()
+            if writer == ws.write_datetime:
+                write_serials(ws, rows, col, excel_serials(values, ws.date_1904), cell_format)
+                return
+            for current_row, token in zip(rows, _tokens(values)):
+                writer(current_row, col, token, cell_format)
+            return
+
+    writer = column_writer(ws, values)
+
+    if writer == ws.write_datetime:
+        rows = range(row, row + len(values))
+        write_serials(ws, rows, col, excel_serials(values, ws.date_1904), cell_format)
+        return
+
+    if not isinstance(values, pd.Series):
+        for chunk in values.chunks:
+            tokens = _arrow_tokens(chunk)
+            if writer is None:
+                ws.write_column(row, col, tokens, cell_format)
+            else:
+                for current_row, token in enumerate(tokens, start=row):
+                    writer(current_row, col, token, cell_format)
+            row += len(tokens)
+        return
+
+    if writer is None:
+        ws.write_column(row, col, values.tolist(), cell_format)
+        return
+
+    for current_row, token in enumerate(values.tolist(), start=row):
+        writer(current_row, col, token, cell_format)
@@ -0,0 +1,165 @@
+"""frames.py
+
+Arrow and Polars data sources for ``Table``.
+
+``Table`` only relies on a small part of the DataFrame API: ``columns``,
+``shape``, ``size``, ``len(index)``, ``items()`` and
+``itertuples(index=False, name=None)``. ``ArrowFrame`` implements it on top
+of a ``pyarrow.Table``, so Arrow tables, record batches and Polars frames
+(through ``to_arrow()``, which shares their buffers) are written straight
+from their column buffers, one chunk at a time, without a pandas copy.
+
+pyarrow (and polars) are optional: ``pip install excel_charts[arrow]`` or
+``excel_charts[polars]``.
+
+The few places that need pandas semantics on a single column (downsampling,
+donut categories) go through ``series`` and ``take``, which only convert the
+column or rows involved.
+"""
+
+from __future__ import annotations
+import hashlib
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+
+def _module(data: Any) -> str:
+    return type(data).__module__.split(".")[0]
+
+
+def is_arrow(data: Any) -> bool:
+    """True for a ``pyarrow.Table`` or ``pyarrow.RecordBatch``, without importing pyarrow."""
+    return _module(data) == "pyarrow" and type(data).__name__ in ("Table", "RecordBatch")
+
+
+def is_polars(data: Any) -> bool:
+    """True for a ``polars.DataFrame``, without importing polars."""
+    return _module(data) == "polars" and type(data).__name__ == "DataFrame"
+
+
+class ArrowFrame:
+    """Read-only view of an Arrow table with the DataFrame API used by ``Table``.
+
+    Attributes
+    ----------
+    table : pyarrow.Table
+        The wrapped table. Record batches are wrapped without copying.
+    """
+
+    def __init__(self, table: Any) -> None:
+        import pyarrow as pa
+
+        if isinstance(table, pa.RecordBatch):
+            table = pa.Table.from_batches([table])
+        self.table = table
+        self._columns = pd.Index(table.column_names)
+
+    def __repr__(self) -> str:
+        return f"ArrowFrame({self.table.num_rows} rows x {self.table.num_columns} columns)"
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._columns
+
+    @property
+    def dtypes(self) -> list:
+        return self.table.schema.types
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.table.num_rows, self.table.num_columns
+
+    @property
+    def size(self) -> int:
+        return self.table.num_rows * self.table.num_columns
+
+    @property
+    def index(self) -> range:
+        return range(self.table.num_rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def column(self, position: int):
+        """Returns the ``pyarrow.ChunkedArray`` at ``position``."""
+        return self.table.column(position)
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        """Yields ``(name, ChunkedArray)`` pairs, like ``DataFrame.items``."""
+        return zip(self.table.column_names, self.table.columns)
+
+    def itertuples(self, index: bool = False, name: Any = None, chunk_rows: int = 65_536) -> Iterator[tuple]:
+        """Yields rows as plain tuples, converting ``chunk_rows`` rows at a time.
+
+        ``index`` and ``name`` are accepted for compatibility with
+        ``DataFrame.itertuples(index=False, name=None)``.
+        """
+        for batch in self.table.to_batches(max_chunksize=chunk_rows):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def take(self, indices) -> ArrowFrame:
+        """Returns the rows at ``indices``."""
+        return ArrowFrame(self.table.take(np.asarray(indices, dtype=np.int64)))
+
+    def content_hash(self) -> str:
+        """Hash of the schema and the column buffers, read without copying."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(self.table.schema).encode())
+        digest.update(str(self.shape).encode())
+        for column in self.table.columns:
+            for chunk in column.chunks:
+                digest.update(f"{chunk.offset}:{len(chunk)}:{chunk.null_count}".encode())
+                for buffer in chunk.buffers():
+                    if buffer is not None:
+                        digest.update(memoryview(buffer))
+        return digest.hexdigest()
+
+
+def as_frame(data: Any) -> Any:
+    """Wraps Arrow and Polars data in an ``ArrowFrame``, returns anything else as is."""
+    if is_polars(data):
+        return ArrowFrame(data.to_arrow())
+    if is_arrow(data):
+        return ArrowFrame(data)
+    return data
+
+
+def series(data: Any, position: int) -> pd.Series:
+    """Returns the column at ``position`` as a Series, converting only that column."""
+    if isinstance(data, ArrowFrame):
+        return data.column(position).to_pandas()
+    return data.iloc[:, position]
+
+
+def take(data: Any, indices) -> Any:
+    """Returns the rows at ``indices`` with a fresh 0..n index."""
+    if isinstance(data, ArrowFrame):
+        return data.take(indices)
+    return data.iloc[indices].reset_index(drop=True)
+
+
+def rows(data: Any, start: int, stop: int) -> Any:
+    """Returns rows ``start`` to ``stop`` (excluded) without copying them."""
+    if isinstance(data, ArrowFrame):
+        return ArrowFrame(data.table.slice(start, stop - start))
+    return data.iloc[start:stop]
+
+
+def value(data: Any, row: int, col: int) -> Any:
+    """Returns the value at position ``(row, col)``, like ``DataFrame.iat``."""
+    if isinstance(data, ArrowFrame):
+        return data.column(col)[row].as_py()
+    return data.iat[row, col]
+
+
+def nbytes(data: Any) -> int:
+    """In-memory size of the data."""
+    if isinstance(data, ArrowFrame):
+        return data.nbytes
+    return int(data.memory_usage(index=False, deep=True).sum())
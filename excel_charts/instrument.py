@@ -0,0 +1,99 @@
+"""instrument.py
+
+Timing and counter hooks for the build pipeline.
+
+A ``Writter`` carries an ``Instrument``. Tables, charts and the workbook
+report spans (``with instrument.span("table.cells"):``) and counters
+(``instrument.count("cells", n)``) to it. The base class does nothing, so
+the hooks cost almost nothing unless a collector such as ``PhaseTimer`` is
+passed to the ``Writter``.
+
+Span names used by the package:
+
+- ``table.headers``, ``table.formats``, ``table.cells``, ``table.excel_table``
+  and ``table.title`` from ``Table.add_to_worksheet``.
+- ``plan.flush`` from ``SheetPlan.flush``.
+- ``chart.add_to_workbook`` from ``BaseChart.add_to_workbook`` and
+  ``chart.<type>`` from each chart's ``_create_chart``.
+- ``writter.replay`` (sheet builders, see ``builder.py``) and
+  ``writter.close`` from ``Writter.close``.
+- ``parallel.render`` and ``parallel.merge`` from ``render_sheets``.
+
+Counters: ``cells``, ``formats_created``, ``series``, ``bytes_out`` and, with
+a part cache, ``cache_hits`` and ``cache_misses``.
+"""
+
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Iterator
+
+
+class Instrument:
+    """No-op instrument. Subclass it to collect spans and counters."""
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Context manager around one phase of the build."""
+        yield
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Adds ``value`` to the counter ``name``."""
+
+
+def spanned(name: str) -> Callable:
+    """Decorator recording a method call as span ``name`` of ``self.instrument``."""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrument.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@dataclass
+class PhaseTimer(Instrument):
+    """Collects the total time and number of calls of every span.
+
+    Attributes
+    ----------
+    totals : dict
+        Seconds spent per span name.
+    calls : dict
+        Number of times each span was entered.
+    counters : dict
+        Values accumulated through ``count``.
+    """
+    totals: dict = field(default_factory=dict)
+    calls: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=dict)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> str:
+        """Returns the per-phase breakdown, slowest phase first."""
+        total = sum(self.totals.values()) or 1.0
+        lines = [f"{'phase':<24} {'calls':>7} {'seconds':>10} {'share':>7}"]
+        for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1]):
+            lines.append(
+                f"{name:<24} {self.calls[name]:>7} {seconds:>10.4f} {seconds / total:>7.1%}"
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24} {value:>7}")
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        print(self.report())
@@ -0,0 +1,443 @@
+"""package.py
+
+Assembly of the xlsx zip archive at ``Writter.close()``.
+
+xlsxwriter deflates every part at its default level, one after the other.
+With a ``Compression`` set on the ``Writter``, the parts generated by
+xlsxwriter are captured instead and zipped here:
+
+- ``level`` picks the zlib level, from 1 (fastest) to 9 (smallest). Level 0
+  stores the parts uncompressed, for intermediate files re-zipped later.
+- ``threads`` compresses large parts in parallel. A part bigger than
+  ``chunk_size`` is split into chunks deflated independently (the way pigz
+  does) and concatenated into one valid deflate stream, so a single huge
+  worksheet is spread over every thread too. zlib releases the GIL while
+  compressing.
+
+The archive is written by ``ZipWriter``, which lays out the local headers,
+the central directory and, past 4 GiB or 65,535 members, the ZIP64 records
+itself: ``zipfile`` has no public way to add a member deflated beforehand.
+
+Members are stamped 1980-01-01 like xlsxwriter's in-memory mode, so the
+output is reproducible.
+"""
+
+from __future__ import annotations
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO, StringIO
+from typing import Optional
+from zipfile import ZIP64_LIMIT, ZIP_DEFLATED, ZIP_FILECOUNT_LIMIT, ZIP_STORED, LargeZipFile
+
+from xlsxwriter.packager import Packager
+from xlsxwriter.workbook import Workbook as XlsxWorkbook
+
+TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+# Records of the zip format (APPNOTE.TXT, section 4.3).
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+# Version needed to extract: stored, deflated and ZIP64 members.
+STORED_VERSION, DEFLATED_VERSION, ZIP64_VERSION = 10, 20, 45
+# Made by a Unix system, like zipfile's members.
+MADE_BY = 3 << 8
+UTF8_FLAG = 0x800
+
+
+@dataclass
+class Compression:
+    """Compression options of the xlsx archive.
+
+    Attributes
+    ----------
+    level : int
+        zlib level, 1 to 9. 0 stores the parts without compression.
+    threads : int
+        Threads compressing the parts larger than ``min_parallel_size``.
+    min_parallel_size : int
+        Parts smaller than this many bytes are compressed in the calling
+        thread, where the thread hand-off would cost more than it saves.
+    chunk_size : int
+        Parts larger than this are compressed as independent chunks.
+    """
+    level: int = 6
+    threads: int = 1
+    min_parallel_size: int = 1024 ** 2
+    chunk_size: int = 4 * 1024 ** 2
+
+    def __post_init__(self):
+        if not 0 <= self.level <= 9:
+            msg = f"Compression level must be between 0 and 9, got {self.level}."
+            raise ValueError(msg)
+        self.threads = max(self.threads, 1)
+
+    @classmethod
+    def stored(cls) -> Compression:
+        """No compression, for intermediate files."""
+        return cls(level=0)
+
+    @classmethod
+    def fast(cls, threads: Optional[int] = None) -> Compression:
+        """Fastest deflate level, on every core by default."""
+        return cls(level=1, threads=threads or os.cpu_count() or 1)
+
+    @property
+    def method(self) -> int:
+        return ZIP_STORED if self.level == 0 else ZIP_DEFLATED
+
+
+def deflate(data: bytes, level: int, final: bool = True) -> bytes:
+    """Raw deflate of ``data``. Non final chunks end on a byte boundary."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    flush = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+    return compressor.compress(data) + compressor.flush(flush)
+
+
+def _chunks(data: bytes, size: int) -> list[memoryview]:
+    view = memoryview(data)
+    return [view[start:start + size] for start in range(0, len(data), size)]
+
+
+def read_parts(files: list) -> list[tuple[str, bytes]]:
+    """
+    Reads the parts generated by xlsxwriter's packager.
+
+    ``files`` holds ``(os_filename, xml_filename, is_binary)`` entries where
+    ``os_filename`` is a StringIO/BytesIO in ``in_memory`` mode and a
+    temporary file otherwise. Temporary files are removed.
+    """
+    parts = []
+    for os_filename, xml_filename, is_binary in files:
+        if isinstance(os_filename, StringIO):
+            data = os_filename.getvalue().encode("utf-8")
+        elif isinstance(os_filename, BytesIO):
+            data = os_filename.getvalue()
+        else:
+            with open(os_filename, "rb") as f:
+                data = f.read()
+            os.remove(os_filename)
+        parts.append((xml_filename, data))
+    return parts
+
+
+@dataclass
+class _Member:
+    """Central directory entry of a written member."""
+    name: bytes
+    flags: int
+    method: int
+    crc: int
+    compress_size: int
+    file_size: int
+    offset: int
+
+
+class ZipWriter:
+    """
+    Writes a zip archive member by member to a binary file object.
+
+    Members are added with their data already compressed, so the CRC and
+    sizes are known and every local header is written once: the target
+    doesn't need to be seekable. Members are stamped with ``TIMESTAMP``.
+    """
+
+    def __init__(self, fp, allow_zip64: bool = True) -> None:
+        self.fp = fp
+        self.allow_zip64 = allow_zip64
+        self.members = []
+        try:
+            self.offset = fp.tell()
+        except (AttributeError, OSError):
+            self.offset = 0
+        year, month, day, hour, minute, second = TIMESTAMP
+        self.date = (year - 1980) << 9 | month << 5 | day
+        self.time = hour << 11 | minute << 5 | second // 2
+
+    def add(self, name: str, data: bytes, compressed: bytes, method: int) -> None:
+        """Adds the member ``name`` holding ``data``, stored as ``compressed``."""
+        try:
+            encoded, flags = name.encode("ascii"), 0
+        except UnicodeEncodeError:
+            encoded, flags = name.encode("utf-8"), UTF8_FLAG
+
+        member = _Member(
+            encoded, flags, method, zlib.crc32(data),
+            len(compressed), len(data), self.offset,
+        )
+        zip64 = max(member.file_size, member.compress_size) > ZIP64_LIMIT
+        if zip64:
+            self._check_zip64("Filesize")
+            extra = struct.pack("<2H2Q", 1, 16, member.file_size, member.compress_size)
+            sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+        else:
+            extra = b""
+            sizes = (member.compress_size, member.file_size)
+
+        header = LOCAL_HEADER.pack(
+            b"PK\x03\x04", _version(method, zip64), flags, method,
+            self.time, self.date, member.crc, *sizes, len(encoded), len(extra),
+        )
+        self._write(header, encoded, extra, compressed)
+        self.members.append(member)
+
+    def close(self) -> None:
+        """Writes the central directory and the end records."""
+        start = self.offset
+        for member in self.members:
+            values = [member.file_size, member.compress_size, member.offset]
+            large = [value for value in values if value > ZIP64_LIMIT]
+            extra = struct.pack(f"<2H{len(large)}Q", 1, 8 * len(large), *large) if large else b""
+            file_size, compress_size, offset = (
+                0xFFFFFFFF if value > ZIP64_LIMIT else value for value in values
+            )
+            header = CENTRAL_HEADER.pack(
+                b"PK\x01\x02", MADE_BY | _version(member.method, bool(large)),
+                _version(member.method, bool(large)), member.flags, member.method,
+                self.time, self.date, member.crc, compress_size, file_size,
+                len(member.name), len(extra), 0, 0, 0, 0o600 << 16, offset,
+            )
+            self._write(header, member.name, extra)
+
+        count, size = len(self.members), self.offset - start
+        if count > ZIP_FILECOUNT_LIMIT or max(start, size) > ZIP64_LIMIT:
+            self._check_zip64("Files count" if count > ZIP_FILECOUNT_LIMIT else "Central directory")
+            end_offset = self.offset
+            self._write(
+                ZIP64_END_RECORD.pack(
+                    b"PK\x06\x06", ZIP64_END_RECORD.size - 12, MADE_BY | ZIP64_VERSION,
+                    ZIP64_VERSION, 0, 0, count, count, size, start,
+                ),
+                ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, end_offset, 1),
+            )
+            count = min(count, 0xFFFF)
+            size, start = min(size, 0xFFFFFFFF), min(start, 0xFFFFFFFF)
+        self._write(END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+
+    def _check_zip64(self, what: str) -> None:
+        if not self.allow_zip64:
+            raise LargeZipFile(f"{what} would require ZIP64 extensions")
+
+    def _write(self, *blocks: bytes) -> None:
+        for block in blocks:
+            self.fp.write(block)
+            self.offset += len(block)
+
+
+def _version(method: int, zip64: bool) -> int:
+    """Version needed to extract a member."""
+    if zip64:
+        return ZIP64_VERSION
+    return DEFLATED_VERSION if method == ZIP_DEFLATED else STORED_VERSION
+
+
+def write_archive(
+        target,
+        parts: list[tuple[str, bytes]],
+        compression: Compression,
+        allow_zip64: bool = True,
+        ) -> None:
+    """Zips ``parts`` into ``target``, a path or a binary file object."""
+    level = compression.level
+    large = [
+        index for index, (_, data) in enumerate(parts)
+        if level and compression.threads > 1 and len(data) >= compression.min_parallel_size
+    ]
+
+    deflated = {}
+    if large:
+        jobs = [
+            (index, chunk, position == len(chunks) - 1)
+            for index in large
+            for chunks in [_chunks(parts[index][1], compression.chunk_size)]
+            for position, chunk in enumerate(chunks)
+        ]
+        with ThreadPoolExecutor(max_workers=compression.threads) as pool:
+            results = pool.map(lambda job: deflate(job[1], level, job[2]), jobs)
+            for (index, _, _), raw in zip(jobs, results):
+                deflated.setdefault(index, []).append(raw)
+
+    fp = open(target, "wb") if isinstance(target, (str, os.PathLike)) else target
+    try:
+        writer = ZipWriter(fp, allow_zip64)
+        for index, (name, data) in enumerate(parts):
+            if not level:
+                compressed = data
+            elif index in deflated:
+                compressed = b"".join(deflated.pop(index))
+            else:
+                compressed = deflate(data, level)
+            writer.add(name, data, compressed, compression.method)
+        writer.close()
+    finally:
+        if fp is not target:
+            fp.close()
+
+
+class ExcelPackager(Packager):
+    """Packager handing the generated parts to ``write_archive``.
+
+    Without a ``Compression`` on the ``Writter`` it behaves like xlsxwriter's.
+    Worksheets rendered in other processes (``ExcelWorkbook.sheet_parts``,
+    see ``parallel.py``) are written from their XML instead of generated.
+    """
+
+    def __init__(self, writter) -> None:
+        super().__init__()
+        self.writter = writter
+        self._formats = None
+
+    def _read_part(self, filename) -> str:
+        if isinstance(filename, StringIO):
+            return filename.getvalue()
+        with open(filename, encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def _write_part(self, xml_filename: str, xml: str) -> None:
+        filename = self._filename(xml_filename)
+        if isinstance(filename, StringIO):
+            filename.write(xml)
+        else:
+            with open(filename, "w", encoding="utf-8", newline="") as f:
+                f.write(xml)
+
+    def _formats_by_key(self) -> dict:
+        if self._formats is None:
+            self._formats = {}
+            for xf_format in self.workbook.formats:
+                self._formats.setdefault(xf_format._get_format_key(), []).append(xf_format)
+        return self._formats
+
+    def _replay_formats(self, meta: dict) -> bool:
+        """
+        Assigns the format indices a sheet assigned when it was generated
+        elsewhere (cached or rendered in another process).
+
+        Returns False, assigning nothing, when a format is missing.
+        """
+        formats = self._formats_by_key()
+        xf = [formats.get(key) for key in meta.get("xf", [])]
+        dxf = [formats.get(key) for key in meta.get("dxf", [])]
+        if not all(xf) or not all(dxf):
+            return False
+        for candidates in xf:
+            candidates[0]._get_xf_index()
+        for candidates in dxf:
+            candidates[0]._get_dxf_index()
+        return True
+
+    def _generate(self, worksheet, xml_filename: str):
+        if worksheet.constant_memory:
+            worksheet._opt_reopen()
+            worksheet._write_single_row()
+
+        filename = self._filename(xml_filename)
+        worksheet._set_xml_writer(filename)
+        worksheet._assemble_xml_file()
+        return filename
+
+    def _write_worksheet_files(self) -> None:
+        parts = self.workbook.sheet_parts
+        if not parts:
+            return super()._write_worksheet_files()
+
+        index = 1
+        for worksheet in self.workbook.worksheets():
+            if worksheet.is_chartsheet:
+                continue
+
+            xml_filename = "xl/worksheets/sheet" + str(index) + ".xml"
+            index += 1
+
+            part = parts.get(worksheet.name)
+            if part is None:
+                self._generate(worksheet, xml_filename)
+                continue
+
+            # The formats are numbered as if the sheet was generated here.
+            if not self._replay_formats({"xf": part.new_formats}):
+                msg = f"Worksheet '{worksheet.name}' uses a format missing from the workbook."
+                raise RuntimeError(msg)
+            self._write_part(xml_filename, part.render(self.workbook, worksheet))
+
+    def _create_package(self):
+        files = super()._create_package()
+        if self.writter.compression is None:
+            return files
+        self.workbook.package_parts = files
+        return []
+
+
+class ExcelWorkbook(XlsxWorkbook):
+    """xlsxwriter Workbook zipped according to the ``Writter`` options.
+
+    A ``Writter`` only creates one when it needs it (``compression`` or
+    ``part_cache``); plain builds keep xlsxwriter's Workbook.
+    """
+
+    def __init__(self, filename=None, options=None, writter=None, packager_class=ExcelPackager) -> None:
+        super().__init__(filename, options)
+        self._init_parts(writter, packager_class)
+
+    def _init_parts(self, writter, packager_class) -> None:
+        self.writter = writter
+        self.packager_class = packager_class
+        self.package_parts = []
+        # Worksheet name -> SheetPart, and chart range -> data cached from
+        # those worksheets, see parallel.py.
+        self.sheet_parts = {}
+        self.range_data = {}
+
+    @classmethod
+    def adopt(cls, workbook: XlsxWorkbook, writter) -> ExcelWorkbook:
+        """
+        Turns the xlsxwriter Workbook of ``writter`` into an ExcelWorkbook,
+        keeping its sheets and formats, for features enabled once the
+        workbook exists (``render_sheets``).
+        """
+        if not isinstance(workbook, cls):
+            workbook.__class__ = cls
+            workbook._init_parts(writter, ExcelPackager)
+        return workbook
+
+    def _get_packager(self):
+        return self.packager_class(self.writter)
+
+    def _add_chart_data(self) -> None:
+        # Worksheets rendered in other processes have no cells here.
+        if self.range_data:
+            for primary in self.charts:
+                for chart in (primary, primary.combined):
+                    if chart is None:
+                        continue
+                    for c_range, r_id in chart.formula_ids.items():
+                        if chart.formula_data[r_id] is None:
+                            chart.formula_data[r_id] = self.range_data.get(c_range)
+        super()._add_chart_data()
+
+    def _store_workbook(self) -> None:
+        compression = self.writter.compression
+        if compression is None:
+            return super()._store_workbook()
+
+        # xlsxwriter prepares and generates every part, then zips an empty
+        # list into a throwaway buffer; the parts are zipped here instead.
+        target = self.filename
+        self.filename = BytesIO()
+        try:
+            super()._store_workbook()
+        finally:
+            self.filename = target
+
+        write_archive(
+            target,
+            read_parts(self.package_parts),
+            compression,
+            allow_zip64=self.allow_zip64,
+        )
+        self.package_parts = []
@@ -0,0 +1,86 @@
+"""palette.py
+
+Per-point colors of category charts (``Bar``, ``Donut``).
+
+xlsxwriter takes point formats positionally, one entry per data point, with
+``None`` keeping the default format. ``point_fills`` factorizes the category
+column once and maps every distinct category to its fill, so each row gets
+its own entry in a single vectorized step and categories without a color
+keep their slot instead of shifting the colors of the following points.
+
+The category -> fill lookup is cached per palette and category set, so
+charts drawn from the same categories with the same palette only index it
+with their own row codes.
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+FILL_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=FILL_CACHE_SIZE)
+def _fill_map(colors: frozenset, categories: frozenset) -> dict:
+    """Fill of every category of ``categories`` that has a color."""
+    return {
+        category: {"fill": {"color": color}}
+        for category, color in colors if color and category in categories
+    }
+
+
+def _lookup(colors: frozenset, uniques: tuple) -> Optional[np.ndarray]:
+    """Fill by factorized code, None when no category has a color."""
+    fills = _fill_map(colors, frozenset(uniques))
+    if not fills:
+        return None
+    # One extra slot at the end for missing categories, coded -1.
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    for position, category in enumerate(uniques):
+        lookup[position] = fills.get(category)
+    return lookup
+
+
+def point_fills(categories: Any, colors: dict | list) -> list[Optional[dict]]:
+    """
+    Returns the ``points`` of a series whose categories are ``categories``.
+
+    Parameters
+    ----------
+    categories : array-like
+        Category of every data point, in row order.
+    colors : dict | list
+        Color by category, or colors given to the distinct categories in
+        order of first appearance, cycling when there are more categories.
+
+    Returns
+    -------
+    list
+        One ``{"fill": {"color": ...}}`` entry per point, ``None`` for the
+        points whose category has no color. Empty when no point has one.
+    """
+    codes, uniques = pd.factorize(pd.Series(categories, copy=False))
+    uniques = tuple(uniques.tolist())
+    if not isinstance(colors, dict):
+        colors = {
+            category: colors[position % len(colors)]
+            for position, category in enumerate(uniques)
+        } if colors else {}
+
+    try:
+        key = frozenset(colors.items())
+    except TypeError:
+        msg = "Category colors must be keyed by hashable categories."
+        raise ValueError(msg) from None
+    lookup = _lookup(key, uniques)
+    if lookup is None:
+        return []
+    return lookup[codes].tolist()
+
+
+def fill_cache_info():
+    """Hits, misses and size of the fill lookup cache."""
+    return _fill_map.cache_info()
@@ -0,0 +1,583 @@
+"""parallel.py
+
+Renders the worksheets of one workbook in worker processes.
+
+Most of ``Writter.close()`` goes into generating the worksheet XML, one
+``<c>`` element per cell, in a single thread. ``render_sheets`` builds each
+worksheet, with its tables and charts, in its own process and brings back
+the rendered XML:
+
+    def build(wb, region, data):
+        table = Table(region, data, wb, worksheet=region, position="A2")
+        table.add_to_worksheet()
+        Line(table, worksheet=region, chart_position="F2")._create_chart()
+
+    wb = Writter(sheet_names=regions)
+    render_sheets(wb, [SheetJob(region, build, (region, frames[region])) for region in regions])
+    wb.close()
+
+A worker builds its job into a private ``Writter`` holding the same sheets.
+Cells are written there directly; every other call (formats, charts, Excel
+tables, conditional formats, column widths, auxiliary sheets...) is run and
+recorded. The worker closes its workbook, rendering the job's worksheets
+only, and returns their XML with its shared strings, the keys of its
+formats, the recorded calls and the data cached in its charts.
+
+The jobs are then merged in the order of their worksheets: the shared
+strings are added to the workbook's, the recorded calls are replayed on it,
+so formats, charts and tables are numbered as in a serial build, and the
+chart caches are kept. At ``close()`` the worksheet XML is written with
+its string, format and conditional format indices renumbered, and the
+workbook-level parts (styles, shared strings, charts, drawings and
+relationships) are generated as usual. The file is byte-identical to
+calling the jobs one after the other on the ``Writter``, in the order of
+their worksheets.
+
+Jobs are pickled: ``build`` must be a module-level function and its
+arguments picklable. Limitations:
+
+- A job only writes its worksheet and the sheets it creates. The other
+  sheets raise on ``get_worksheet_by_name``, and auxiliary sheet names must
+  be distinct across jobs.
+- A rendered worksheet is final: cells written on it afterwards are lost.
+  Charts added outside the jobs get no cached data for the ranges on
+  rendered worksheets; Excel reads the cells when the file is opened.
+- ``constant_memory``, ``part_cache``, ``dedupe_sources``, sheet builders
+  and embedded images (``embed_image``) are not supported.
+"""
+
+from __future__ import annotations
+import os
+import re
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import repeat
+from typing import Any, Callable, NamedTuple, Optional
+
+from xlsxwriter.chart import Chart
+from xlsxwriter.format import Format
+from xlsxwriter.worksheet import Worksheet
+
+from excel_charts.builder import CELL_WRITES
+from excel_charts.package import ExcelPackager, ExcelWorkbook
+from excel_charts.workbook import Writter
+
+# Worksheet methods run in the worker only, without being recorded.
+UNRECORDED = frozenset({"add_write_handler"})
+
+XF_INDEX = re.compile(r'(<(?:c|row) [^>]*? s="|<col [^>]*? style=")(\d+)(")')
+STRING_INDEX = re.compile(r'( t="s"><v>)(\d+)(</v>)')
+DXF_INDEX = re.compile(r'(<cfRule [^>]*? dxfId=")(\d+)(")')
+TAB_SELECTED = ' tabSelected="1"'
+SHEET_VIEW = re.compile(
+    r'<sheetView\b(?: (?:showGridLines|showRowColHeaders|showZeros|rightToLeft)="\d")*'
+)
+
+
+@dataclass
+class SheetJob:
+    """Picklable description of the build of one worksheet.
+
+    Attributes
+    ----------
+    worksheet : str
+        Existing worksheet of the ``Writter`` built by the job.
+    build : Callable
+        Module-level function called as ``build(wb, *args, **kwargs)``. ``wb``
+        stands in for the ``Writter``: pass it to ``Table`` and charts.
+    args : tuple
+        Positional arguments of ``build``, e.g. the data of the sheet.
+    kwargs : dict
+        Keyword arguments of ``build``.
+    """
+    worksheet: str
+    build: Callable
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+
+
+@dataclass
+class SheetPart:
+    """Worksheet XML rendered by a worker, see ``ExcelPackager``.
+
+    Attributes
+    ----------
+    xml : str
+        The worksheet part, numbered after the worker's workbook.
+    new_formats : list
+        Keys of the formats first used by the worksheet, in order.
+    index : int
+        Position of the worksheet in the worker's workbook.
+    selected : int
+        Whether the tab was selected in the worker's workbook.
+    hyperlinks : list
+        External hyperlink relationships of the worksheet.
+    dynamic_arrays : bool
+        The worksheet holds dynamic array formulas.
+    data_bars : bool
+        The worksheet holds Excel 2010 data bars, whose ids embed ``index``.
+    dimensions : tuple
+        ``(dim_rowmin, dim_rowmax, dim_colmin, dim_colmax)`` of the worksheet.
+    xf_keys : list
+        Format keys of the worker's workbook, by xf index - 1. Set at merge.
+    strings : list
+        Index in the workbook's shared strings of each worker's string.
+    dxf : list
+        Index in the workbook of each worker's conditional format.
+    """
+    xml: str
+    new_formats: list
+    index: int
+    selected: int
+    hyperlinks: list
+    dynamic_arrays: bool
+    data_bars: bool
+    dimensions: tuple
+    xf_keys: list = field(default_factory=list, repr=False)
+    strings: list = field(default_factory=list, repr=False)
+    dxf: list = field(default_factory=list, repr=False)
+
+    def render(self, workbook, worksheet: Worksheet) -> str:
+        """
+        Returns the XML numbered after ``workbook``.
+
+        Called at packaging, once the formats of ``new_formats`` got their
+        index in ``workbook``.
+        """
+        if self.data_bars and worksheet.index != self.index:
+            msg = f"Worksheet '{worksheet.name}' has data bars and moved from "
+            msg += f"position {self.index} to {worksheet.index} after rendering."
+            raise RuntimeError(msg)
+
+        indices = workbook.xf_format_indices
+        xf = {0: 0}
+        for index, key in enumerate(self.xf_keys, start=1):
+            xf[index] = indices.get(key)
+
+        xml = _renumber(self.xml, XF_INDEX, xf)
+        xml = _renumber(xml, STRING_INDEX, dict(enumerate(self.strings)))
+        xml = _renumber(xml, DXF_INDEX, dict(enumerate(self.dxf)))
+
+        if worksheet.selected and not self.selected:
+            xml = SHEET_VIEW.sub(lambda match: match[0] + TAB_SELECTED, xml, count=1)
+        elif self.selected and not worksheet.selected:
+            xml = xml.replace(TAB_SELECTED, "", 1)
+        return xml
+
+
+@dataclass
+class JobResult:
+    """What a worker sends back for one ``SheetJob``.
+
+    Attributes
+    ----------
+    parts : dict
+        Worksheet name -> ``SheetPart`` of the job's worksheet and of the
+        sheets it created, in sheet order.
+    xf_keys : list
+        Keys of the formats of the worker's workbook, in xf index order.
+    dxf_keys : list
+        Keys of its conditional formats, in dxf index order.
+    strings : list
+        Its shared strings, in index order.
+    string_count : int
+        Number of shared string cells written.
+    calls : list
+        ``(target, method, args, kwargs, result)`` of the recorded calls.
+    range_data : dict
+        Chart range -> cached data, for the ranges on the job's sheets.
+    duration : float
+        Seconds spent in the worker.
+    """
+    parts: dict
+    xf_keys: list
+    dxf_keys: list
+    strings: list
+    string_count: int
+    calls: list
+    range_data: dict
+    duration: float = 0.0
+
+    @property
+    def created(self) -> list[str]:
+        """Names of the sheets created by the job."""
+        return [args[0] for target, name, args, _, _ in self.calls
+                if target == BOOK and name == "add_worksheet"]
+
+
+class Ref(NamedTuple):
+    """Picklable reference to an object of the workbook in recorded calls."""
+    kind: str
+    key: Any = None
+
+
+BOOK = Ref("book")
+
+
+def _renumber(xml: str, pattern: re.Pattern, mapping: dict) -> str:
+    """Replaces the indices captured by ``pattern`` through ``mapping``."""
+    if all(new == old for old, new in mapping.items()):
+        return xml
+
+    def replace(match: re.Match) -> str:
+        new = mapping.get(int(match[2]))
+        if new is None:
+            msg = f"No index in the workbook for '{match[0]}'."
+            raise RuntimeError(msg)
+        return f"{match[1]}{new}{match[3]}"
+
+    return pattern.sub(replace, xml)
+
+
+class _JobSheet:
+    """Worksheet of a worker: cell writes run, other calls are recorded too."""
+    __slots__ = ("_book", "_real", "_ref", "_methods")
+
+    def __init__(self, book: _JobWorkbook, real: Any, ref: Ref) -> None:
+        self._book = book
+        self._real = real
+        self._ref = ref
+        self._methods = {}
+
+    def __repr__(self) -> str:
+        return f"_JobSheet({self._ref.key!r})"
+
+    def __getattr__(self, name: str):
+        value = getattr(self._real, name)
+        if name.startswith("_") or not callable(value) or name in CELL_WRITES or name in UNRECORDED:
+            return value
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = partial(self._book._call, self._ref, value, name)
+        return method
+
+
+class _JobChart(_JobSheet):
+    """Chart of a worker: every method call is run and recorded."""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"_JobChart({self._ref.key!r})"
+
+
+class _JobWorkbook:
+    """Stands in for the ``Writter`` in ``SheetJob.build``."""
+
+    constant_memory = False
+
+    def __init__(self, writter: Writter, worksheet: str) -> None:
+        self._writter = writter
+        self._wb = writter.wb
+        self.owned = {worksheet}
+        self.calls = []
+        self._sheets = {}
+        self._objects = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self._wb, name)
+
+    def _call(self, target: Ref, method: Callable, name: str, *args, **kwargs):
+        self.calls.append((target, name, self._refer(args), self._refer(kwargs), None))
+        return method(*_unwrap(args), **_unwrap(kwargs))
+
+    def _sheet(self, name: str) -> _JobSheet:
+        sheet = self._sheets.get(name)
+        if sheet is None:
+            sheet = self._sheets[name] = _JobSheet(self, self._wb.get_worksheet_by_name(name), Ref("sheet", name))
+        return sheet
+
+    def _refer(self, value: Any) -> Any:
+        """``value`` with workbook objects replaced by picklable references."""
+        if isinstance(value, _JobSheet):
+            return value._ref
+        if isinstance(value, Worksheet):
+            return Ref("sheet", value.name)
+        if isinstance(value, (Format, Chart)):
+            ref = self._objects.get(id(value))
+            if ref is not None:
+                return ref
+            for attribute in ("default_url_format", "default_date_format"):
+                if value is getattr(self._wb, attribute):
+                    return Ref("attribute", attribute)
+            msg = f"{value!r} was not created through the job's workbook."
+            raise ValueError(msg)
+        if type(value) is tuple:
+            return tuple(self._refer(item) for item in value)
+        if type(value) is list:
+            return [self._refer(item) for item in value]
+        if type(value) is dict:
+            return {key: self._refer(item) for key, item in value.items()}
+        return value
+
+    def get_worksheet_by_name(self, name: str) -> Optional[_JobSheet]:
+        """
+        Returns the worksheet ``name`` if the job owns it, None if it doesn't
+        exist.
+
+        Raises
+        ------
+        ValueError
+            If the sheet belongs to another job or to the calling process.
+        """
+        if name in self.owned:
+            return self._sheet(name)
+        if self._wb.get_worksheet_by_name(name) is not None:
+            msg = f"Worksheet '{name}' is not rendered by this job."
+            raise ValueError(msg)
+        return None
+
+    def add_worksheet(self, name: Optional[str] = None) -> _JobSheet:
+        """Creates the auxiliary sheet ``name``, owned by the job."""
+        if name is None:
+            msg = "Worksheets added by a SheetJob need a name."
+            raise ValueError(msg)
+        self._wb.add_worksheet(name)
+        self.calls.append((BOOK, "add_worksheet", (name,), {}, None))
+        self.owned.add(name)
+        return self._sheet(name)
+
+    def add_format(self, properties: Optional[dict] = None) -> Format:
+        """Same as ``Writter.add_format``."""
+        cell_format = self._writter.add_format(properties)
+        if id(cell_format) not in self._objects:
+            ref = self._objects[id(cell_format)] = Ref("format", len(self._objects))
+            self.calls.append((BOOK, "add_format", (properties,), {}, ref))
+        return cell_format
+
+    def add_chart(self, options: dict) -> _JobChart:
+        """Same as ``Workbook.add_chart``."""
+        chart = self._wb.add_chart(options)
+        ref = self._objects[id(chart)] = Ref("chart", len(self._objects))
+        self.calls.append((BOOK, "add_chart", (options,), {}, ref))
+        return _JobChart(self, chart, ref)
+
+
+def _unwrap(value: Any) -> Any:
+    """``value`` with the worker's stand-ins replaced by the real objects."""
+    if isinstance(value, _JobSheet):
+        return value._real
+    if type(value) is tuple:
+        return tuple(_unwrap(item) for item in value)
+    if type(value) is list:
+        return [_unwrap(item) for item in value]
+    if type(value) is dict:
+        return {key: _unwrap(item) for key, item in value.items()}
+    return value
+
+
+class _RenderingPackager(ExcelPackager):
+    """Renders the job's worksheets of a worker's workbook, nothing else."""
+
+    def __init__(self, writter: Writter, sheets: set, parts: dict) -> None:
+        super().__init__(writter)
+        self.sheets = sheets
+        self.parts = parts
+
+    def _create_package(self):
+        workbook = self.workbook
+        for worksheet in workbook.worksheets():
+            if worksheet.name not in self.sheets:
+                continue
+
+            before = len(workbook.xf_format_indices)
+            xml = self._read_part(self._generate(worksheet, worksheet.name))
+            self.parts[worksheet.name] = SheetPart(
+                xml=xml,
+                new_formats=list(workbook.xf_format_indices)[before:],
+                index=worksheet.index,
+                selected=worksheet.selected,
+                hyperlinks=worksheet.external_hyper_links,
+                dynamic_arrays=worksheet.has_dynamic_arrays,
+                data_bars=bool(worksheet.data_bars_2010),
+                dimensions=(
+                    worksheet.dim_rowmin, worksheet.dim_rowmax,
+                    worksheet.dim_colmin, worksheet.dim_colmax,
+                ),
+            )
+        return []
+
+
+def _charts(wb) -> list[Chart]:
+    """The charts of ``wb``, including the charts combined into them."""
+    return [
+        chart for primary in wb.charts
+        for chart in (primary, primary.combined) if chart is not None
+    ]
+
+
+def render_job(job: SheetJob, sheet_names: list[str]) -> JobResult:
+    """Builds ``job`` in a private workbook holding ``sheet_names``."""
+    start = time.perf_counter()
+    writter = Writter(sheet_names=list(sheet_names))
+    book = _JobWorkbook(writter, job.worksheet)
+    job.build(book, *job.args, **job.kwargs)
+
+    parts = {}
+    ExcelWorkbook.adopt(writter.wb, writter)
+    writter.wb.packager_class = partial(_RenderingPackager, sheets=book.owned, parts=parts)
+    with warnings.catch_warnings():
+        # Charts may read sheets of other jobs, empty here.
+        warnings.simplefilter("ignore")
+        writter.close()
+
+    wb = writter.wb
+    range_data = {}
+    for chart in _charts(wb):
+        for c_range, r_id in chart.formula_ids.items():
+            sheet, _ = wb._get_chart_range(c_range)
+            if sheet in book.owned and chart.formula_data[r_id] is not None:
+                range_data[c_range] = chart.formula_data[r_id]
+
+    return JobResult(
+        parts=parts,
+        xf_keys=list(wb.xf_format_indices),
+        dxf_keys=list(wb.dxf_format_indices),
+        # Sorted by index at close.
+        strings=wb.str_table.string_array,
+        string_count=wb.str_table.count,
+        calls=book.calls,
+        range_data=range_data,
+        duration=time.perf_counter() - start,
+    )
+
+
+def _resolve(value: Any, writter: Writter, objects: dict) -> Any:
+    """``value`` with every reference replaced by the object of ``writter``."""
+    if isinstance(value, Ref):
+        if value.kind == "sheet":
+            return writter.wb.get_worksheet_by_name(value.key)
+        if value.kind == "attribute":
+            return getattr(writter.wb, value.key)
+        return objects[value]
+    if type(value) is tuple:
+        return tuple(_resolve(item, writter, objects) for item in value)
+    if type(value) is list:
+        return [_resolve(item, writter, objects) for item in value]
+    if type(value) is dict:
+        return {key: _resolve(item, writter, objects) for key, item in value.items()}
+    return value
+
+
+def merge_job(writter: Writter, result: JobResult) -> None:
+    """Adds the strings, calls and worksheet parts of ``result`` to ``writter``."""
+    wb = writter.wb
+    str_table = wb.str_table
+    count = str_table.count
+    strings = [str_table._get_shared_string_index(string) for string in result.strings]
+
+    objects = {}
+    for target, name, args, kwargs, ref in result.calls:
+        args = _resolve(args, writter, objects)
+        kwargs = _resolve(kwargs, writter, objects)
+        if target == BOOK:
+            method = writter.add_format if name == "add_format" else getattr(wb, name)
+        else:
+            method = getattr(_resolve(target, writter, objects), name)
+        value = method(*args, **kwargs)
+        if ref is not None:
+            objects[ref] = value
+
+    # Replayed calls such as add_table() write their headers again.
+    str_table.count = count + result.string_count
+    dxf = [wb.dxf_format_indices[key] for key in result.dxf_keys]
+
+    for name, part in result.parts.items():
+        part.xf_keys, part.strings, part.dxf = result.xf_keys, strings, dxf
+        worksheet = wb.get_worksheet_by_name(name)
+        worksheet.external_hyper_links = part.hyperlinks
+        worksheet.has_dynamic_arrays = part.dynamic_arrays
+        (
+            worksheet.dim_rowmin, worksheet.dim_rowmax,
+            worksheet.dim_colmin, worksheet.dim_colmax,
+        ) = part.dimensions
+        wb.sheet_parts[name] = part
+    wb.range_data.update(result.range_data)
+
+
+def _check_jobs(writter: Writter, jobs: list[SheetJob]) -> None:
+    if writter.constant_memory or writter.part_cache is not None or writter.dedupe_sources:
+        msg = "Worksheets can't be rendered in workers with constant_memory, "
+        msg += "part_cache or dedupe_sources."
+        raise ValueError(msg)
+
+    seen = set()
+    for job in jobs:
+        if job.worksheet in seen:
+            raise ValueError(f"Worksheet '{job.worksheet}' has several jobs.")
+        seen.add(job.worksheet)
+
+        worksheet = writter.wb.get_worksheet_by_name(job.worksheet)
+        if worksheet is None:
+            raise ValueError(f"Unknown worksheet: '{job.worksheet}'")
+        if job.worksheet in writter._owners:
+            msg = f"Worksheet '{job.worksheet}' belongs to a sheet builder."
+            raise ValueError(msg)
+        if (
+            worksheet.dim_rowmax is not None or worksheet.charts or worksheet.tables
+            or worksheet.images or worksheet.cond_formats
+        ):
+            msg = f"Worksheet '{job.worksheet}' must be empty to be rendered in a worker."
+            raise ValueError(msg)
+
+
+def render_sheets(
+        writter: Writter,
+        jobs: list[SheetJob],
+        workers: Optional[int] = None,
+        ) -> list[JobResult]:
+    """Renders the worksheets of ``jobs`` in a process pool.
+
+    Parameters
+    ----------
+    writter : Writter
+        Workbook the rendered worksheets are merged into.
+    jobs : list[SheetJob]
+        One job per worksheet, each worksheet empty.
+    workers : int | None
+        Number of worker processes, defaults to ``os.cpu_count()``. With
+        ``workers=1`` jobs run one after the other in this process, still
+        rendered apart from ``writter``.
+
+    Returns
+    -------
+    list[JobResult]
+        The merged results, in the order of the worksheets.
+
+    Raises
+    ------
+    ValueError
+        If a worksheet is unknown, not empty, has several jobs or belongs to
+        a sheet builder, if two jobs create the same sheet, or with
+        ``constant_memory``, ``part_cache`` or ``dedupe_sources``.
+    """
+    jobs = list(jobs)
+    _check_jobs(writter, jobs)
+    order = {sheet.name: position for position, sheet in enumerate(writter.wb.worksheets())}
+    jobs.sort(key=lambda job: order[job.worksheet])
+    sheet_names = list(order)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    with writter.instrument.span("parallel.render"):
+        if workers == 1:
+            results = [render_job(job, sheet_names) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(render_job, jobs, repeat(sheet_names)))
+
+    created = set()
+    for job, result in zip(jobs, results):
+        for name in result.created:
+            if name in created or name in order:
+                msg = f"Worksheet '{name}' created by the job of '{job.worksheet}' "
+                msg += "already exists."
+                raise ValueError(msg)
+            created.add(name)
+
+    with writter.instrument.span("parallel.merge"):
+        ExcelWorkbook.adopt(writter.wb, writter)
+        for result in results:
+            merge_job(writter, result)
+    return results
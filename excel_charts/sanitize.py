@@ -0,0 +1,175 @@
+"""sanitize.py
+
+Handling of missing and non-finite values before cells are written.
+
+xlsxwriter raises on NaN and inf unless the workbook converts them to
+errors, and ``None``/``NaT`` go through ``Worksheet.write``'s per-cell type
+dispatch. With ``Table(sanitize=...)`` every column is masked once with
+NumPy (``isnan``/``isfinite``, ``isna`` for other dtypes) and the masked
+cells are written in bulk according to a ``MissingPolicy``. The remaining
+values are written with the column's typed writer, so the per-cell loop
+never sees a missing value.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from xlsxwriter.format import Format
+from xlsxwriter.worksheet import Worksheet
+
+NA_FORMULA = "=NA()"
+
+
+class NotAvailable:
+    """Placeholder of an ``#N/A`` cell in row-wise writes, see ``Sanitize.fill``."""
+
+    def __repr__(self) -> str:
+        return "NA"
+
+
+NA = NotAvailable()
+
+
+def _write_na(ws: Worksheet, row: int, col: int, _, cell_format=None):
+    return ws.write_formula(row, col, NA_FORMULA, cell_format, "#N/A")
+
+
+class MissingPolicy(str, Enum):
+    """What a missing or non-finite value is written as."""
+    BLANK = "blank"
+    NA = "na"
+    ZERO = "zero"
+    SENTINEL = "sentinel"
+
+
+@dataclass
+class Sanitize:
+    """Missing value policy of a ``Table``.
+
+    Attributes
+    ----------
+    policy : MissingPolicy
+        ``BLANK`` leaves the cell empty (formatted if the column is),
+        ``NA`` writes ``=NA()`` (``#N/A``, skipped by line charts), ``ZERO``
+        writes 0 and ``SENTINEL`` writes ``sentinel``.
+    sentinel : Any
+        Value written with ``MissingPolicy.SENTINEL``.
+    """
+    policy: MissingPolicy = MissingPolicy.BLANK
+    sentinel: Any = None
+
+    def __post_init__(self):
+        self.policy = MissingPolicy(self.policy)
+        if self.policy == MissingPolicy.SENTINEL and self.sentinel is None:
+            msg = "MissingPolicy.SENTINEL needs a sentinel value."
+            raise ValueError(msg)
+
+    @classmethod
+    def coerce(cls, value: Optional[Sanitize | MissingPolicy | str]) -> Optional[Sanitize]:
+        """Accepts a ``Sanitize``, a policy or its name."""
+        if value is None or isinstance(value, Sanitize):
+            return value
+        return cls(MissingPolicy(value))
+
+    @property
+    def token(self) -> Any:
+        """The value a missing cell is replaced with in row-wise writes."""
+        if self.policy == MissingPolicy.NA:
+            return NA
+        if self.policy == MissingPolicy.ZERO:
+            return 0
+        if self.policy == MissingPolicy.SENTINEL:
+            return self.sentinel
+        return None
+
+    def write_missing(
+            self,
+            ws: Worksheet,
+            rows: np.ndarray,
+            col: int,
+            cell_format: Optional[Format] = None,
+            ) -> None:
+        """Writes the policy value at every row of ``rows`` in ``col``."""
+        if self.policy == MissingPolicy.BLANK:
+            # Unformatted blanks are not stored by xlsxwriter at all.
+            if cell_format is None:
+                return
+            for row in rows.tolist():
+                ws.write_blank(row, col, None, cell_format)
+        elif self.policy == MissingPolicy.NA:
+            for row in rows.tolist():
+                _write_na(ws, row, col, NA, cell_format)
+        else:
+            token = self.token
+            for row in rows.tolist():
+                ws.write(row, col, token, cell_format)
+
+    def fill(self, data: pd.DataFrame, ws: Worksheet) -> pd.DataFrame:
+        """
+        Returns ``data`` with missing values replaced by ``token``.
+
+        Used by the row-wise writes (``constant_memory``, ``WriteEngine.CELL``)
+        where cells of a row are written together. Only the columns holding
+        missing values are replaced. ``ws.write`` learns to write the ``NA``
+        placeholder.
+        """
+        from excel_charts.frames import ArrowFrame
+
+        if self.policy == MissingPolicy.NA:
+            ws.add_write_handler(NotAvailable, _write_na)
+
+        if isinstance(data, ArrowFrame):
+            masks = [missing_mask(values) for _, values in data.items()]
+            if not any(mask.any() for mask in masks):
+                return data
+            data = data.table.to_pandas()
+
+        replaced = {}
+        for position, (name, values) in enumerate(data.items()):
+            mask = missing_mask(values)
+            if mask.any():
+                replaced[position] = values.astype(object).where(~mask, self.token)
+        if not replaced:
+            return data
+
+        data = data.copy(deep=False)
+        for position, values in replaced.items():
+            data.isetitem(position, values)
+        return data
+
+
+def is_missing(value: Any) -> bool:
+    """Whether a single value is missing (None, NaN, NaT, NA) or infinite."""
+    if isinstance(value, (float, np.floating)):
+        return not np.isfinite(value)
+    return value is None or (pd.api.types.is_scalar(value) and bool(pd.isna(value)))
+
+
+def missing_mask(values) -> np.ndarray:
+    """Boolean mask of the missing (None, NaN, NaT) and infinite values."""
+    if not isinstance(values, pd.Series):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        mask = values.is_null()
+        if pa.types.is_floating(values.type):
+            mask = pc.or_(mask, pc.invert(pc.is_finite(values)))
+        return mask.to_numpy(zero_copy_only=False).astype(bool, copy=False)
+
+    dtype = values.dtype
+    if pd.api.types.is_float_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return ~np.isfinite(values.to_numpy())
+    if pd.api.types.is_bool_dtype(dtype) or (
+        pd.api.types.is_integer_dtype(dtype)
+        and not isinstance(dtype, pd.api.extensions.ExtensionDtype)
+    ):
+        return np.zeros(len(values), dtype=bool)
+
+    mask = values.isna().to_numpy(dtype=bool)
+    if dtype == object:
+        mask = mask | values.isin([np.inf, -np.inf]).to_numpy()
+    return mask
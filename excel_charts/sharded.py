@@ -0,0 +1,192 @@
+"""sharded.py
+
+Tables larger than a worksheet.
+
+An xlsx worksheet holds 1,048,576 rows. A plain ``Table`` checks that limit
+before writing anything; a ``ShardedTable`` instead splits its rows into
+shards, one per sheet: the first on ``worksheet``, the next ones on
+numbered continuation sheets (``"Data (2)"``, ``"Data (3)"``...), each with
+its own header at the same position.
+
+Excel chart series and union references cannot span several sheets, so a
+chart cannot cover every shard. ``area_refs`` returns the range of a column
+on every shard, for formulas such as ``=SUM(...)``, and charts drawn from a
+sharded table are pointed at a summary of the whole data (downsampled or
+aggregated, see ``summary``) written on its own sheet. A table that fits in
+one shard is charted directly.
+
+Shards are written one after the other: xlsxwriter's shared string table
+and format indices are workbook-wide and not thread safe.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional
+
+from xlsxwriter.utility import quote_sheetname, xl_range_abs
+
+from excel_charts.aggregate import Aggregate
+from excel_charts.downsample import Downsample, downsample_indices
+from excel_charts.frames import rows, take
+from excel_charts.table import Table, WriteEngine, XLSX_MAX_ROWS, _is_styler
+
+SHEET_NAME_LENGTH = 31
+
+
+def sheet_name(worksheet: str, suffix: str) -> str:
+    """``worksheet`` followed by ``suffix``, shortened to a valid sheet name."""
+    return worksheet[:SHEET_NAME_LENGTH - len(suffix)] + suffix
+
+
+def continuation_sheet(worksheet: str, number: int) -> str:
+    """Name of the ``number``-th sheet of a table starting on ``worksheet``."""
+    return sheet_name(worksheet, f" ({number})")
+
+
+@dataclass(slots=True)
+class ShardedTable(Table):
+    """Table split across continuation sheets past the worksheet row limit.
+
+    Attributes
+    ----------
+    max_rows : int | None
+        Data rows per shard. Defaults to as many as fit below ``position``.
+    summary : Downsample | Aggregate | None
+        How the data charted from a multi-shard table is reduced. Defaults
+        to ``Downsample()``.
+    summary_sheet : str | None
+        Worksheet receiving the summary, created when missing. Defaults to
+        ``"<worksheet> summary"``.
+    shards : list[Table]
+        The written shards, in row order.
+    header_row : int | None
+        Row of the header of every shard, set once written.
+    summary_table : Table | None
+        The summary, written when there is more than one shard.
+    """
+    max_rows: Optional[int] = None
+    summary: Optional[Downsample | Aggregate] = None
+    summary_sheet: Optional[str] = None
+    shards: list = field(init=False, default_factory=list)
+    header_row: Optional[int] = field(init=False, default=None)
+    summary_table: Optional[Table] = field(init=False, default=None)
+
+    def __post_init__(self):
+        # Slotted dataclasses are rebuilt: no zero-argument super().
+        Table.__post_init__(self)
+
+        # Header row, plus one spare row: add_title() shifts the references
+        # of a table down by one.
+        fit = XLSX_MAX_ROWS - self.start_row - 2
+        if self.max_rows is None:
+            self.max_rows = fit
+        if not 0 < self.max_rows <= fit:
+            msg = f"max_rows must be between 1 and {fit:,} at {self.position}, "
+            msg += f"got {self.max_rows}."
+            raise ValueError(msg)
+
+    @property
+    def shard_count(self) -> int:
+        return max(1, -(-len(self.data) // self.max_rows))
+
+    def add_to_worksheet(
+            self,
+            as_table: bool = False,
+            add_title: bool = True,
+            engine: WriteEngine = WriteEngine.COLUMN,
+            ) -> None:
+        """Writes every shard, then the summary when there are several.
+
+        Each shard is a ``Table`` written with the same options. The
+        dimensions of the sharded table are those of its first shard.
+        """
+        if self.shards:
+            raise ValueError(f"Table '{self.name}' was already written.")
+        if self.shard_count > 1 and _is_styler(self.style):
+            msg = f"Table '{self.name}' has a pandas Styler, which can't be split "
+            msg += "across shards."
+            raise ValueError(msg)
+
+        # add_title() shifts start_row, not the cells.
+        self.header_row = self.start_row
+        for number in range(1, self.shard_count + 1):
+            start = (number - 1) * self.max_rows
+            if number == 1:
+                name, sheet = self.name, self.worksheet
+            else:
+                name, sheet = f"{self.name} {number}", continuation_sheet(self.worksheet, number)
+                if self.wb.get_worksheet_by_name(sheet) is None:
+                    self.wb.add_worksheet(sheet)
+
+            shard = Table(
+                name,
+                rows(self.data, start, start + self.max_rows),
+                self.writter or self.wb,
+                worksheet=sheet,
+                position=(self.start_row, self.start_col),
+                style=self.style,
+                sanitize=self.sanitize,
+            )
+            shard.add_to_worksheet(as_table=as_table, add_title=add_title, engine=engine)
+            self.shards.append(shard)
+
+        first = self.shards[0]
+        self.start_row, self.end_row = first.start_row, first.end_row
+        self.end_col, self._range = first.end_col, first._range
+        self.is_excel_table = first.is_excel_table
+
+        if len(self.shards) > 1:
+            self._write_summary()
+
+    def _write_summary(self) -> None:
+        """Writes the reduced data charted in place of the shards."""
+        summary = self.summary if self.summary is not None else Downsample()
+        if isinstance(summary, Aggregate):
+            data = summary.apply(self.data)
+        else:
+            value_cols = list(range(1, len(self.data.columns)))
+            data = take(self.data, downsample_indices(self.data, 0, value_cols, summary))
+
+        sheet = self.summary_sheet or sheet_name(self.worksheet, " summary")
+        ws = self.wb.get_worksheet_by_name(sheet)
+        if ws is None:
+            ws = self.wb.add_worksheet(sheet)
+        first_col = 0 if ws.dim_colmax is None else ws.dim_colmax + 2
+
+        self.summary_table = Table(
+            f"{self.name} summary",
+            data,
+            self.writter or self.wb,
+            worksheet=sheet,
+            position=(1, first_col),
+            style=None if _is_styler(self.style) else self.style,
+            sanitize=self.sanitize,
+        )
+        self.summary_table.add_to_worksheet()
+
+    @property
+    def chart_source(self) -> Table:
+        """The table charts read from: the only shard, or the summary."""
+        if not self.shards:
+            msg = f"Table '{self.name}' must be written before it is charted."
+            raise RuntimeError(msg)
+        return self.summary_table or self.shards[0]
+
+    def get_ref(self, col_offset: int = 0) -> list | str:
+        """Reference of a column of ``chart_source``, see ``area_refs``."""
+        return self.chart_source.get_ref(col_offset)
+
+    def area_refs(self, col_offset: int = 0) -> list[str]:
+        """
+        Returns the absolute range of a column on every shard.
+
+        ``",".join(table.area_refs(1))`` can be used as the arguments of
+        ``SUM``, ``COUNT``, ``MAX``... to cover the whole data.
+        """
+        col = self.start_col + col_offset
+        first = self.header_row + 1
+        return [
+            f"{quote_sheetname(shard.worksheet)}!"
+            f"{xl_range_abs(first, col, first + len(shard.data) - 1, col)}"
+            for shard in self.shards
+        ]
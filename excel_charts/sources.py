@@ -0,0 +1,106 @@
+"""sources.py
+
+Workbook-level registry of the data already written by Tables.
+
+When a ``Writter`` is created with ``dedupe_sources=True`` every Table hashes
+its DataFrame before writing it. A Table whose data (columns, dtypes and
+values) and write options (style, missing value policy, Excel table, title)
+match a Table already written becomes an alias of it: nothing is written
+and ``get_ref``/``get_category_ref`` return the existing range.
+"""
+
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def content_hash(data: pd.DataFrame) -> str:
+    """Returns a hash of the columns, dtypes and values of ``data``.
+
+    Values are hashed with ``pd.util.hash_pandas_object``, which works on
+    whole columns at once. The index is ignored since it is never written.
+    ``ArrowFrame`` data is hashed from its buffers, without a pandas copy.
+    """
+    import pandas as pd
+
+    from excel_charts.frames import ArrowFrame
+
+    if isinstance(data, ArrowFrame):
+        return data.content_hash()
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([str(col) for col in data.columns]).encode())
+    digest.update(repr([str(dtype) for dtype in data.dtypes]).encode())
+    digest.update(str(data.shape).encode())
+    if data.size:
+        rows = pd.util.hash_pandas_object(data, index=False)
+        digest.update(rows.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class SourceRegistry:
+    """Maps content hashes to the first Table written with that data.
+
+    Attributes
+    ----------
+    hits : int
+        Tables that reused an existing range.
+    cells_saved : int
+        Data cells that were not written again.
+    bytes_saved : int
+        In-memory size of the DataFrames that were not written again.
+    """
+    hits: int = 0
+    cells_saved: int = 0
+    bytes_saved: int = 0
+    _tables: dict = field(init=False, default_factory=dict, repr=False)
+
+    def lookup(self, key: str):
+        """Returns the Table registered under ``key``, if any."""
+        return self._tables.get(key)
+
+    def register(self, key: str, table) -> None:
+        self._tables.setdefault(key, table)
+
+    def record_hit(self, data: pd.DataFrame) -> None:
+        self.hits += 1
+        self.cells_saved += data.size
+        from excel_charts.frames import nbytes
+
+        self.bytes_saved += nbytes(data)
+
+    def report(self) -> dict:
+        """Returns the number of distinct sources and what was saved."""
+        return {
+            "sources": len(self._tables),
+            "hits": self.hits,
+            "cells_saved": self.cells_saved,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def find_alias(registry: Optional[SourceRegistry], data: pd.DataFrame, table, *options):
+    """Returns the Table already holding ``data`` or registers ``table``.
+
+    ``options`` are the settings changing how the data is written, e.g. the
+    style: a table only aliases a table written with the same ones. Their
+    ``repr`` is hashed, so a pandas Styler only matches itself.
+    """
+    if registry is None:
+        return None
+
+    key = content_hash(data)
+    if options:
+        key += hashlib.blake2b(repr(options).encode(), digest_size=16).hexdigest()
+    existing = registry.lookup(key)
+    if existing is None or existing is table:
+        registry.register(key, table)
+        return None
+
+    registry.record_hit(data)
+    return existing
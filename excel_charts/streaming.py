@@ -0,0 +1,159 @@
+"""streaming.py
+
+Row-ordered layout planner for ``constant_memory`` workbooks.
+
+In ``constant_memory`` mode xlsxwriter flushes a row to disk as soon as a
+later row is written, so every cell of a worksheet has to be written in
+strictly increasing row order. ``Table.add_to_worksheet`` writes the header,
+then the data column by column and finally the title *above* the header,
+which only works when the whole sheet is kept in memory.
+
+``SheetPlan`` collects every ``Table`` and chart placed on one worksheet,
+merges their title, header and data rows into a single row-ordered stream
+and writes it, then creates the charts.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from heapq import merge
+from operator import itemgetter
+
+from excel_charts.core import BaseChart
+from excel_charts.table import NULL_INSTRUMENT, Table
+
+
+class StreamingLayoutError(ValueError):
+    """Raised when a sheet layout cannot be written in row order."""
+
+
+@dataclass
+class SheetPlan:
+    """Collects the Tables and charts of a worksheet and writes them row by row.
+
+    Attributes
+    ----------
+    worksheet : str
+        Name of the worksheet the plan writes to.
+    tables : list
+        ``(table, add_title, as_table)`` entries in the order they were added.
+    charts : list
+        Charts created once every table has been written.
+    """
+    worksheet: str = "Sheet1"
+    tables: list = field(default_factory=list)
+    charts: list = field(default_factory=list)
+    flushed: bool = field(init=False, default=False)
+
+    def add(
+            self,
+            item: Table | BaseChart,
+            add_title: bool = True,
+            as_table: bool = False,
+            ) -> SheetPlan:
+        """
+        Adds a Table, or a chart and its source Table, to the plan.
+
+        ``add_title`` and ``as_table`` have the same meaning as in
+        ``Table.add_to_worksheet`` and only apply to tables.
+        """
+        if isinstance(item, Table):
+            if item.worksheet != self.worksheet:
+                msg = f"Table '{item.name}' is placed on '{item.worksheet}', "
+                msg += f"not on '{self.worksheet}'."
+                raise StreamingLayoutError(msg)
+            if not self._has_table(item):
+                self.tables.append((item, add_title, as_table))
+            return self
+
+        source = item.source
+        if source.worksheet == self.worksheet and not self._has_table(source):
+            self.tables.append((source, add_title, as_table))
+        self.charts.append(item)
+        return self
+
+    def _has_table(self, table: Table) -> bool:
+        return any(entry[0] is table for entry in self.tables)
+
+    def _bounds(self, table: Table, add_title: bool) -> tuple[int, int, int, int]:
+        """Returns (first_row, last_row, first_col, last_col) used by a table."""
+        rows, cols = table.data.shape
+        first_row = table.start_row - 1 if add_title else table.start_row
+        return (
+            first_row,
+            table.start_row + rows,
+            table.start_col,
+            table.start_col + max(cols, 1) - 1,
+        )
+
+    def validate(self) -> None:
+        """
+        Checks that the layout can be streamed.
+
+        Raises
+        ------
+        StreamingLayoutError
+            If the plan was already flushed, a table is registered as an Excel
+            table in ``constant_memory`` mode, a title falls above row 1, two
+            tables overlap or the sheet already flushed rows the plan needs.
+        """
+        if self.flushed:
+            raise StreamingLayoutError("The plan has already been flushed.")
+
+        bounds = []
+        for table, add_title, as_table in self.tables:
+            if as_table and table.wb.constant_memory:
+                msg = f"Table '{table.name}' cannot be an Excel table: "
+                msg += "add_table() isn't supported in constant_memory mode."
+                raise StreamingLayoutError(msg)
+
+            first_row, last_row, first_col, last_col = self._bounds(table, add_title)
+            if first_row < 0:
+                msg = f"Table '{table.name}' at {table.position} has no room "
+                msg += "for its title row. Move it down or use add_title=False."
+                raise StreamingLayoutError(msg)
+
+            if table.wb.constant_memory and first_row < table.ws.previous_row:
+                msg = f"Table '{table.name}' starts on row {first_row + 1}, "
+                msg += f"but rows up to {table.ws.previous_row + 1} of "
+                msg += f"'{self.worksheet}' were already flushed."
+                raise StreamingLayoutError(msg)
+
+            bounds.append((first_row, last_row, first_col, last_col, table.name))
+
+        bounds.sort()
+        for i, (top, bottom, left, right, name) in enumerate(bounds):
+            for other_top, _, other_left, other_right, other in bounds[i + 1:]:
+                if other_top > bottom:
+                    break
+                if other_left <= right and left <= other_right:
+                    msg = f"Tables '{name}' and '{other}' overlap on "
+                    msg += f"'{self.worksheet}'."
+                    raise StreamingLayoutError(msg)
+
+    def flush(self) -> None:
+        """Writes every table in row order, then creates the charts."""
+        self.validate()
+
+        instrument = self.tables[0][0].instrument if self.tables else NULL_INSTRUMENT
+        streams = [
+            table._iter_row_writes(add_title=add_title)
+            for table, add_title, _ in self.tables
+        ]
+        with instrument.span("plan.flush"):
+            for _, write in merge(*streams, key=itemgetter(0)):
+                write()
+        instrument.count("cells", sum(table.data.size for table, _, _ in self.tables))
+
+        for table, add_title, as_table in self.tables:
+            table.end_row = table.start_row + len(table.data.index)
+            table.end_col = table.start_col + len(table.data.columns) - 1
+            table._apply_compiled_style(cell_formats=False)
+            if as_table:
+                table.create_table(table.ws)
+            if add_title:
+                table._shift_for_title()
+
+        for chart in self.charts:
+            chart._create_chart()
+
+        self.flushed = True
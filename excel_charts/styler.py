@@ -0,0 +1,280 @@
+"""styler.py
+
+Compiles a pandas ``Styler`` into column formats and conditional formats.
+
+Writing a styled frame one format per cell creates as many formats as
+styled cells. ``compile_styler`` instead groups the CSS applied by the
+Styler:
+
+- the most common style of each column becomes that column's format and is
+  written with the data, one format per column;
+- every other style becomes one native ``conditional_format`` rule covering
+  all of its cells as a multi-range, whatever the column;
+- only the cells a conditional format cannot express (font name or size,
+  alignment, or a style that drops a property of its column format) keep a
+  format of their own.
+
+CSS is parsed with pandas' ``CSSToExcelConverter``, the converter behind
+``Styler.to_excel``, and its openpyxl style dict flattened into xlsxwriter
+properties with ``STYLE_MAPPING``, the mapping pandas' xlsxwriter writer
+uses, kept here since that writer is private. Reading the styles computed
+by the Styler goes through ``Styler._compute()`` and ``Styler.ctx``, which
+pandas has no public API for; ``compile_styler`` raises a ``RuntimeError``
+naming them if a pandas release drops them.
+"""
+
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+from pandas.io.formats.excel import CSSToExcelConverter
+from pandas.io.formats.style import Styler as pd_Styler
+
+# Properties a conditional format (dxf) can carry.
+CONDITIONAL_PROPERTIES = {
+    "font_color", "bold", "italic", "underline", "font_strikeout",
+    "font_script", "num_format", "bg_color", "fg_color", "pattern",
+    "border", "border_color", "top", "bottom", "left", "right",
+    "top_color", "bottom_color", "left_color", "right_color",
+}
+
+# Openpyxl style dict group -> (path of keys, xlsxwriter property). The
+# first path found wins, so the most specific paths come first.
+STYLE_MAPPING = {
+    "font": [
+        (("name",), "font_name"),
+        (("sz",), "font_size"),
+        (("size",), "font_size"),
+        (("color", "rgb"), "font_color"),
+        (("color",), "font_color"),
+        (("b",), "bold"),
+        (("bold",), "bold"),
+        (("i",), "italic"),
+        (("italic",), "italic"),
+        (("u",), "underline"),
+        (("underline",), "underline"),
+        (("strike",), "font_strikeout"),
+        (("vertAlign",), "font_script"),
+        (("vertalign",), "font_script"),
+    ],
+    "number_format": [(("format_code",), "num_format"), ((), "num_format")],
+    "protection": [(("locked",), "locked"), (("hidden",), "hidden")],
+    "alignment": [
+        (("horizontal",), "align"),
+        (("vertical",), "valign"),
+        (("text_rotation",), "rotation"),
+        (("wrap_text",), "text_wrap"),
+        (("indent",), "indent"),
+        (("shrink_to_fit",), "shrink"),
+    ],
+    "fill": [
+        (("patternType",), "pattern"),
+        (("patterntype",), "pattern"),
+        (("fill_type",), "pattern"),
+        (("start_color", "rgb"), "fg_color"),
+        (("fgColor", "rgb"), "fg_color"),
+        (("fgcolor", "rgb"), "fg_color"),
+        (("start_color",), "fg_color"),
+        (("fgColor",), "fg_color"),
+        (("fgcolor",), "fg_color"),
+        (("end_color", "rgb"), "bg_color"),
+        (("bgColor", "rgb"), "bg_color"),
+        (("bgcolor", "rgb"), "bg_color"),
+        (("end_color",), "bg_color"),
+        (("bgColor",), "bg_color"),
+        (("bgcolor",), "bg_color"),
+    ],
+    "border": [
+        (("color", "rgb"), "border_color"),
+        (("color",), "border_color"),
+        (("style",), "border"),
+        *(
+            entry
+            for side in ("top", "right", "bottom", "left")
+            for entry in (
+                ((side, "color", "rgb"), f"{side}_color"),
+                ((side, "color"), f"{side}_color"),
+                ((side, "style"), side),
+                ((side,), side),
+            )
+        ),
+    ],
+}
+
+BORDER_STYLES = [
+    "none", "thin", "medium", "dashed", "dotted", "thick", "double", "hair",
+    "mediumDashed", "dashDot", "mediumDashDot", "dashDotDot",
+    "mediumDashDotDot", "slantDashDot",
+]
+FONT_SCRIPTS = ["baseline", "superscript", "subscript"]
+UNDERLINES = {
+    "none": 0, "single": 1, "double": 2,
+    "singleAccounting": 33, "doubleAccounting": 34,
+}
+
+
+@dataclass
+class CompiledStyle:
+    """Styler styles grouped into the smallest set of Excel formats.
+
+    Positions are relative to the data: row 0 is the first data row and
+    column 0 the first column of the frame.
+
+    Attributes
+    ----------
+    col_formats : dict
+        Column position -> format properties applied to the whole column.
+    rules : list
+        ``(ranges, properties)`` pairs, one conditional format per style.
+        ``ranges`` are ``(first_row, first_col, last_row, last_col)`` tuples.
+    cell_formats : dict
+        (row, column) -> format properties for cells no rule can express.
+    """
+    col_formats: dict = field(default_factory=dict)
+    rules: list = field(default_factory=list)
+    cell_formats: dict = field(default_factory=dict)
+
+
+def css_to_format(css: str, converter: CSSToExcelConverter) -> dict:
+    """Converts CSS declarations into xlsxwriter format properties."""
+    if not css:
+        return {}
+    return excel_properties(converter(css))
+
+
+def excel_properties(style: dict) -> dict:
+    """Flattens an openpyxl style dict into xlsxwriter format properties."""
+    if "borders" in style:
+        style = dict(style)
+        style["border"] = style.pop("borders")
+
+    properties = {}
+    for group, values in style.items():
+        for path, name in STYLE_MAPPING.get(group, []):
+            if name in properties:
+                continue
+            value = values
+            for key in path:
+                try:
+                    value = value[key]
+                except (KeyError, TypeError):
+                    break
+            else:
+                properties[name] = value
+
+    if isinstance(properties.get("pattern"), str):
+        properties["pattern"] = 0 if properties["pattern"] == "none" else 1
+    for side in ("border", "top", "right", "bottom", "left"):
+        if isinstance(properties.get(side), str):
+            style_name = properties[side]
+            properties[side] = (
+                BORDER_STYLES.index(style_name) if style_name in BORDER_STYLES else 2
+            )
+    if isinstance(properties.get("font_script"), str):
+        properties["font_script"] = FONT_SCRIPTS.index(properties["font_script"])
+    if isinstance(properties.get("underline"), str):
+        properties["underline"] = UNDERLINES[properties["underline"]]
+    if properties.get("valign") == "center":
+        properties["valign"] = "vcenter"
+    return properties
+
+
+def styled_cells(styler: pd_Styler) -> dict:
+    """
+    Returns the CSS declarations the Styler applies, by (row, column).
+
+    Raises
+    ------
+    RuntimeError
+        If the installed pandas no longer exposes ``Styler._compute()`` and
+        ``Styler.ctx``.
+    """
+    try:
+        styler._compute()
+        ctx = styler.ctx
+    except AttributeError as error:
+        msg = "Can't read the styles of a pandas Styler: this pandas release "
+        msg += "has no Styler._compute() or Styler.ctx. Pass a Style instead, "
+        msg += "or write the frame with Styler.to_excel()."
+        raise RuntimeError(msg) from error
+    return ctx
+
+
+def to_conditional(properties: dict) -> dict:
+    """Adapts cell format properties to a conditional format.
+
+    A solid fill is given by ``bg_color`` in a conditional format, while
+    cell formats use ``fg_color`` with ``pattern: 1``.
+    """
+    properties = dict(properties)
+    if properties.get("pattern") == 1 and "fg_color" in properties:
+        properties["bg_color"] = properties.pop("fg_color")
+        properties.pop("pattern")
+    return properties
+
+
+def _runs(rows: np.ndarray) -> list[tuple[int, int]]:
+    """Splits sorted row positions into (first, last) runs of consecutive rows."""
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    return [(int(run[0]), int(run[-1])) for run in np.split(rows, breaks)]
+
+
+def compile_styler(styler: pd_Styler) -> CompiledStyle:
+    """Compiles the styles applied by ``styler`` on its data cells."""
+    ctx = styled_cells(styler)
+    converter = CSSToExcelConverter()
+    n_rows, n_cols = styler.data.shape
+
+    # Column -> style -> rows, with CSS joined in order so later
+    # declarations win like in the browser.
+    by_column = defaultdict(lambda: defaultdict(list))
+    for (row, col), declarations in ctx.items():
+        if row >= n_rows or col >= n_cols or not declarations:
+            continue
+        css = "; ".join(f"{prop}: {value}" for prop, value in declarations)
+        by_column[col][css].append(row)
+
+    compiled = CompiledStyle()
+    properties = {}
+    rule_ranges = defaultdict(list)
+
+    for col, styles in by_column.items():
+        counts = {css: len(rows) for css, rows in styles.items()}
+        unstyled = n_rows - sum(counts.values())
+        base_css = max(counts, key=counts.get)
+        if unstyled >= counts[base_css]:
+            base_css = ""
+
+        base = properties.setdefault(base_css, css_to_format(base_css, converter))
+        if base:
+            compiled.col_formats[col] = base
+
+        # Unstyled cells of a column with a base format are written as
+        # exceptions too, with no properties of their own.
+        if base_css and unstyled:
+            styled = np.concatenate([np.asarray(r) for r in styles.values()])
+            styles = dict(styles)
+            styles[""] = np.setdiff1d(np.arange(n_rows), styled).tolist()
+
+        for css, rows in styles.items():
+            if css == base_css:
+                continue
+            exception = properties.setdefault(css, css_to_format(css, converter))
+            rows = np.sort(np.asarray(rows))
+
+            conditional = (
+                exception.keys() <= CONDITIONAL_PROPERTIES
+                and base.keys() <= exception.keys()
+            )
+            if conditional:
+                for first, last in _runs(rows):
+                    rule_ranges[css].append((first, col, last, col))
+            else:
+                for row in rows.tolist():
+                    compiled.cell_formats[(row, col)] = exception
+
+    for css, ranges in rule_ranges.items():
+        compiled.rules.append((ranges, to_conditional(properties[css])))
+
+    return compiled
@@ -2,17 +2,33 @@ from __future__ import annotations
 
 from copy import copy
 from dataclasses import dataclass, field
-from typing import Union, Optional, Literal
+from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Iterator, Union, Optional, Literal
 from pathlib import Path
+import sys
 import xlsxwriter
+import numpy as np
 import pandas as pd
-from pandas.io.formats.style import Styler as pd_Styler
 
+from xlsxwriter.format import Format
 from xlsxwriter.worksheet import Worksheet
 
 
+from excel_charts.aggregate import Aggregate
+from excel_charts.cache import string_indices
+from excel_charts.engine import column_writer, excel_serials, has_time, is_datetime, write_column
+from excel_charts.frames import ArrowFrame, as_frame, value
+from excel_charts.instrument import Instrument
+from excel_charts.sanitize import MissingPolicy, Sanitize, is_missing
+from excel_charts.sources import content_hash, find_alias
 from excel_charts.workbook import Writter
 
+if TYPE_CHECKING:
+    from pandas.io.formats.style import Styler as pd_Styler
+
+    from excel_charts.styler import CompiledStyle
+
 try:
     from xlsxwriter.utility import xl_cell_to_rowcol, xl_range
 except ImportError:
@@ -28,35 +44,85 @@ NUM_FORMATS = Literal[
     '$ #,##0.00,," M";[Rojo]-$ #,##0.00,," M"'
 ]
 
+NULL_INSTRUMENT = Instrument()
+
+# Shared formats of the datetime columns without a format of their own.
+DATE_FORMAT = "yyyy-mm-dd"
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+# Rows of an xlsx worksheet.
+XLSX_MAX_ROWS = 1_048_576
+
+TITLE_FORMAT = {
+    'bold': True,
+    'align': 'center',
+    'valign': 'vcenter'
+}
+
 @dataclass
 class Style:
     """
+    Attributes
+    ----------
+    main : str | None
+        Number format of every column.
+    by_col : dict | None
+        Format properties by column name.
+    date : str | None
+        Number format of the datetime columns not in ``by_col``. Defaults
+        to the workbook's ``default_date_format``, or ``DATE_FORMAT``
+        (``DATETIME_FORMAT`` for columns with a time of day).
     """
     main: Optional[str] = None
     by_col: Optional[dict] = None
     apply_to_index: bool = False
+    date: Optional[str] = None
 
-@dataclass
+class WriteEngine(str, Enum):
+    """How ``Table.add_to_worksheet`` writes the data cells."""
+    COLUMN = "column"
+    CELL = "cell"
+
+@dataclass(slots=True)
 class Table:
     """Represents the data source for a chart on a worksheet.
+
+    Tables are slotted and share the workbook of their ``Writter``, so
+    workbooks with thousands of small tables stay light. Subclasses are
+    declared with ``@dataclass(slots=True)`` too: the fields set with
+    ``field(init=False, default=...)`` are only initialized by a slotted
+    dataclass ``__init__``.
     
     Attributes
     ----------
     data : pd.DataFrame
-        The data source.
+        The data source. A pandas Styler, a ``pyarrow.Table``/``RecordBatch``
+        or a ``polars.DataFrame`` are accepted too; Arrow and Polars data are
+        written from their buffers through an ``ArrowFrame``.
     sheet : str | None
         Name of the sheet where data will be written. If None, it will be inferred.
-    position : str
-        The starting cell position for the data (e.g., "A1").
+    position : str | tuple[int, int]
+        The starting cell position for the data (e.g., "A1"), or an already
+        parsed zero-indexed ``(row, col)`` pair.
+    aggregate : Aggregate | None
+        Group or resample ``data`` before writing it. ``data`` then holds
+        the aggregated rows and ``raw`` the original ones.
+        Can't be combined with a pandas Styler, whose styles are computed on
+        the raw rows.
+    sanitize : Sanitize | MissingPolicy | str | None
+        How missing (None, NaN, NaT) and infinite values are written. None
+        passes them to xlsxwriter as they are.
     """
     name: str
-    data: pd.DataFrame | pd_Styler
+    data: pd.DataFrame | pd_Styler | ArrowFrame
     wb: Writter | Workbook
     worksheet: str = "Sheet1"
-    position: str = "A1"
+    position: str | tuple[int, int] = "A1"
     file: Optional[str | Path] = None
     index: Optional[str | list[str]] = None
     style: Optional[pd_Styler | dict | str | Style] = None
+    aggregate: Optional[Aggregate] = None
+    sanitize: Optional[Sanitize | MissingPolicy | str] = None
     ws: Worksheet = field(init=False)
     excel_name: str = field(init=False)
     # Internal state after adding to workbook
@@ -66,20 +132,39 @@ class Table:
     end_col: int = field(init=False, default=0)
     _range: str = field(init=False, default="")
     is_excel_table: bool = field(init=False, default=False)
-    
+    writter: Optional[Writter] = field(init=False, default=None)
+    alias_of: Optional[Table] = field(init=False, default=None)
+    compiled_style: Optional[CompiledStyle] = field(init=False, default=None, repr=False)
+    _column_index: Optional[tuple] = field(init=False, default=None, repr=False)
+    _date_formats: Optional[dict] = field(init=False, default=None, repr=False)
+    raw: Optional[pd.DataFrame | ArrowFrame] = field(init=False, default=None, repr=False)
+    raw_table: Optional[Table] = field(init=False, default=None, repr=False)
+
     def __post_init__(self):
+        if _is_styler(self.data):
+            if self.style is None:
+                self.style = copy(self.data)
+            self.data = self.data.data
+        self.data = as_frame(self.data)
+        self.sanitize = Sanitize.coerce(self.sanitize)
+        if self.aggregate is not None:
+            if _is_styler(self.style):
+                msg = f"Table '{self.name}' can't combine a pandas Styler with aggregate: "
+                msg += "the Styler applies to the raw rows. Style the aggregated "
+                msg += "frame instead."
+                raise ValueError(msg)
+            self.raw = self.data
+            self.data = self.aggregate.apply(self.raw)
+
         self.set_dimensions()
 
         if self.index is None:
             self.index = self.data.columns[0]
-
-        if self.style is None and isinstance(self.data, pd_Styler):
-            self.style = copy(self.data)
-            self.data = self.data.data
         
         # print(type(self.wb))
         if isinstance(self.wb, Writter):
-            self.wb = copy(self.wb.wb)
+            self.writter = self.wb
+            self.wb = self.wb.wb
             # print(type(self.wb))
         
         self.ws = self.wb.get_worksheet_by_name(self.worksheet)
@@ -89,27 +174,174 @@ class Table:
             self,
             as_table: bool = False,
             add_title: bool = True,
+            engine: WriteEngine = WriteEngine.COLUMN,
             ) -> None:
-        """Writes the data to the workbook."""
+        """Writes the data to the workbook.
+
+        Parameters
+        ----------
+        as_table : bool
+            Register the written range as an Excel table.
+        add_title : bool
+            Add a merged title cell above the table.
+        engine : WriteEngine
+            ``COLUMN`` writes one column at a time with a typed writer.
+            ``CELL`` keeps the original per-cell ``write`` loop.
+            Ignored in ``constant_memory`` mode, where rows are streamed
+            in order through a ``SheetPlan``.
+
+        With ``Writter(dedupe_sources=True)``, a table whose data was
+        already written by another table, with the same style, ``sanitize``,
+        ``as_table`` and ``add_title``, writes nothing and reuses that range,
+        see ``alias_of``.
+        """
+        self._check_rows()
+        if self.aggregate is not None and self.aggregate.raw_sheet is not None:
+            self._write_raw()
+
+        sources = self.writter.sources if self.writter is not None else None
+        existing = find_alias(
+            sources, self.data, self,
+            self.style, self.sanitize, as_table, add_title,
+        )
+        if existing is not None:
+            self._alias(existing)
+            return
+
+        if self.wb.constant_memory:
+            from excel_charts.streaming import SheetPlan
+
+            plan = SheetPlan(self.worksheet)
+            plan.add(self, add_title=add_title, as_table=as_table)
+            plan.flush()
+            return
+
+        instrument = self.instrument
+
         # Write headers
         cols = {}
-        for col_num, value in enumerate(self.data.columns):
-            self.ws.write(self.start_row, self.start_col + col_num, value)
-            cols[col_num] = value
-        main_format = None
-        col_formats = {}
-        if isinstance(self.style, Style):
-            if isinstance(self.style.by_col, dict):
-                col_formats = {
-                    col: self.wb.add_format(_format) for col, _format in self.style.by_col.items()
-                }
-
-            if isinstance(self.style.main, str):
-                main_format = self.wb.add_format({'num_format': self.style.main})
+        with instrument.span("table.headers"):
+            for col_num, value in enumerate(self.data.columns):
+                self.ws.write(self.start_row, self.start_col + col_num, value)
+                cols[col_num] = value
+        with instrument.span("table.formats"):
+            main_format, col_formats = self._resolve_formats()
 
         # Write data
+        with instrument.span("table.cells"):
+            if engine == WriteEngine.COLUMN:
+                self._write_by_column(cols, main_format, col_formats)
+            else:
+                self._write_by_cell(cols, main_format, col_formats)
+        instrument.count("cells", self.data.size)
+
+        with instrument.span("table.formats"):
+            self._apply_compiled_style()
+
+        self.end_col = self.start_col + len(self.data.columns) - 1
+        
+        
+        if as_table:
+            with instrument.span("table.excel_table"):
+                self.create_table(self.ws)
+
+        if add_title:
+            with instrument.span("table.title"):
+                self.add_title()
+        # print(type(self.wb), type(self.ws), as_table)
+
+        self._record_inputs(self.data, as_table=as_table, add_title=add_title)
+        
+    def _check_rows(self, end_row: Optional[int] = None) -> None:
+        """Raises before writing anything if the data overflows the sheet.
+
+        ``end_row`` defaults to the last row of the table.
+        """
+        end_row = self.end_row if end_row is None else end_row
+        if end_row >= XLSX_MAX_ROWS:
+            msg = f"Table '{self.name}' needs {end_row + 1:,} rows, "
+            msg += f"more than the {XLSX_MAX_ROWS:,} of a worksheet. "
+            msg += "Use ShardedTable to split it across sheets."
+            raise ValueError(msg)
+
+    def _write_raw(self) -> None:
+        """Writes the rows before aggregation to ``aggregate.raw_sheet``."""
+        if self.raw_table is not None:
+            return
+
+        sheet = self.aggregate.raw_sheet
+        ws = self.wb.get_worksheet_by_name(sheet)
+        if ws is None:
+            ws = self.wb.add_worksheet(sheet)
+            if self.aggregate.hidden:
+                ws.hide()
+        first_col = 0 if ws.dim_colmax is None else ws.dim_colmax + 2
+
+        self.raw_table = Table(
+            f"{self.name} raw",
+            self.raw,
+            self.writter or self.wb,
+            worksheet=sheet,
+            position=(0, first_col),
+            sanitize=self.sanitize,
+        )
+        self.raw_table.add_to_worksheet(add_title=False)
+
+    def _record_inputs(self, data: pd.DataFrame, **options) -> None:
+        """Records the cells written from ``data`` for the ``Writter`` part cache."""
+        if self.writter is None or self.writter.part_cache is None:
+            return
+
+        style = self.compiled_style if self.compiled_style is not None else self.style
+        extra = [self.name, *data.columns]
+        if self.sanitize is not None and isinstance(self.sanitize.sentinel, str):
+            extra.append(self.sanitize.sentinel)
+        strings = string_indices(self.ws.str_table.string_table, data, extra)
+        self.writter.record(
+            self.worksheet, type(self).__name__, self.name, self.position,
+            content_hash(data), strings, repr(style), repr(self.sanitize), options,
+        )
+
+    def _alias(self, existing: Table) -> None:
+        """Points this table at the range already written by ``existing``."""
+        self.alias_of = existing
+        self.worksheet = existing.worksheet
+        self.ws = existing.ws
+        self.excel_name = existing.excel_name
+        self.is_excel_table = existing.is_excel_table
+        self.start_row, self.start_col = existing.start_row, existing.start_col
+        self.end_row, self.end_col = existing.end_row, existing.end_col
+        self._range = existing._range
+
+    def _write_by_column(
+            self,
+            cols: dict,
+            main_format: Optional[Format],
+            col_formats: dict,
+            ) -> None:
+        """Writes the data one column at a time, resolving its format once."""
+        first_row = self.start_row + 1
+        # items() is much cheaper than iloc[:, i] for short frames.
+        columns = (values for _, values in self.data.items())
+        for (col_idx, col_name), values in zip(cols.items(), columns):
+            cell_format = col_formats.get(col_name, main_format)
+            write_column(
+                self.ws, first_row, self.start_col + col_idx,
+                values, cell_format, self.sanitize
+            )
+
+        self.end_row = self.start_row + len(self.data.index)
+
+    def _write_by_cell(
+            self,
+            cols: dict,
+            main_format: Optional[Format],
+            col_formats: dict,
+            ) -> None:
+        """Writes the data cell by cell through ``Worksheet.write``."""
         self.end_row = self.start_row
-        for row_idx, row in enumerate(self.data.itertuples(index=False), start=1):
+        data = self._row_data(self.data)
+        for row_idx, row in enumerate(data.itertuples(index=False), start=1):
             current_row = self.start_row + row_idx
             self.end_row = current_row
 
@@ -124,17 +356,76 @@ class Table:
 
                 # print(col_name, cell_format)
                 self.ws.write(current_row, self.start_col + col_idx, value, cell_format)
-        
-        self.end_col = self.start_col + len(self.data.columns) - 1
-        
-        
-        if as_table:
-            self.create_table(self.ws)
+
+    def _iter_row_writes(
+            self,
+            add_title: bool = True,
+            ) -> Iterator[tuple[int, Callable]]:
+        """
+        Yields ``(row, write)`` pairs in strictly increasing row order.
+
+        Calling ``write()`` writes that whole row of the table (title, header
+        or data). Used by ``SheetPlan`` to interleave several tables in
+        ``constant_memory`` mode.
+        """
+        main_format, col_formats = self._resolve_formats()
+        cols = dict(enumerate(self.data.columns))
+        end_col = self.start_col + len(cols) - 1
 
         if add_title:
-            self.add_title()
-        # print(type(self.wb), type(self.ws), as_table)
-        
+            yield self.start_row - 1, partial(
+                self.ws.merge_range,
+                self.start_row - 1, self.start_col,
+                self.start_row - 1, end_col,
+                self.name,
+                self.add_format(TITLE_FORMAT)
+            )
+
+        yield self.start_row, partial(
+            self.ws.write_row, self.start_row, self.start_col, list(cols.values())
+        )
+
+        data = self._row_data(self.data)
+        writers = [
+            (
+                self.start_col + col_idx,
+                column_writer(self.ws, values) or self.ws.write,
+                col_formats.get(col_name, main_format),
+            )
+            for (col_idx, col_name), (_, values) in zip(cols.items(), data.items())
+        ]
+        overrides = {}
+        if self.compiled_style is not None:
+            for (row, col), properties in self.compiled_style.cell_formats.items():
+                overrides.setdefault(row, []).append((col, properties))
+
+        rows = data.itertuples(index=False, name=None)
+        for row_idx, values in enumerate(rows):
+            current_row = self.start_row + 1 + row_idx
+            yield current_row, partial(_write_row, current_row, values, writers)
+            for col, properties in overrides.get(row_idx, ()):
+                yield current_row, partial(self._write_cell_format, row_idx, col, properties)
+
+    def _row_data(self, data):
+        """
+        ``data`` as written by the row-wise writes: datetime columns as Excel
+        serial numbers and missing values replaced by ``sanitize``.
+        """
+        if isinstance(data, pd.DataFrame):
+            dates = [
+                position for position, (_, values) in enumerate(data.items())
+                if is_datetime(values) and (self.sanitize is not None or not values.hasnans)
+            ]
+            if dates:
+                data = data.copy(deep=False)
+                for position in dates:
+                    serials = excel_serials(data.iloc[:, position], self.ws.date_1904)
+                    data.isetitem(position, pd.Series(serials, index=data.index))
+
+        if self.sanitize is None:
+            return data
+        return self.sanitize.fill(data, self.ws)
+
     def get_ref(self, col_offset: int = 0) -> list | str:
         """Returns [sheet, start_row, col, end_row, col] for a specific column offset from start."""
         col = self.start_col + col_offset
@@ -161,11 +452,7 @@ class Table:
         Adds a merged title cell above the table and shifts the table down.
         """
         # 1. Merge the cells at the top (current start_row)
-        title_format = self.wb.add_format({
-            'bold': True,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
+        title_format = self.add_format(TITLE_FORMAT)
         
         self.ws.merge_range(
             self.start_row -1, self.start_col,
@@ -174,6 +461,10 @@ class Table:
             title_format
         )
         
+        self._shift_for_title()
+
+    def _shift_for_title(self) -> None:
+        """Shifts the table dimensions down by the title row."""
         # 2. Shift the table internal dimensions down by 1 row
         self.start_row += 1
         self.end_row += 1
@@ -184,7 +475,10 @@ class Table:
     def set_dimensions(self) -> None:
         """Sets start_row, start_col, end_row, end_col and _range."""
         try:
-            self.start_row, self.start_col = xl_cell_to_rowcol(self.position)
+            if isinstance(self.position, tuple):
+                self.start_row, self.start_col = self.position
+            else:
+                self.start_row, self.start_col = xl_cell_to_rowcol(self.position)
         except Exception:
             self.start_row, self.start_col = 0, 0
 
@@ -207,22 +501,159 @@ class Table:
             
         self._range = xl_range(self.start_row, self.start_col, self.end_row, self.end_col)
 
-    def create_table(self, ws: Optional[Worksheet]=None) -> None:
-        """Creates an Excel table with the data."""
-        # Resolve formats for table columns so they match the cells
+    def _columns(self) -> tuple[dict, dict]:
+        """Both column indexes, built on first use and when the columns change."""
+        columns = self.data.columns
+        if self._column_index is None or self._column_index[0] is not columns:
+            self._column_index = (
+                columns,
+                dict(enumerate(columns)),
+                {col: c for c, col in enumerate(columns)},
+            )
+        return self._column_index[1], self._column_index[2]
+
+    @property
+    def column_names(self) -> dict:
+        """Column names by position."""
+        return self._columns()[0]
+
+    @property
+    def column_positions(self) -> dict:
+        """Column positions by name."""
+        return self._columns()[1]
+
+    @property
+    def instrument(self) -> Instrument:
+        """The instrument of the ``Writter``, a no-op one for raw workbooks."""
+        if self.writter is not None:
+            return self.writter.instrument
+        return NULL_INSTRUMENT
+
+    def add_format(self, properties: Optional[dict] = None) -> Format:
+        """
+        Returns a Format for ``properties``.
+
+        Goes through the ``Writter`` format cache when the table was built
+        from one, otherwise creates the Format on the raw workbook.
+        """
+        if self.writter is not None:
+            return self.writter.add_format(properties)
+        return self.wb.add_format(properties)
+
+    def _resolve_formats(self) -> tuple[Optional[Format], dict]:
+        """Returns the main format and the formats by column from ``style``.
+
+        Datetime columns get their date format, merged into the column's
+        properties unless these set a ``num_format``.
+        """
         main_format = None
-        col_formats = {}
-        # Access the workbook to add formats. 
-        # Note: self._wb should be an xlsxwriter Workbook instance by now.
-        
+        col_properties = {}
+        if _is_styler(self.style):
+            if self.compiled_style is None:
+                from excel_charts.styler import compile_styler
+
+                self.compiled_style = compile_styler(self.style)
+            col_properties = {
+                self.data.columns[col]: _format
+                for col, _format in self.compiled_style.col_formats.items()
+            }
+
         if isinstance(self.style, Style):
             if isinstance(self.style.by_col, dict):
-                col_formats = {
-                    col: self.wb.add_format(_format) for col, _format in self.style.by_col.items()
-                }
+                col_properties = dict(self.style.by_col)
 
             if isinstance(self.style.main, str):
-                main_format = self.wb.add_format({'num_format': self.style.main})
+                main_format = self.add_format({'num_format': self.style.main})
+
+        self._date_formats = None
+        date_formats = self._date_num_formats()
+        col_formats = {}
+        for col, properties in col_properties.items():
+            position = self.column_positions.get(col)
+            if position in date_formats and 'num_format' not in properties:
+                properties = {**properties, 'num_format': date_formats[position]}
+            col_formats[col] = self.add_format(properties)
+
+        for position, num_format in date_formats.items():
+            col = self.data.columns[position]
+            if col not in col_formats:
+                col_formats[col] = self._date_format(num_format)
+
+        return main_format, col_formats
+
+    def _date_num_formats(self) -> dict:
+        """Number format of every datetime column, by position."""
+        if self._date_formats is None:
+            self._date_formats = {
+                position: self._date_num_format(values)
+                for position, (_, values) in enumerate(self.data.items())
+                if is_datetime(values)
+            }
+        return self._date_formats
+
+    def _date_num_format(self, values) -> str:
+        """Number format of the datetime column ``values``."""
+        if isinstance(self.style, Style) and self.style.date is not None:
+            return self.style.date
+        if self.ws.default_date_format is not None:
+            return self.ws.default_date_format.num_format
+        return DATETIME_FORMAT if has_time(values) else DATE_FORMAT
+
+    def _date_format(self, num_format: str) -> Format:
+        """Returns the format shared by the datetime columns with ``num_format``."""
+        default = self.ws.default_date_format
+        if default is not None and default.num_format == num_format:
+            return default
+        return self.add_format({'num_format': num_format})
+
+    def _apply_compiled_style(self, cell_formats: bool = True) -> None:
+        """
+        Adds the conditional formats compiled from a Styler and, unless
+        ``cell_formats`` is False, rewrites the cells that need a format of
+        their own. Must run before the title shifts the table down.
+        """
+        if self.compiled_style is None:
+            return
+
+        first_row = self.start_row + 1
+        for ranges, properties in self.compiled_style.rules:
+            cells = [
+                xl_range(first_row + r0, self.start_col + c0, first_row + r1, self.start_col + c1)
+                for r0, c0, r1, c1 in ranges
+            ]
+            r0, c0, r1, c1 = ranges[0]
+            self.ws.conditional_format(
+                first_row + r0, self.start_col + c0,
+                first_row + r1, self.start_col + c1,
+                {
+                    'type': 'formula',
+                    'criteria': 'TRUE',
+                    'format': self.add_format(properties),
+                    'multi_range': ' '.join(cells),
+                }
+            )
+
+        if cell_formats:
+            for (row, col), properties in self.compiled_style.cell_formats.items():
+                self._write_cell_format(row, col, properties)
+
+    def _write_cell_format(self, row: int, col: int, properties: dict) -> None:
+        """Rewrites one data cell with its own format, through ``sanitize``."""
+        cell = value(self.data, row, col)
+        num_format = self._date_num_formats().get(col)
+        if num_format is not None and 'num_format' not in properties:
+            properties = {**properties, 'num_format': num_format}
+        cell_format = self.add_format(properties)
+        row, col = self.start_row + 1 + row, self.start_col + col
+        if self.sanitize is not None and is_missing(cell):
+            self.sanitize.write_missing(self.ws, np.array([row]), col, cell_format)
+            return
+        self.ws.write(row, col, cell, cell_format)
+
+    def create_table(self, ws: Optional[Worksheet]=None) -> None:
+        """Creates an Excel table with the data."""
+        # Resolve formats for table columns so they match the cells
+        main_format, col_formats = self._resolve_formats()
 
         columns = []
         for col in self.data.columns:
@@ -247,3 +678,19 @@ class Table:
         
         ws.add_table(self._range, options)
         self.is_excel_table = True
+
+
+def _write_row(row: int, values: tuple, writers: list) -> None:
+    """Writes one data row with the per-column writers of a table."""
+    for (col, writer, cell_format), value in zip(writers, values):
+        writer(row, col, value, cell_format)
+
+
+def _is_styler(obj) -> bool:
+    """``isinstance(obj, Styler)`` without importing pandas' Styler module.
+
+    A Styler can only exist once its module is imported, so the module is
+    looked up in ``sys.modules`` instead of being imported with ``Table``.
+    """
+    module = sys.modules.get("pandas.io.formats.style")
+    return module is not None and isinstance(obj, module.Styler)
@@ -0,0 +1,294 @@
+"""template.py
+
+Report layouts compiled once and rendered many times with new data.
+
+A ``ReportTemplate`` takes the same ``TableSpec``/``ChartSpec`` layout as
+``batch.ReportSpec``, from code or from a JSON document, and resolves
+everything that does not depend on the data up front:
+
+- table positions are parsed to ``(row, col)`` once;
+- chart kinds are resolved to their class and chart options are validated
+  against the tables of the layout;
+- axis options are converted to the dicts passed to xlsxwriter once;
+- when a table declares its columns, bound frames are checked against them.
+
+``render`` then only binds one DataFrame per table and writes the workbook.
+"""
+
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from excel_charts.batch import CHART_TYPES, ChartSpec, ReportSpec, TableSpec
+from excel_charts.core import Axis, ColorPalette
+from excel_charts.frames import as_frame
+from excel_charts.table import Style, Table
+from excel_charts.workbook import Writter
+
+try:
+    from xlsxwriter.utility import xl_cell_to_rowcol
+except ImportError:
+    def xl_cell_to_rowcol(cell_str):
+        return 0, 0
+
+# Chart options given as dicts in a JSON layout, and the class they become.
+OPTION_TYPES = {
+    "x_axis": Axis,
+    "y_axis": Axis,
+    "color_palette": ColorPalette,
+}
+
+
+@dataclass
+class CompiledAxis(Axis):
+    """``Axis`` whose ``to_dict`` result is computed once."""
+    _dict: dict = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._dict = Axis.to_dict(self)
+
+    @classmethod
+    def from_axis(cls, axis: Axis) -> CompiledAxis:
+        return cls(**{f.name: getattr(axis, f.name) for f in fields(Axis)})
+
+    def to_dict(self) -> dict:
+        return self._dict
+
+
+@dataclass
+class TablePlan:
+    """A ``TableSpec`` with its position parsed.
+
+    Attributes
+    ----------
+    spec : TableSpec
+        The table layout. Its ``data``, when given, only declares the columns.
+    cell : tuple[int, int]
+        Zero-indexed ``(row, col)`` of ``spec.position``.
+    columns : tuple | None
+        Columns every bound frame must have, in order. None accepts any.
+    """
+    spec: TableSpec
+    cell: tuple[int, int]
+    columns: Optional[tuple] = None
+
+
+@dataclass
+class ChartPlan:
+    """A ``ChartSpec`` resolved to its chart class and keyword arguments."""
+    spec: ChartSpec
+    chart_class: type
+    options: dict
+
+
+@dataclass
+class ReportTemplate:
+    """A workbook layout compiled for repeated renders.
+
+    Attributes
+    ----------
+    sheet_names : list
+        Worksheets of every rendered workbook.
+    tables : list[TablePlan]
+        Compiled tables, in writing order.
+    charts : list[ChartPlan]
+        Compiled charts, created after every table.
+    constant_memory : bool
+        Same as ``Writter.constant_memory``.
+    renders : int
+        Number of workbooks built from the template.
+    """
+    sheet_names: list[str]
+    tables: list[TablePlan] = field(default_factory=list)
+    charts: list[ChartPlan] = field(default_factory=list)
+    constant_memory: bool = False
+    renders: int = field(init=False, default=0)
+
+    @classmethod
+    def compile(
+            cls,
+            tables: list[TableSpec],
+            charts: Optional[list[ChartSpec]] = None,
+            sheet_names: Optional[list[str]] = None,
+            constant_memory: bool = False,
+            ) -> ReportTemplate:
+        """
+        Compiles a layout.
+
+        Raises
+        ------
+        ValueError
+            If a chart kind is unknown, a chart points to a missing table, a
+            table sits on a sheet that is not created or two tables share a
+            name.
+        """
+        sheet_names = list(sheet_names or ['Sheet1'])
+        template = cls(sheet_names, constant_memory=constant_memory)
+
+        for spec in tables:
+            if spec.worksheet not in sheet_names:
+                raise ValueError(f"Unknown worksheet: '{spec.worksheet}'")
+            if any(plan.spec.name == spec.name for plan in template.tables):
+                raise ValueError(f"Duplicated table: '{spec.name}'")
+
+            columns = None
+            if spec.data is not None:
+                columns = tuple(spec.data.columns)
+            template.tables.append(
+                TablePlan(spec, xl_cell_to_rowcol(spec.position), columns)
+            )
+
+        names = {plan.spec.name for plan in template.tables}
+        for spec in charts or []:
+            if spec.kind not in CHART_TYPES:
+                raise ValueError(f"Unknown chart kind: '{spec.kind}'")
+            if spec.table not in names:
+                raise ValueError(f"Unknown table: '{spec.table}'")
+
+            options = dict(spec.options)
+            for name in ("x_axis", "y_axis"):
+                if isinstance(options.get(name), Axis):
+                    options[name] = CompiledAxis.from_axis(options[name])
+            template.charts.append(ChartPlan(spec, CHART_TYPES[spec.kind], options))
+
+        return template
+
+    @classmethod
+    def from_spec(cls, spec: ReportSpec) -> ReportTemplate:
+        """Compiles the layout of a ``ReportSpec``, ignoring its file."""
+        return cls.compile(spec.tables, spec.charts, spec.sheet_names, spec.constant_memory)
+
+    @classmethod
+    def from_dict(cls, layout: dict) -> ReportTemplate:
+        """
+        Compiles a layout given as plain data, e.g. loaded from JSON.
+
+        Tables take the ``TableSpec`` fields plus an optional ``columns``
+        list; ``style`` is a dict of ``Style`` fields. Charts take the
+        ``ChartSpec`` fields; ``x_axis``, ``y_axis`` and ``color_palette``
+        options are dicts of their dataclass fields.
+        """
+        tables = []
+        for table in layout.get("tables", []):
+            table = dict(table)
+            columns = table.pop("columns", None)
+            if isinstance(table.get("style"), dict):
+                table["style"] = Style(**table["style"])
+            if columns is not None:
+                table["data"] = pd.DataFrame(columns=columns)
+            tables.append(TableSpec(**table))
+
+        charts = []
+        for chart in layout.get("charts", []):
+            options = dict(chart.get("options", {}))
+            for name, option_type in OPTION_TYPES.items():
+                if isinstance(options.get(name), dict):
+                    options[name] = option_type(**options[name])
+            charts.append(ChartSpec(chart["kind"], chart["table"], options))
+
+        return cls.compile(
+            tables,
+            charts,
+            layout.get("sheet_names"),
+            layout.get("constant_memory", False),
+        )
+
+    @classmethod
+    def from_json(cls, source: str | Path) -> ReportTemplate:
+        """Compiles a JSON layout, given as a path or as the document itself."""
+        if isinstance(source, Path) or os.path.exists(source):
+            with open(source) as f:
+                return cls.from_dict(json.load(f))
+        return cls.from_dict(json.loads(source))
+
+    def bind(self, data: dict[str, pd.DataFrame]) -> list[pd.DataFrame]:
+        """
+        Returns the frame of every table, in layout order.
+
+        Raises
+        ------
+        ValueError
+            If a table has no frame or a frame does not have the declared
+            columns.
+        """
+        frames = []
+        for plan in self.tables:
+            name = plan.spec.name
+            if name not in data:
+                raise ValueError(f"No data bound to table '{name}'.")
+
+            frame = as_frame(data[name])
+            if plan.columns is not None and tuple(frame.columns) != plan.columns:
+                msg = f"Table '{name}' expects columns {list(plan.columns)}, "
+                msg += f"got {list(frame.columns)}."
+                raise ValueError(msg)
+            frames.append(frame)
+        return frames
+
+    def build(self, wb: Writter, data: dict[str, pd.DataFrame]) -> dict[str, Table]:
+        """Writes the tables and charts of the layout into ``wb`` with ``data``."""
+        tables = {}
+        for plan, frame in zip(self.tables, self.bind(data)):
+            spec = plan.spec
+            table = Table(
+                spec.name,
+                frame,
+                wb,
+                worksheet=spec.worksheet,
+                position=plan.cell,
+                style=spec.style,
+            )
+            table.add_to_worksheet(as_table=spec.as_table, add_title=spec.add_title)
+            tables[spec.name] = table
+
+        for plan in self.charts:
+            plan.chart_class(tables[plan.spec.table], **plan.options)._create_chart()
+
+        self.renders += 1
+        return tables
+
+    def render(
+            self,
+            data: dict[str, pd.DataFrame],
+            file: Optional[str | Path] = None,
+            ) -> Optional[bytes]:
+        """
+        Builds and saves one workbook.
+
+        Returns the workbook bytes when ``file`` is None, otherwise None.
+        """
+        wb = Writter(
+            str(file) if file is not None else None,
+            sheet_names=list(self.sheet_names),
+            constant_memory=self.constant_memory,
+        )
+        self.build(wb, data)
+        buffer = wb.close()
+        return buffer.getvalue() if buffer is not None else None
+
+    def to_spec(self, data: dict[str, pd.DataFrame], file: str | Path) -> ReportSpec:
+        """Returns a ``ReportSpec`` rendering ``data``, e.g. for ``render_many``."""
+        tables = [
+            TableSpec(
+                plan.spec.name,
+                frame,
+                worksheet=plan.spec.worksheet,
+                position=plan.spec.position,
+                style=plan.spec.style,
+                as_table=plan.spec.as_table,
+                add_title=plan.spec.add_title,
+            )
+            for plan, frame in zip(self.tables, self.bind(data))
+        ]
+        return ReportSpec(
+            file,
+            sheet_names=list(self.sheet_names),
+            tables=tables,
+            charts=[plan.spec for plan in self.charts],
+            constant_memory=self.constant_memory,
+        )
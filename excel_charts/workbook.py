@@ -1,9 +1,97 @@
 from __future__ import annotations
+import hashlib
+import os
+import shutil
+import threading
 from dataclasses import dataclass, field
-from typing import Optional, List
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, Optional, List
 import xlsxwriter
+from xlsxwriter.format import Format
 from xlsxwriter.workbook import Workbook as XlsxWorkbook
 
+from excel_charts.cache import CachingPackager, PartCache
+from excel_charts.instrument import Instrument
+from excel_charts.package import Compression, ExcelPackager, ExcelWorkbook
+from excel_charts.sources import SourceRegistry
+
+if TYPE_CHECKING:
+    from excel_charts.builder import SheetBuilder
+
+
+def format_key(properties: Optional[dict] = None) -> tuple:
+    """
+    Normalizes format properties into a hashable key.
+
+    Properties set to None are dropped and the rest are sorted by name, so
+    ``{'bold': True, 'align': 'center'}`` and ``{'align': 'center', 'bold': 1}``
+    map to the same key.
+    """
+    if not properties:
+        return ()
+
+    def freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(v) for v in value)
+        return value
+
+    return tuple(
+        sorted((k, freeze(v)) for k, v in properties.items() if v is not None)
+    )
+
+
+@dataclass
+class FormatRegistry:
+    """
+    Interns xlsxwriter formats so equal properties share one Format object.
+
+    Attributes
+    ----------
+    wb : xlsxwriter.Workbook
+        Workbook that owns the formats.
+    hits : int
+        Number of requests answered from the cache.
+    misses : int
+        Number of requests that created a new Format.
+    instrument : Instrument
+        Receives a ``formats_created`` count on every miss.
+    """
+    wb: XlsxWorkbook
+    hits: int = 0
+    misses: int = 0
+    instrument: Instrument = field(default_factory=Instrument, repr=False)
+    _cache: dict = field(init=False, default_factory=dict, repr=False)
+
+    def get(self, properties: Optional[dict] = None) -> Format:
+        """
+        Returns the Format for ``properties``, creating it on first use.
+
+        The returned Format is shared, it must not be modified afterwards.
+        """
+        key = format_key(properties)
+        cell_format = self._cache.get(key)
+        if cell_format is not None:
+            self.hits += 1
+            return cell_format
+
+        self.misses += 1
+        self.instrument.count("formats_created")
+        cell_format = self.wb.add_format(
+            {k: v for k, v in (properties or {}).items() if v is not None}
+        )
+        self._cache[key] = cell_format
+        return cell_format
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        return {
+            "formats": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
 
 @dataclass
 class Writter:
@@ -12,24 +100,220 @@ class Writter:
     
     Attributes
     ----------
-    file : str
-        The file path where the workbook will be saved.
+    file : str | BinaryIO | None
+        The file path where the workbook will be saved, or a file-like
+        object. None writes the workbook to an in-memory ``BytesIO``.
     writer : xlsxwriter.Workbook
         The XlsxWriter Workbook instance.
+    formats : FormatRegistry
+        Workbook-wide cache of the formats handed out by ``add_format``.
+    constant_memory : bool
+        Open the workbook in xlsxwriter's ``constant_memory`` mode, which
+        flushes each row to disk once a later row is written. Tables on a
+        sheet must then be written in row order, see ``SheetPlan``.
+    instrument : Instrument
+        Receives the spans and counters of the build, e.g. a ``PhaseTimer``.
+    dedupe_sources : bool
+        Tables whose data matches a Table already written reuse its range
+        instead of writing the cells again. See ``sources.report()``.
+    in_memory : bool
+        Assemble the xlsx parts in memory instead of temporary files, using
+        xlsxwriter's ``in_memory`` option. Implied when ``file`` is None.
+    part_cache : PartCache | None
+        Reuse the worksheet and chart XML generated by earlier runs with the
+        same inputs. See ``cache.py`` and ``part_cache.report()``.
+    sheet_inputs : dict
+        Worksheet name -> digest of the inputs recorded by ``record``.
+    compression : Compression | None
+        Level and threads used to zip the workbook, e.g.
+        ``Compression.fast()`` or ``Compression.stored()``. None keeps
+        xlsxwriter's own zipping. See ``package.py``.
+    builders : dict
+        Worksheet name -> ``SheetBuilder`` returned by ``builder``, replayed
+        at ``close()``. See ``builder.py``.
     """
-    file: str
+    file: Optional[str | BinaryIO] = None
     wb: XlsxWorkbook = field(init=False)
     sheet_names: list[str] = field(default_factory=lambda: ['Sheet1'])
+    formats: FormatRegistry = field(init=False)
+    constant_memory: bool = False
+    instrument: Instrument = field(default_factory=Instrument)
+    dedupe_sources: bool = False
+    sources: Optional[SourceRegistry] = field(init=False, default=None)
+    in_memory: bool = False
+    part_cache: Optional[PartCache] = None
+    sheet_inputs: dict = field(init=False, default_factory=dict, repr=False)
+    compression: Optional[Compression] = None
+    builders: dict = field(init=False, default_factory=dict, repr=False)
+    _owners: dict = field(init=False, default_factory=dict, repr=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
 
     def __post_init__(self):
-        self.wb = xlsxwriter.Workbook(self.file)
+        if self.file is None:
+            self.file = BytesIO()
+            self.in_memory = True
+        if self.in_memory and self.constant_memory:
+            msg = "in_memory and constant_memory cannot be used together: "
+            msg += "constant_memory flushes rows to temporary files."
+            raise ValueError(msg)
+
+        if self.part_cache is not None or self.compression is not None:
+            packager_class = CachingPackager if self.part_cache is not None else ExcelPackager
+            self.wb = ExcelWorkbook(
+                self.file, self.options(), writter=self, packager_class=packager_class
+            )
+        else:
+            self.wb = xlsxwriter.Workbook(self.file, self.options())
+        self.formats = FormatRegistry(self.wb, instrument=self.instrument)
+        if self.dedupe_sources:
+            self.sources = SourceRegistry()
 
         for sheet_name in self.sheet_names:
             self.wb.add_worksheet(sheet_name)
             print(f"Adding {sheet_name=}")
 
-    def close(self) -> None:
+    def options(self) -> dict:
+        """
+        Returns the options passed to ``xlsxwriter.Workbook``.
+        """
+        options = {}
+        if self.constant_memory:
+            options['constant_memory'] = True
+        if self.in_memory:
+            options['in_memory'] = True
+        return options
+
+    def add_format(self, properties: Optional[dict] = None) -> Format:
         """
-        Saves and closes the workbook.
+        Returns a cached Format for ``properties``.
         """
-        self.wb.close()
+        return self.formats.get(properties)
+
+    def builder(self, worksheet: str) -> SheetBuilder:
+        """
+        Returns the ``SheetBuilder`` of ``worksheet``, creating it on first use.
+
+        Builders of different worksheets can be filled from different
+        threads. Their calls are replayed at ``close()`` in the order of the
+        worksheets, see ``builder.py``. Safe to call from any thread.
+
+        Raises
+        ------
+        ValueError
+            If the worksheet doesn't exist or belongs to another builder, or
+            with ``constant_memory``, ``part_cache`` or ``dedupe_sources``,
+            which need the cells of earlier sheets as they are written.
+        """
+        from excel_charts.builder import SheetBuilder
+
+        if self.constant_memory or self.part_cache is not None or self.dedupe_sources:
+            msg = "Sheet builders can't be used with constant_memory, "
+            msg += "part_cache or dedupe_sources."
+            raise ValueError(msg)
+
+        with self._lock:
+            builder = self.builders.get(worksheet)
+            if builder is None:
+                if worksheet in self._owners:
+                    msg = f"Worksheet '{worksheet}' belongs to the builder of "
+                    msg += f"'{self._owners[worksheet].worksheet}'."
+                    raise ValueError(msg)
+                if self.wb.get_worksheet_by_name(worksheet) is None:
+                    raise ValueError(f"Unknown worksheet: '{worksheet}'")
+                builder = SheetBuilder(self, worksheet)
+                self.builders[worksheet] = builder
+                self._owners[worksheet] = builder
+            return builder
+
+    def _claim(self, worksheet: str, builder: SheetBuilder, create: bool) -> bool:
+        """
+        Gives ``worksheet`` to ``builder``.
+
+        With ``create``, the sheet must not exist yet. Otherwise returns
+        whether it exists. Raises ValueError if another builder owns it.
+        """
+        with self._lock:
+            owner = self._owners.get(worksheet)
+            if owner is not None and owner is not builder:
+                msg = f"Worksheet '{worksheet}' belongs to the builder of "
+                msg += f"'{owner.worksheet}'."
+                raise ValueError(msg)
+
+            exists = owner is not None or self.wb.get_worksheet_by_name(worksheet) is not None
+            if create and exists:
+                raise ValueError(f"Worksheet '{worksheet}' already exists.")
+            if create or exists:
+                self._owners[worksheet] = builder
+            return exists
+
+    def _replay(self) -> None:
+        """Replays the sheet builders in the order of their worksheets."""
+        if not self.builders:
+            return
+        order = {sheet.name: position for position, sheet in enumerate(self.wb.worksheets())}
+        for name in sorted(self.builders, key=order.__getitem__):
+            self.builders[name].replay()
+
+    def record(self, worksheet: str, *inputs) -> None:
+        """
+        Adds ``inputs`` to the digest keying ``worksheet`` in the part cache.
+
+        Only sheets with recorded inputs are cached. Does nothing without a
+        ``part_cache``.
+        """
+        if self.part_cache is None:
+            return
+        digest = self.sheet_inputs.setdefault(worksheet, hashlib.blake2b(digest_size=16))
+        digest.update(repr(inputs).encode())
+
+    def close(self) -> Optional[BytesIO]:
+        """
+        Saves and closes the workbook, once the sheet builders are replayed.
+
+        Returns the buffer holding the workbook, rewound to its start, when
+        ``file`` is a file-like object, None when it is a path.
+        """
+        with self.instrument.span("writter.replay"):
+            self._replay()
+        with self.instrument.span("writter.close"):
+            self.wb.close()
+
+        if isinstance(self.file, (str, os.PathLike)):
+            self.instrument.count("bytes_out", os.path.getsize(self.file))
+            return None
+
+        if hasattr(self.file, "getbuffer"):
+            self.instrument.count("bytes_out", self.file.getbuffer().nbytes)
+        self.file.seek(0)
+        return self.file
+
+    def getvalue(self) -> bytes:
+        """
+        Returns the bytes of the closed workbook.
+        """
+        if isinstance(self.file, (str, os.PathLike)):
+            with open(self.file, "rb") as f:
+                return f.read()
+        return self.file.getvalue()
+
+    def stream_to(self, sink: BinaryIO, chunk_size: int = 64 * 1024) -> int:
+        """
+        Writes the closed workbook to ``sink`` in chunks of ``chunk_size``.
+
+        In-memory workbooks are sliced without copying the buffer. Returns
+        the number of bytes written.
+        """
+        if isinstance(self.file, (str, os.PathLike)):
+            with open(self.file, "rb") as f:
+                shutil.copyfileobj(f, sink, chunk_size)
+            return os.path.getsize(self.file)
+
+        if not hasattr(self.file, "getbuffer"):
+            self.file.seek(0)
+            shutil.copyfileobj(self.file, sink, chunk_size)
+            return self.file.tell()
+
+        with self.file.getbuffer() as view:
+            for start in range(0, len(view), chunk_size):
+                sink.write(view[start:start + chunk_size])
+            return len(view)
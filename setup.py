@@ -6,16 +6,23 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pandas>=1.3.0",
-        "xlsxwriter>=3.0.0",
+        "xlsxwriter>=3.0.0,<3.3",
     ],
     extras_require={
+        "arrow": [
+            "pyarrow>=12.0",
+        ],
+        "polars": [
+            "pyarrow>=12.0",
+            "polars>=0.20",
+        ],
         "dev": [
             "pytest>=7.0",
             "black>=22.0",
             "flake8>=4.0",
         ],
     },
-    python_requires=">=3.9",
+    python_requires=">=3.11",
     author="Edward T.L.",
     author_email="edward_tl@hotmail.com",
     description="Object-oriented Python library for creating Excel charts using xlsxwriter",
@@ -27,8 +34,6 @@ setup(
         "Intended Audience :: Developers",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.9",
-        "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
         "Programming Language :: Python :: 3.12",
         "Topic :: Office/Business :: Financial :: Spreadsheet",
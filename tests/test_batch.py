@@ -0,0 +1,79 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from excel_charts import batch
+from excel_charts.batch import ChartSpec, ReportSpec, TableSpec, iter_render, render_many
+
+DATA = pd.DataFrame({"day": range(20), "sales": [float(n % 7) for n in range(20)]})
+
+
+class WorkerKiller(str):
+    """A file name whose unpickling ends the worker process."""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def spec(path, chart_table: str = "Sales") -> ReportSpec:
+    return ReportSpec(
+        path,
+        sheet_names=["Data"],
+        tables=[TableSpec("Sales", DATA, worksheet="Data")],
+        charts=[ChartSpec("line", chart_table, {
+            "chart_position": "E2", "worksheet": "Data", "width": 480, "height": 288,
+        })],
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_jobs_are_isolated(tmp_path, workers):
+    jobs = [
+        spec(tmp_path / f"report{number}.xlsx", "Nowhere" if number == 2 else "Sales")
+        for number in range(5)
+    ]
+    results = render_many(jobs, workers=workers)
+
+    assert [result.index for result in results] == list(range(5))
+    assert [result.ok for result in results] == [True, True, False, True, True]
+    assert "Unknown table: 'Nowhere'" in results[2].error
+    # The half-written workbook is removed.
+    assert not os.path.exists(jobs[2].file)
+    for result in results[:2] + results[3:]:
+        assert result.bytes == os.path.getsize(result.file)
+        with zipfile.ZipFile(result.file) as archive:
+            assert "xl/charts/chart1.xml" in archive.namelist()
+
+
+def test_failing_jobs_are_retried(tmp_path, monkeypatch):
+    render_report = batch.render_report
+    calls = []
+
+    def flaky(job):
+        calls.append(job.file)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        return render_report(job)
+
+    monkeypatch.setattr(batch, "render_report", flaky)
+    [result] = render_many([spec(tmp_path / "report.xlsx")], workers=1, retries=2)
+
+    assert result.ok
+    assert result.attempts == 2
+    assert result.bytes > 0
+
+
+def test_jobs_go_on_after_a_worker_dies(tmp_path):
+    jobs = [spec(str(tmp_path / f"report{number}.xlsx")) for number in range(8)]
+    jobs[3].file = WorkerKiller(tmp_path / "killer.xlsx")
+
+    results = list(iter_render(jobs, workers=2, max_pending=2))
+
+    assert sorted(result.index for result in results) == list(range(8))
+    failed = {result.index for result in results if not result.ok}
+    # The dead worker breaks the pool: only the jobs pending with it fail.
+    assert 3 in failed
+    assert failed <= {2, 3, 4}
+    assert "BrokenProcessPool" in next(r.error for r in results if r.index == 3)
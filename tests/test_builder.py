@@ -0,0 +1,87 @@
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_charts import Aggregate, Line, Table, Writter
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def frame(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.date_range("2024-01-01", periods=240, freq="min"),
+        "sales": rng.random(240) * 1_000,
+    })
+
+
+FRAMES = {region: frame(seed) for seed, region in enumerate(REGIONS)}
+
+
+def build(sheet, region: str) -> None:
+    table = Table(
+        region, FRAMES[region], sheet, worksheet=region, position="A2",
+        aggregate=Aggregate(resample="h"), sanitize="blank",
+    )
+    table.add_to_worksheet()
+    Line(table, chart_position="E2", worksheet=region, width=480, height=288)._create_chart()
+
+
+def parts(buffer: io.BytesIO) -> dict:
+    with zipfile.ZipFile(buffer) as archive:
+        # core.xml holds the creation time.
+        return {
+            name: archive.read(name)
+            for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+def serial() -> dict:
+    wb = Writter(sheet_names=REGIONS)
+    for region in REGIONS:
+        build(wb, region)
+    return parts(wb.close())
+
+
+def test_threaded_builders_match_the_serial_workbook():
+    expected = serial()
+    for _ in range(3):
+        wb = Writter(sheet_names=REGIONS)
+        with ThreadPoolExecutor(4) as pool:
+            # Reversed: the replay follows the worksheets, not the threads.
+            list(pool.map(lambda region: build(wb.builder(region), region), REGIONS[::-1]))
+        assert parts(wb.close()) == expected
+
+
+def test_builders_are_replayed_once():
+    wb = Writter(sheet_names=REGIONS)
+    sheet = wb.builder("North")
+    assert wb.builder("North") is sheet
+    build(sheet, "North")
+    wb.close()
+
+    assert sheet.replayed
+    with pytest.raises(RuntimeError, match="already replayed"):
+        sheet.add_chart({"type": "line"})
+
+
+def test_sheets_belong_to_one_builder():
+    wb = Writter(sheet_names=REGIONS)
+    wb.builder("North").add_worksheet("North raw")
+
+    with pytest.raises(ValueError):
+        wb.builder("South").add_worksheet("North raw")
+    with pytest.raises(ValueError, match="Unknown worksheet"):
+        wb.builder("Nowhere")
+
+
+def test_constant_memory_is_refused(tmp_path):
+    wb = Writter(tmp_path / "streamed.xlsx", sheet_names=REGIONS, constant_memory=True)
+
+    with pytest.raises(ValueError, match="constant_memory"):
+        wb.builder("North")
+    wb.close()
@@ -0,0 +1,140 @@
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_charts import Line, Table, Writter
+from excel_charts.chunked import ChunkedTable
+from excel_charts.table import DATETIME_FORMAT
+
+DATA = pd.DataFrame({
+    "time": pd.date_range("2024-01-01 10:30", periods=10, freq="h"),
+    "sales": np.arange(10, dtype=float),
+    "units": np.arange(10),
+})
+
+
+def chunks(data: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    return [data.iloc[start:start + size] for start in range(0, len(data), size)]
+
+
+def sheet(wb: Writter) -> str:
+    with zipfile.ZipFile(wb.close()) as archive:
+        return archive.read("xl/worksheets/sheet1.xml").decode()
+
+
+def data_cells(xml: str, first_row: int) -> list[str]:
+    """The cells from ``first_row`` on, below the title and header strings."""
+    cells = re.finditer(r'<c r="[A-Z]+(\d+)"[^>]*?(?:/>|>.*?</c>)', xml)
+    return [cell.group(0) for cell in cells if int(cell.group(1)) >= first_row]
+
+
+def test_chunks_write_the_same_sheet_as_a_table():
+    table_wb = Writter(sheet_names=["Data"])
+    Table("Sales", DATA, table_wb, worksheet="Data", position="A2").add_to_worksheet()
+
+    chunked_wb = Writter(sheet_names=["Data"])
+    chunked = ChunkedTable("Sales", chunks(DATA, 3), chunked_wb, worksheet="Data", position="A2")
+    chunked.add_to_worksheet()
+
+    assert chunked.rows_written == 10
+    assert chunked.complete
+    # The title is written before the header: only the string indices differ.
+    assert data_cells(sheet(chunked_wb), 3) == data_cells(sheet(table_wb), 3)
+
+
+def test_datetime_format_comes_from_the_first_chunk():
+    wb = Writter(sheet_names=["Data"])
+    table = ChunkedTable("Sales", chunks(DATA, 4), wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+
+    assert table._date_formats == {0: DATETIME_FORMAT}
+    assert table.first_chunk is None
+
+
+def test_chunk_past_the_row_limit_raises_before_it_is_written():
+    wb = Writter(sheet_names=["Data"])
+    table = ChunkedTable(
+        "Sales", chunks(DATA, 4), wb, worksheet="Data", position="A1048568",
+    )
+
+    with pytest.raises(ValueError, match="1,048,576"):
+        table.add_to_worksheet(add_title=False)
+    # Header on the last 9 rows: two chunks of 4 fit.
+    assert table.rows_written == 8
+    assert not table.complete
+
+
+def test_bound_charts_are_created_after_the_last_chunk():
+    wb = Writter(sheet_names=["Data"])
+    table = ChunkedTable("Sales", chunks(DATA, 4), wb, worksheet="Data", position="A2")
+    chart = Line(table, chart_position="F2", worksheet="Data", width=480, height=288)
+
+    with pytest.raises(RuntimeError, match="bind"):
+        table.get_ref(1)
+    table.bind(chart)
+    assert wb.wb.charts == []
+
+    table.add_to_worksheet()
+    assert len(wb.wb.charts) == 1
+    assert table.get_ref(1)[3] == table.end_row
+
+
+def test_mismatched_chunk_columns_raise():
+    other = DATA.rename(columns={"units": "count"})
+    wb = Writter(sheet_names=["Data"])
+    table = ChunkedTable("Sales", [DATA, other], wb, worksheet="Data", position="A2")
+
+    with pytest.raises(ValueError, match="do not match"):
+        table.add_to_worksheet()
+
+
+def test_no_chunks_and_written_twice_raise():
+    wb = Writter(sheet_names=["Data"])
+    with pytest.raises(ValueError, match="no chunks"):
+        ChunkedTable("Sales", [], wb, worksheet="Data")
+
+    table = ChunkedTable("Sales", [DATA], wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+    with pytest.raises(ValueError, match="already written"):
+        table.add_to_worksheet()
+
+
+def test_from_csv_reads_by_chunks(tmp_path):
+    path = tmp_path / "sales.csv"
+    DATA.drop(columns="time").to_csv(path, index=False)
+
+    wb = Writter(sheet_names=["Data"])
+    table = ChunkedTable.from_csv("Sales", path, wb, chunksize=3, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+
+    assert table.rows_written == 10
+
+
+def test_constant_memory_matches_the_column_engine(tmp_path):
+    path = tmp_path / "streamed.xlsx"
+    streamed = Writter(path, sheet_names=["Data"], constant_memory=True)
+    ChunkedTable("Sales", chunks(DATA[["sales", "units"]], 3), streamed, worksheet="Data").add_to_worksheet(add_title=False)
+    streamed.close()
+
+    wb = Writter(sheet_names=["Data"])
+    ChunkedTable("Sales", chunks(DATA[["sales", "units"]], 3), wb, worksheet="Data").add_to_worksheet(add_title=False)
+
+    with zipfile.ZipFile(path) as archive:
+        xml = archive.read("xl/worksheets/sheet1.xml").decode()
+    # The header strings are inline in constant_memory mode.
+    assert data_cells(xml, 2) == data_cells(sheet(wb), 2)
+
+
+def test_arrow_record_batches():
+    pa = pytest.importorskip("pyarrow")
+    batches = pa.Table.from_pandas(DATA, preserve_index=False).to_batches(max_chunksize=4)
+
+    arrow_wb = Writter(sheet_names=["Data"])
+    ChunkedTable("Sales", batches, arrow_wb, worksheet="Data", position="A2").add_to_worksheet()
+    pandas_wb = Writter(sheet_names=["Data"])
+    ChunkedTable("Sales", chunks(DATA, 4), pandas_wb, worksheet="Data", position="A2").add_to_worksheet()
+
+    assert sheet(arrow_wb) == sheet(pandas_wb)
@@ -0,0 +1,62 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from excel_charts import package
+from excel_charts.package import Compression, write_archive
+
+PARTS = [
+    ("[Content_Types].xml", b"<Types/>"),
+    ("xl/worksheets/sheet1.xml", os.urandom(1000) * 300 + b"<row/>" * 100_000),
+    ("xl/media/image1.png", b""),
+]
+
+
+def read_back(target) -> dict:
+    with zipfile.ZipFile(target) as archive:
+        assert archive.testzip() is None
+        assert {info.date_time for info in archive.infolist()} == {package.TIMESTAMP}
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+@pytest.mark.parametrize("compression", [
+    Compression(),
+    Compression(level=1),
+    Compression.stored(),
+    Compression(threads=4, min_parallel_size=1024, chunk_size=64 * 1024),
+])
+def test_write_archive_round_trips(compression):
+    buffer = io.BytesIO()
+    write_archive(buffer, PARTS, compression)
+
+    assert read_back(buffer) == dict(PARTS)
+
+
+def test_parallel_chunks_match_serial_content(tmp_path):
+    serial, parallel = tmp_path / "serial.zip", tmp_path / "parallel.zip"
+    write_archive(serial, PARTS, Compression(level=6))
+    write_archive(
+        parallel, PARTS,
+        Compression(level=6, threads=4, min_parallel_size=1024, chunk_size=64 * 1024),
+    )
+
+    assert read_back(serial) == read_back(parallel)
+
+
+def test_zip64_records_are_readable(monkeypatch):
+    monkeypatch.setattr(package, "ZIP64_LIMIT", 100)
+    monkeypatch.setattr(package, "ZIP_FILECOUNT_LIMIT", 2)
+
+    buffer = io.BytesIO()
+    write_archive(buffer, PARTS, Compression())
+
+    assert read_back(buffer) == dict(PARTS)
+
+
+def test_zip64_needed_but_not_allowed(monkeypatch):
+    monkeypatch.setattr(package, "ZIP64_LIMIT", 100)
+
+    with pytest.raises(zipfile.LargeZipFile):
+        write_archive(io.BytesIO(), PARTS, Compression(), allow_zip64=False)
@@ -0,0 +1,77 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_charts import Line, SheetJob, Table, Writter, render_sheets
+
+REGIONS = ["North", "South", "East"]
+
+
+def frame(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.date_range("2024-01-01", periods=50, freq="h"),
+        "product": rng.choice(["alpha", "beta", "gamma"], 50),
+        "sales": rng.random(50) * 1_000,
+    })
+
+
+FRAMES = {region: frame(seed) for seed, region in enumerate(REGIONS)}
+
+
+# Module level: the jobs are pickled for the workers.
+def build(wb, region: str, data: pd.DataFrame) -> None:
+    table = Table(region, data, wb, worksheet=region, position="A2", sanitize="blank")
+    table.add_to_worksheet()
+    Line(table, chart_position="F2", worksheet=region, width=480, height=288)._create_chart()
+
+
+def parts(buffer: io.BytesIO) -> dict:
+    with zipfile.ZipFile(buffer) as archive:
+        # core.xml holds the creation time.
+        return {
+            name: archive.read(name)
+            for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+def serial() -> dict:
+    wb = Writter(sheet_names=REGIONS)
+    for region in REGIONS:
+        build(wb, region, FRAMES[region])
+    return parts(wb.close())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rendered_sheets_match_the_serial_workbook(workers):
+    jobs = [SheetJob(region, build, (region, FRAMES[region])) for region in REGIONS]
+    wb = Writter(sheet_names=REGIONS)
+    # Out of order: the results follow the worksheets.
+    results = render_sheets(wb, jobs[::-1], workers=workers)
+
+    assert [next(iter(result.parts)) for result in results] == REGIONS
+    assert parts(wb.close()) == serial()
+
+
+def test_worksheets_must_be_empty_and_have_one_job():
+    wb = Writter(sheet_names=REGIONS)
+    build(wb, "North", FRAMES["North"])
+
+    with pytest.raises(ValueError, match="must be empty"):
+        render_sheets(wb, [SheetJob("North", build, ("North", FRAMES["North"]))], workers=1)
+    job = SheetJob("South", build, ("South", FRAMES["South"]))
+    with pytest.raises(ValueError, match="several jobs"):
+        render_sheets(wb, [job, job], workers=1)
+    with pytest.raises(ValueError, match="Unknown worksheet"):
+        render_sheets(wb, [SheetJob("West", build, ("West", FRAMES["South"]))], workers=1)
+
+
+def test_constant_memory_is_refused(tmp_path):
+    wb = Writter(tmp_path / "streamed.xlsx", sheet_names=REGIONS, constant_memory=True)
+
+    with pytest.raises(ValueError, match="constant_memory"):
+        render_sheets(wb, [SheetJob("North", build, ("North", FRAMES["North"]))], workers=1)
+    wb.close()
@@ -0,0 +1,112 @@
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_charts import Table, Writter
+from excel_charts.sanitize import MissingPolicy, Sanitize, is_missing, missing_mask
+from excel_charts.table import WriteEngine
+
+DATA = pd.DataFrame({
+    "x": [1.0, np.nan, np.inf],
+    "label": ["a", None, "c"],
+    "when": pd.to_datetime(["2024-01-01", None, "2024-01-03"]),
+})
+
+# Missing cell by policy, without its style.
+MISSING_CELL = {
+    "blank": None,
+    "na": '<c r="{}" t="e"><f>NA()</f><v>#N/A</v></c>',
+    "zero": '<c r="{}"><v>0</v></c>',
+}
+
+
+def cell(xml: str, ref: str):
+    """The XML of cell ``ref`` without its style, None if not written."""
+    match = re.search(rf'<c r="{ref}"[^>]*?(?:/>|>.*?</c>)', xml)
+    if match is None:
+        return None
+    return re.sub(r' s="\d+"', "", match.group(0))
+
+
+def write(path=None, constant_memory=False, engine=WriteEngine.COLUMN, **options) -> str:
+    wb = Writter(path, sheet_names=["Data"], constant_memory=constant_memory)
+    table = Table("T", DATA, wb, worksheet="Data", position="A1", **options)
+    table.add_to_worksheet(add_title=False, engine=engine)
+    output = wb.close() or path
+    with zipfile.ZipFile(output) as archive:
+        return archive.read("xl/worksheets/sheet1.xml").decode()
+
+
+def test_missing_mask_by_dtype():
+    assert missing_mask(DATA["x"]).tolist() == [False, True, True]
+    assert missing_mask(DATA["label"]).tolist() == [False, True, False]
+    assert missing_mask(DATA["when"]).tolist() == [False, True, False]
+    assert missing_mask(pd.Series([1, None], dtype="Int64")).tolist() == [False, True]
+    assert missing_mask(pd.Series(["a", -np.inf], dtype=object)).tolist() == [False, True]
+    assert not missing_mask(pd.Series([1, 2])).any()
+
+
+@pytest.mark.parametrize("value, expected", [
+    (np.nan, True), (np.inf, True), (None, True), (pd.NaT, True), (pd.NA, True),
+    (0.0, False), ("", False), ([1], False),
+])
+def test_is_missing(value, expected):
+    assert is_missing(value) is expected
+
+
+def test_coerce_and_sentinel_validation():
+    assert Sanitize.coerce("na") == Sanitize(MissingPolicy.NA)
+    assert Sanitize.coerce(None) is None
+    with pytest.raises(ValueError, match="sentinel"):
+        Sanitize(MissingPolicy.SENTINEL)
+
+
+@pytest.mark.parametrize("policy", ["blank", "na", "zero"])
+@pytest.mark.parametrize("engine", [WriteEngine.COLUMN, WriteEngine.CELL])
+def test_policies_write_the_missing_cells(policy, engine):
+    xml = write(sanitize=policy, engine=engine)
+
+    expected = MISSING_CELL[policy]
+    # NaN, None and NaT on row 3, inf on row 4.
+    for ref in ("A3", "B3", "A4"):
+        assert cell(xml, ref) == (expected and expected.format(ref))
+    assert cell(xml, "A2") == '<c r="A2"><v>1</v></c>'
+
+
+def test_blank_keeps_the_column_format():
+    xml = write(sanitize="blank")
+
+    # The datetime column is formatted, so its blank is written.
+    assert re.search(r'<c r="C3" s="\d+"/>', xml)
+    assert cell(xml, "B3") is None
+
+
+def test_sentinel_is_written_as_a_value():
+    xml = write(sanitize=Sanitize(MissingPolicy.SENTINEL, sentinel=-1))
+
+    assert cell(xml, "A3") == '<c r="A3"><v>-1</v></c>'
+
+
+@pytest.mark.parametrize("policy", ["blank", "na", "zero"])
+def test_engines_and_constant_memory_agree(policy, tmp_path):
+    column = write(sanitize=policy)
+
+    assert write(sanitize=policy, engine=WriteEngine.CELL) == column
+    # Strings are written inline in constant_memory mode: compare the others.
+    streamed = write(tmp_path / "streamed.xlsx", constant_memory=True, sanitize=policy)
+    for ref in ("A2", "A3", "A4", "C2", "C3", "C4"):
+        assert cell(streamed, ref) == cell(column, ref)
+
+
+def test_styler_cells_follow_the_policy():
+    # A font size is no conditional format: the cell is rewritten alone.
+    styler = DATA.style.map(
+        lambda value: "font-size: 14pt" if pd.isna(value) else "", subset=["x"]
+    )
+    xml = write(style=styler, sanitize="na")
+
+    assert cell(xml, "A3") == MISSING_CELL["na"].format("A3")
+    assert re.search(r'<c r="A3" s="\d+"', xml)
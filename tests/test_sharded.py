@@ -0,0 +1,100 @@
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+from excel_charts import Table, Writter
+from excel_charts.aggregate import Aggregate
+from excel_charts.sharded import ShardedTable, continuation_sheet, sheet_name
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({"x": range(10), "y": [float(n) for n in range(10)]})
+
+
+def cell(archive: zipfile.ZipFile, sheet: int, ref: str) -> str:
+    xml = archive.read(f"xl/worksheets/sheet{sheet}.xml").decode()
+    return re.search(rf'<c r="{ref}"[^>]*><v>([^<]*)</v>', xml).group(1)
+
+
+def test_continuation_sheet_names_stay_valid():
+    assert continuation_sheet("Data", 2) == "Data (2)"
+    assert len(continuation_sheet("x" * 31, 12)) == 31
+    assert sheet_name("x" * 40, " summary").endswith(" summary")
+
+
+def test_shards_split_rows_across_sheets(data):
+    wb = Writter(sheet_names=["Data"])
+    table = ShardedTable("Big", data, wb, worksheet="Data", position="A2", max_rows=4)
+    table.add_to_worksheet()
+
+    assert [shard.worksheet for shard in table.shards] == ["Data", "Data (2)", "Data (3)"]
+    assert [len(shard.data) for shard in table.shards] == [4, 4, 2]
+    # Title on row 1, header on row 2: the data starts on row 3.
+    assert table.area_refs(1) == [
+        "Data!$B$3:$B$6",
+        "'Data (2)'!$B$3:$B$6",
+        "'Data (3)'!$B$3:$B$4",
+    ]
+
+    with zipfile.ZipFile(wb.close()) as archive:
+        # First row of the second shard is the fifth row of the data.
+        assert cell(archive, 2, "A3") == "4"
+        assert cell(archive, 3, "B4") == "9"
+
+
+def test_area_refs_without_title(data):
+    wb = Writter(sheet_names=["Data"])
+    table = ShardedTable("Big", data, wb, worksheet="Data", position="A2", max_rows=4)
+    table.add_to_worksheet(add_title=False)
+
+    assert table.area_refs(0)[1] == "'Data (2)'!$A$3:$A$6"
+
+
+def test_charts_read_the_summary_of_several_shards(data):
+    wb = Writter(sheet_names=["Data"])
+    table = ShardedTable(
+        "Big", data, wb, worksheet="Data", position="A2", max_rows=4,
+        summary=Aggregate(by="x"),
+    )
+    table.add_to_worksheet()
+
+    assert table.chart_source is table.summary_table
+    assert table.get_ref(1)[0] == "Data summary"
+    assert table.summary_table.data["y"].tolist() == data["y"].tolist()
+
+
+def test_single_shard_is_charted_directly(data):
+    wb = Writter(sheet_names=["Data"])
+    table = ShardedTable("Small", data, wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+
+    assert table.summary_table is None
+    assert table.get_ref(1) == table.shards[0].get_ref(1)
+    assert table.get_ref(1)[0] == "Data"
+
+
+def test_sharded_table_must_be_written_before_charting(data):
+    table = ShardedTable("Big", data, Writter(sheet_names=["Data"]), worksheet="Data")
+
+    with pytest.raises(RuntimeError):
+        table.get_ref(1)
+
+
+def test_max_rows_must_fit_below_position(data):
+    with pytest.raises(ValueError, match="max_rows"):
+        ShardedTable(
+            "Big", data, Writter(sheet_names=["Data"]), worksheet="Data",
+            position="A1048570", max_rows=100,
+        )
+
+
+def test_table_past_the_row_limit_raises_before_writing(data):
+    wb = Writter(sheet_names=["Data"])
+    table = Table("Too long", data, wb, worksheet="Data", position="A1048570")
+
+    with pytest.raises(ValueError, match="ShardedTable"):
+        table.add_to_worksheet()
+    assert wb.wb.get_worksheet_by_name("Data").dim_rowmax is None
@@ -0,0 +1,39 @@
+from dataclasses import fields
+
+import pandas as pd
+import pytest
+import xlsxwriter
+
+from excel_charts.chart.bar import Bar
+from excel_charts.chart.donut import Donut
+from excel_charts.chart.line import Line
+from excel_charts.chart.scatter import Scatter
+from excel_charts.chunked import ChunkedTable
+from excel_charts.core import BaseChart
+from excel_charts.sharded import ShardedTable
+from excel_charts.table import Table
+
+DATA = pd.DataFrame({"category": ["a", "b"], "value": [1.0, 2.0]})
+
+
+@pytest.mark.parametrize("cls", [Table, ShardedTable, ChunkedTable, BaseChart, Line, Bar, Donut, Scatter])
+def test_classes_are_slotted(cls):
+    assert "__slots__" in vars(cls)
+
+
+@pytest.mark.parametrize("cls, data", [
+    (Table, DATA),
+    (ShardedTable, DATA),
+    (ChunkedTable, [DATA]),
+])
+def test_every_table_field_is_initialized(cls, data, tmp_path):
+    # A plain xlsxwriter Workbook: no Writter sets ``writter``.
+    wb = xlsxwriter.Workbook(tmp_path / "plain.xlsx")
+    wb.add_worksheet("Data")
+    table = cls("T", data, wb, worksheet="Data")
+
+    unset = [f.name for f in fields(table) if not hasattr(table, f.name)]
+    assert unset == []
+    assert table.writter is None
+    assert not table.is_excel_table
+    wb.close()
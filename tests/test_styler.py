@@ -0,0 +1,75 @@
+import zipfile
+
+import pandas as pd
+import pytest
+from pandas.io.formats.excel import CSSToExcelConverter
+
+from excel_charts import Table, Writter
+from excel_charts.styler import compile_styler, excel_properties, styled_cells
+
+CSS = [
+    "font-weight: bold; color: red; background-color: #ff0; border: 1px solid blue; "
+    "text-align: center; vertical-align: middle; number-format: 0.00; "
+    "font-family: Arial; font-size: 12pt; text-decoration: underline line-through; "
+    "font-style: italic; white-space: nowrap",
+    "vertical-align: super; border-top: 3px dashed red; border-left: 2px double",
+    "text-decoration: underline; border-bottom: 1px dotted",
+]
+
+
+@pytest.fixture
+def styler():
+    data = pd.DataFrame({"a": [1, 2, 3, 4], "b": [5.0, 6.0, 7.0, 8.0]})
+    return (
+        data.style
+        .map(lambda value: "color: red" if value > 2 else "")
+        .set_properties(subset=["b"], **{"font-weight": "bold"})
+        .map(lambda value: "font-size: 14pt" if value == 8 else "", subset=["b"])
+    )
+
+
+def test_styled_cells_reads_the_computed_css(styler):
+    ctx = styled_cells(styler)
+
+    assert ("color", "red") in ctx[(2, 0)]
+    assert ("font-weight", "bold") in ctx[(0, 1)]
+
+
+@pytest.mark.parametrize("css", CSS)
+def test_excel_properties_match_pandas_xlsxwriter_writer(css):
+    xlsxwriter_writer = pytest.importorskip("pandas.io.excel._xlsxwriter")
+
+    style = CSSToExcelConverter()(css)
+
+    assert excel_properties(style) == xlsxwriter_writer._XlsxStyler.convert(style)
+
+
+def test_compile_styler_groups_styles(styler):
+    compiled = compile_styler(styler)
+
+    # Most of column b is red and bold: that is its format.
+    assert compiled.col_formats == {1: {"font_color": "FF0000", "bold": True}}
+    # Red cells of column a become one conditional format.
+    assert compiled.rules == [([(2, 0, 3, 0)], {"font_color": "FF0000"})]
+    # A font size cannot be expressed by a conditional format.
+    assert compiled.cell_formats == {
+        (3, 1): {"font_size": 14.0, "font_color": "FF0000", "bold": True},
+    }
+
+
+def test_styled_table_writes_conditional_formats(styler):
+    wb = Writter(sheet_names=["Data"])
+    Table("Styled", styler, wb, worksheet="Data", position="A2").add_to_worksheet()
+
+    with zipfile.ZipFile(wb.close()) as archive:
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+
+    assert '<conditionalFormatting sqref="A5:A6">' in sheet
+
+
+def test_styler_without_computed_styles_raises(styler, monkeypatch):
+    owner = next(cls for cls in type(styler).__mro__ if "_compute" in vars(cls))
+    monkeypatch.delattr(owner, "_compute")
+
+    with pytest.raises(RuntimeError, match="Styler._compute"):
+        compile_styler(styler)
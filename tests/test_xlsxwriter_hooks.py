@@ -0,0 +1,98 @@
+"""The xlsxwriter internals the packagers and workbooks override or call.
+
+A failure here means the installed xlsxwriter moved one of them: check the
+overrides in package.py, cache.py and parallel.py before widening the
+xlsxwriter pin.
+"""
+
+import inspect
+import zipfile
+
+import pandas as pd
+import pytest
+from xlsxwriter.format import Format
+from xlsxwriter.packager import Packager
+from xlsxwriter.workbook import Workbook
+from xlsxwriter.worksheet import Worksheet
+
+from excel_charts import Line, Table, Writter
+from excel_charts.cache import CachingPackager, PartCache
+from excel_charts.package import ExcelPackager, ExcelWorkbook
+
+PACKAGER_HOOKS = {
+    "_create_package": [],
+    "_write_worksheet_files": [],
+    "_write_chart_files": [],
+    "_filename": ["xml_filename"],
+}
+WORKBOOK_HOOKS = ["_get_packager", "_add_chart_data", "_store_workbook"]
+FORMAT_HOOKS = ["_get_format_key", "_get_xf_index", "_get_dxf_index"]
+WORKSHEET_HOOKS = [
+    "_set_xml_writer", "_assemble_xml_file", "_opt_reopen", "_write_single_row",
+]
+
+
+def parameters(function) -> list[str]:
+    return list(inspect.signature(function).parameters)[1:]
+
+
+@pytest.mark.parametrize("name, expected", PACKAGER_HOOKS.items())
+def test_packager_hooks_exist(name, expected):
+    assert parameters(getattr(Packager, name)) == expected
+
+
+@pytest.mark.parametrize("packager", [ExcelPackager, CachingPackager])
+def test_overrides_shadow_packager_methods(packager):
+    overridden = {
+        name for name in vars(packager)
+        if name.startswith("_") and not name.startswith("__") and hasattr(Packager, name)
+    }
+    assert overridden <= set(PACKAGER_HOOKS)
+
+
+@pytest.mark.parametrize("name", WORKBOOK_HOOKS)
+def test_workbook_hooks_exist(name):
+    assert parameters(getattr(Workbook, name)) == []
+
+
+def test_overrides_shadow_workbook_methods():
+    overridden = {
+        name for name in vars(ExcelWorkbook)
+        if name.startswith("_") and not name.startswith("__") and hasattr(Workbook, name)
+    }
+    assert overridden <= set(WORKBOOK_HOOKS)
+
+
+@pytest.mark.parametrize("cls, names", [(Format, FORMAT_HOOKS), (Worksheet, WORKSHEET_HOOKS)])
+def test_called_internals_exist(cls, names):
+    assert [name for name in names if not callable(getattr(cls, name, None))] == []
+
+
+def build(cache: PartCache = None, adopt: bool = False) -> dict:
+    wb = Writter(sheet_names=["Data"], part_cache=cache)
+    data = pd.DataFrame({"day": range(50), "sales": [float(n % 7) for n in range(50)]})
+    table = Table("Sales", data, wb, worksheet="Data", position="A2")
+    table.add_to_worksheet()
+    Line(table, chart_position="E2", worksheet="Data", width=480, height=288)._create_chart()
+    if adopt:
+        ExcelWorkbook.adopt(wb.wb, wb)
+    with zipfile.ZipFile(wb.close()) as archive:
+        return {
+            name: archive.read(name)
+            for name in archive.namelist() if name != "docProps/core.xml"
+        }
+
+
+def test_cached_parts_go_through_the_hooks(tmp_path):
+    cache = PartCache(tmp_path)
+    first = build(cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    assert build(cache) == first
+    assert cache.hits == 2
+
+
+def test_adopted_workbook_writes_the_same_parts():
+    plain = build()
+
+    assert build(adopt=True) == plain